@@ -0,0 +1,84 @@
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+from collections import Counter
+from urllib.parse import urlsplit
+
+# Load test for `tecd http`: N requests from C concurrent keep-alive clients,
+# cycling through D distinct circuits. --baseline instead shells out to the
+# CLI once per request (the setup the server replaces).
+
+# Ladder sections per circuit; the bits of the circuit number pick which
+# sections get a shunt capacitor, so up to 2**SECTIONS circuits differ in
+# topology (not just values) and each one misses the workers' layout cache
+SECTIONS = 8
+
+def make_source(i: int) -> str:
+    lines = ["@circuit", "VDC V1 (dc=5V)", f"RES R[0..{SECTIONS - 1}] (value=1k)", "V1 -> R[0]", "R[i].right -> R[i+1].left",
+             f"R[{SECTIONS - 1}] -> GND"]
+    for k in range(SECTIONS):
+        if i >> k & 1:
+            lines += [f"CAP C{k} (value=1u)", f"R[{k}].right -> C{k} -> GND"]
+    return "\n".join(lines + ["@end"])
+
+async def client(url, sources, jobs, statuses):
+    parts = urlsplit(url)
+    reader, writer = await asyncio.open_connection(parts.hostname, parts.port or 80)
+    while jobs:
+        body = sources[jobs.pop()].encode()
+        writer.write(f"POST {parts.path} HTTP/1.1\r\nHost: {parts.hostname}\r\nContent-Length: {len(body)}\r\n\r\n".encode() + body)
+        await writer.drain()
+        status = (await reader.readline()).split()[1].decode()
+        length = 0
+        while True:
+            line = await reader.readline()
+            if line == b"\r\n":
+                break
+            name, _, value = line.decode().partition(":")
+            if name.lower() == "content-length":
+                length = int(value)
+        await reader.readexactly(length)
+        statuses[status] += 1
+    writer.close()
+
+async def load(url, sources, requests, concurrency):
+    jobs = [i % len(sources) for i in range(requests)]
+    statuses = Counter()
+    await asyncio.gather(*(client(url, sources, jobs, statuses) for _ in range(concurrency)))
+    return statuses
+
+def baseline(sources, requests):
+    statuses = Counter()
+    with tempfile.TemporaryDirectory() as tmp:
+        for i in range(requests):
+            path = os.path.join(tmp, f"{i % len(sources)}.tecd")
+            with open(path, "w") as f:
+                f.write(sources[i % len(sources)])
+            result = subprocess.run([sys.executable, "-m", "tecd.cli", path, path + ".svg"], capture_output=True)
+            statuses["200" if result.returncode == 0 else "error"] += 1
+    return statuses
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://127.0.0.1:8080/render")
+    parser.add_argument("--requests", "-n", type=int, default=500)
+    parser.add_argument("--concurrency", "-c", type=int, default=16)
+    parser.add_argument("--distinct", "-d", type=int, default=20, help=f"Distinct circuits (at most {2 ** SECTIONS})")
+    parser.add_argument("--baseline", action="store_true", help="Shell out to the CLI per request instead")
+    args = parser.parse_args()
+
+    sources = [make_source(i) for i in range(args.distinct)]
+    start = time.perf_counter()
+    if args.baseline:
+        statuses = baseline(sources, args.requests)
+    else:
+        statuses = asyncio.run(load(args.url, sources, args.requests, args.concurrency))
+    elapsed = time.perf_counter() - start
+    print(f"{args.requests} requests in {elapsed:.2f}s: {args.requests / elapsed:.1f} req/s  {dict(statuses)}")
+
+if __name__ == "__main__":
+    main()
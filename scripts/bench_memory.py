@@ -0,0 +1,50 @@
+import sys
+import os
+import gc
+import tracemalloc
+
+# Add src to path
+sys.path.insert(0, os.path.abspath('src'))
+
+from tecd.lexer import tokenize
+from tecd.parser import Parser
+from tecd.semantics import analyze
+
+def make_source(n: int) -> str:
+    # Resistor ladder: every rung adds one component and two connections
+    lines = ["@circuit", "VDC V1 (dc=5V)", "V1 -> N0"]
+    for i in range(n):
+        lines.append(f"RES R{i} (value=1k)")
+        lines.append(f"N{i} -> R{i} -> N{i+1}")
+        lines.append(f"N{i+1} -> GND")
+    lines.append("@end")
+    return "\n".join(lines)
+
+def measure(n: int):
+    source = make_source(n)
+    gc.collect()
+    tracemalloc.start()
+
+    tokens = tokenize(source)
+    after_tokens = tracemalloc.get_traced_memory()[0]
+    ast = Parser(tokens).parse()
+    del tokens
+    gc.collect()
+    after_ast = tracemalloc.get_traced_memory()[0]
+    graph = analyze(ast)
+    gc.collect()
+    after_graph = tracemalloc.get_traced_memory()[0]
+
+    tracemalloc.stop()
+    return after_tokens / n, after_ast / n, after_graph / n
+
+def main():
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 20000
+    tokens, ast, graph = measure(n)
+    print(f"=== TECD memory benchmark ({n} components) ===")
+    print(f"Token stream:     {tokens:8.0f} bytes/component")
+    print(f"AST:              {ast:8.0f} bytes/component")
+    print(f"AST + graph:      {graph:8.0f} bytes/component")
+
+if __name__ == "__main__":
+    main()
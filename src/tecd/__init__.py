@@ -1,7 +1,9 @@
+from typing import Optional
 from .parser import parse
 from .semantics import analyze, CircuitGraph
 
-def compile(source: str) -> CircuitGraph:
-    ast = parse(source)
-    graph = analyze(ast)
+def compile(source: str, flatten: Optional[bool] = None, path: Optional[str] = None) -> CircuitGraph:
+    # path locates @include files (relative to the current directory if not given)
+    ast = parse(source, path)
+    graph = analyze(ast, flatten)
     return graph
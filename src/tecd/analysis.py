@@ -0,0 +1,490 @@
+import cmath
+import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Sequence, Tuple
+from .registry import GROUND, JUNCTION, SOURCE, role, symbol_for
+from .semantics import CircuitGraph
+from .sparse import SINGULAR_TOLERANCE, SingularMatrixError, solve_symmetric
+from .units import format_value, parse_value
+
+# Parameter keys holding an element's value, in order of preference. A
+# component with a single parameter uses it whatever its key.
+VALUE_KEYS = {
+    'RES': ('value', 'r', 'resistance', 'v'),
+    'CAP': ('value', 'c', 'capacitance', 'v'),
+    'IND': ('value', 'l', 'inductance', 'v'),
+    'VDC': ('dc', 'value', 'v'),
+    'IDC': ('dc', 'value', 'i', 'current'),
+}
+# Small-signal excitation: VAC amplitude (1 V if not given) and an optional
+# phase in degrees; IDC only with an explicit 'ac' value
+AC_KEYS = {
+    'VAC': ('ac', 'v', 'value', 'amplitude'),
+    'IDC': ('ac',),
+}
+# The two terminals of each element the solver understands: (+, -) for
+# sources, (first, second) for passives. Other pin names on the symbol
+# (left/right aliases) map onto these by position.
+TERMINALS = {
+    'RES': ('left', 'right'),
+    'IND': ('left', 'right'),
+    'CAP': ('top', 'bottom'),
+    'VDC': ('+', '-'),
+    'VAC': ('+', '-'),
+    'IDC': ('+', '-'),
+}
+
+# Results smaller than this, relative to the largest of their kind, are
+# cancellation noise (a balanced bridge) and reported as exactly zero
+ROUNDOFF = 1e-12
+
+class AnalysisError(Exception):
+    pass
+
+@dataclass
+class OperatingPoint:
+    voltages: Dict[str, float]             # Net.id -> volts
+    # Component name -> amperes. Two-terminal passives: from the first pin to
+    # the second; voltage sources: out of the + terminal; current sources:
+    # their set value (out of the - terminal).
+    currents: Dict[str, float]
+    # Net.id -> display name (a named junction on the net, 'GND', or the id)
+    names: Dict[str, str] = field(default_factory=dict)
+
+class _Potentials:
+    # Weighted union-find over circuit nodes: V[node] = V[parent] + offset.
+    # Every voltage source (and short) ties its two nodes together, so the
+    # nodal system only needs one unknown per group. Node 0 (ground) is always
+    # a root, which keeps grounded groups at a known potential.
+    def __init__(self, count: int):
+        self.parent = list(range(count))
+        self.offset = [0.0] * count
+
+    def find(self, node: int) -> Tuple[int, float]:
+        path = []
+        while self.parent[node] != node:
+            path.append(node)
+            node = self.parent[node]
+        # Compress: point everything on the path straight at the root
+        total = 0.0
+        for n in reversed(path):
+            total += self.offset[n]
+            self.offset[n] = total
+            self.parent[n] = node
+        return node, (self.offset[path[0]] if path else 0.0)
+
+    def tie(self, plus: int, minus: int, volts: float) -> bool:
+        # V[plus] - V[minus] = volts; False if the nodes are already tied
+        rp, op = self.find(plus)
+        rm, om = self.find(minus)
+        if rp == rm:
+            return False
+        if rp == 0:
+            self.parent[rm], self.offset[rm] = rp, op - volts - om
+        else:
+            self.parent[rp], self.offset[rp] = rm, om + volts - op
+        return True
+
+def _value(comp, keys: Tuple[str, ...], default: Optional[float] = None) -> float:
+    params = comp.parameters
+    for key in keys:
+        if key in params:
+            text = params[key]
+            break
+    else:
+        if default is not None:
+            return default
+        if len(params) == 1:
+            text = next(iter(params.values()))
+        else:
+            raise AnalysisError(f"{comp.type_name} '{comp.name}' has no value")
+    try:
+        return parse_value(text)
+    except ValueError as e:
+        raise AnalysisError(f"{comp.type_name} '{comp.name}': {e}") from None
+
+_pin_terminals: Dict[str, Dict[str, int]] = {}
+
+def _terminal_index(type_name: str, pin: str) -> Optional[int]:
+    # Pin name -> 0/1, via the pin positions on the type's symbol
+    mapping = _pin_terminals.get(type_name)
+    if mapping is None:
+        pins = symbol_for(type_name).pins
+        positions = {pins[t]: k for k, t in enumerate(TERMINALS[type_name]) if t in pins}
+        mapping = {name: positions[xy] for name, xy in pins.items() if xy in positions}
+        for k, t in enumerate(TERMINALS[type_name]):
+            mapping.setdefault(t, k)
+        _pin_terminals[type_name] = mapping
+    return mapping.get(pin)
+
+def _net_name(net) -> str:
+    for point in net.points:
+        kind = role(point.component.type_name)
+        if kind == JUNCTION:
+            return point.component.name
+        if kind == GROUND:
+            return 'GND'
+    return net.id
+
+def _terminal_nodes(graph: CircuitGraph, potentials: _Potentials) -> Dict[str, List[int]]:
+    # Component name -> [node of first terminal, node of second terminal].
+    # Node 0 is ground; net i is node i + 1, and grounded nets are tied to 0.
+    terminals: Dict[str, List[Optional[int]]] = {}
+    grounded = False
+    for i, net in enumerate(graph.nets):
+        for point in net.points:
+            comp = point.component
+            kind = role(comp.type_name)
+            if kind == GROUND:
+                potentials.tie(i + 1, 0, 0.0)
+                grounded = True
+                continue
+            if kind == JUNCTION:
+                continue
+            if comp.type_name not in TERMINALS:
+                raise AnalysisError(f"Analysis does not support {comp.type_name} '{comp.name}'")
+            k = _terminal_index(comp.type_name, point.pin_name)
+            if k is None:
+                raise AnalysisError(f"{comp.type_name} '{comp.name}' has no pin '{point.pin_name}'")
+            nodes = terminals.setdefault(comp.name, [None, None])
+            if nodes[k] is not None:
+                potentials.tie(nodes[k], i + 1, 0.0) # Two aliases of one pin
+            nodes[k] = i + 1
+    if not grounded:
+        raise AnalysisError("Circuit has no ground (GND) reference")
+    for name, nodes in terminals.items():
+        comp = graph.components[name]
+        if nodes.count(None) == 1 and role(comp.type_name) == SOURCE:
+            # Single-ended source ('Vin -> R1 -> ...'): the unconnected
+            # terminal is the ground reference
+            nodes[nodes.index(None)] = 0
+        elif None in nodes:
+            pin = TERMINALS[comp.type_name][nodes.index(None)]
+            raise AnalysisError(f"Pin '{pin}' of {comp.type_name} '{name}' is not connected")
+    return terminals
+
+def dc_operating_point(graph: CircuitGraph) -> OperatingPoint:
+    # Nodal analysis of the linear DC network: resistors are conductances,
+    # inductors and zero-ohm resistors shorts, capacitors open. Voltage
+    # sources are folded into supernodes, so the remaining conductance matrix
+    # is symmetric positive definite and goes to the sparse solver.
+    nets = graph.nets
+    potentials = _Potentials(len(nets) + 1)
+    terminals = _terminal_nodes(graph, potentials)
+
+    resistors: List[Tuple[str, int, int, float]] = []
+    current_sources: List[Tuple[str, int, int, float]] = []
+    # (name, + node, - node, sign of the reported current vs. out of +)
+    voltage_sources: List[Tuple[str, int, int, float]] = []
+    for name, comp in graph.components.items():
+        if name not in terminals:
+            continue
+        a, b = terminals[name]
+        kind = comp.type_name
+        if kind == 'CAP':
+            continue
+        if kind == 'IDC':
+            current_sources.append((name, a, b, _value(comp, VALUE_KEYS[kind])))
+            continue
+        if kind == 'RES':
+            ohms = _value(comp, VALUE_KEYS[kind])
+            if ohms < 0:
+                raise AnalysisError(f"RES '{name}' has a negative value")
+            if ohms > 0:
+                resistors.append((name, a, b, 1.0 / ohms))
+                continue
+        # Voltage sources; inductors and 0 ohm resistors are 0 V shorts whose
+        # current is reported from their first pin to the second
+        if kind == 'VDC':
+            volts = _value(comp, VALUE_KEYS[kind])
+        else:
+            volts = _value(comp, ('dc',), 0.0) if kind == 'VAC' else 0.0
+        if not potentials.tie(a, b, volts):
+            raise AnalysisError(f"{kind} '{name}' closes a loop of voltage sources and shorts")
+        voltage_sources.append((name, a, b, 1.0 if kind in ('VDC', 'VAC') else -1.0))
+
+    # One unknown per supernode root other than ground
+    unknown: Dict[int, int] = {}
+    for node in range(1, len(nets) + 1):
+        root, _ = potentials.find(node)
+        if root != 0 and root not in unknown:
+            unknown[root] = len(unknown)
+    rows = [{} for _ in unknown]
+    rhs = [0.0] * len(unknown)
+
+    def stamp(node: int, other: int, g: float, bias: float):
+        # Current g * (V[node] - V[other]) leaving node's supernode, where
+        # bias is the known part of that voltage difference
+        k = unknown.get(node)
+        if k is None:
+            return
+        row = rows[k]
+        row[k] = row.get(k, 0.0) + g
+        j = unknown.get(other)
+        if j is not None:
+            row[j] = row.get(j, 0.0) - g
+        rhs[k] -= g * bias
+
+    for _, a, b, g in resistors:
+        ra, oa = potentials.find(a)
+        rb, ob = potentials.find(b)
+        if ra != rb:
+            stamp(ra, rb, g, oa - ob)
+            stamp(rb, ra, g, ob - oa)
+    for _, a, b, amps in current_sources:
+        ra, _ = potentials.find(a)
+        rb, _ = potentials.find(b)
+        if ra in unknown:
+            rhs[unknown[ra]] -= amps
+        if rb in unknown:
+            rhs[unknown[rb]] += amps
+
+    try:
+        solution = solve_symmetric(rows, rhs)
+    except SingularMatrixError as e:
+        root = next(node for node, k in unknown.items() if k == e.index)
+        net = nets[root - 1]
+        raise AnalysisError(f"Net '{_net_name(net)}' has no DC path to ground") from None
+
+    volts_at = [0.0] * (len(nets) + 1)
+    for node in range(1, len(nets) + 1):
+        root, offset = potentials.find(node)
+        volts_at[node] = offset + (solution[unknown[root]] if root in unknown else 0.0)
+
+    currents: Dict[str, float] = {}
+    # Current leaving each node through everything but voltage sources
+    leaving = [0.0] * (len(nets) + 1)
+    for name, a, b, g in resistors:
+        amps = g * (volts_at[a] - volts_at[b])
+        currents[name] = amps
+        leaving[a] += amps
+        leaving[b] -= amps
+    for name, a, b, amps in current_sources:
+        currents[name] = amps
+        leaving[a] += amps
+        leaving[b] -= amps
+    currents.update(_source_currents(voltage_sources, leaving))
+
+    return OperatingPoint(
+        voltages=_clean({net.id: volts_at[i + 1] for i, net in enumerate(nets)}),
+        currents=_clean({name: currents[name] for name in graph.components if name in currents}),
+        names={net.id: _net_name(net) for net in nets},
+    )
+
+def _clean(values: Dict[str, float]) -> Dict[str, float]:
+    floor = ROUNDOFF * max((abs(v) for v in values.values()), default=0.0)
+    return {k: (0.0 if abs(v) <= floor else v) for k, v in values.items()}
+
+def _source_currents(sources: List[Tuple[str, int, int, float]], leaving: List[float]) -> Dict[str, float]:
+    # Voltage sources form a forest over the nodes (loops were rejected). KCL
+    # at a leaf gives the current in its one source; folding that leaf into
+    # its parent makes the parent a leaf, so a post-order walk gets them all.
+    edges: Dict[int, List[Tuple[int, int]]] = {}
+    for k, (_, a, b, _) in enumerate(sources):
+        edges.setdefault(a, []).append((b, k))
+        edges.setdefault(b, []).append((a, k))
+    currents: Dict[str, float] = {}
+    seen = set()
+    # Roots at ground first, so no current is pushed into the ground node
+    for start in sorted(edges, key=lambda n: n != 0):
+        if start in seen:
+            continue
+        seen.add(start)
+        order: List[Tuple[int, int, int]] = [] # (node, parent, source index)
+        stack = [start]
+        while stack:
+            node = stack.pop()
+            for other, k in edges[node]:
+                if other not in seen:
+                    seen.add(other)
+                    order.append((other, node, k))
+                    stack.append(other)
+        for node, parent, k in reversed(order):
+            name, plus, _, sign = sources[k]
+            # All of leaving[node] must return through this source
+            out_of_plus = leaving[node] if node == plus else -leaving[node]
+            currents[name] = sign * out_of_plus
+            leaving[parent] += leaving[node]
+    return currents
+
+# Upper bound on the stacked complex matrices NumPy solves at once (bytes)
+AC_BATCH_BYTES = 64 << 20
+
+@dataclass
+class FrequencyResponse:
+    frequencies: List[float]
+    # Net.id -> complex transfer (node voltage / input voltage) per frequency
+    transfer: Dict[str, List[complex]]
+    names: Dict[str, str] = field(default_factory=dict)
+    source: str = ''
+
+    def bode(self, net: str) -> Tuple[List[float], List[float]]:
+        # (gain in dB, phase in degrees unwrapped along the sweep)
+        gains, phases = [], []
+        offset = 0.0
+        for h in self.transfer[net]:
+            gains.append(20 * math.log10(max(abs(h), 1e-20)))
+            phase = math.degrees(cmath.phase(h)) + offset
+            if phases:
+                while phase - phases[-1] > 180:
+                    phase -= 360
+                    offset -= 360
+                while phase - phases[-1] < -180:
+                    phase += 360
+                    offset += 360
+            phases.append(phase)
+        return gains, phases
+
+def log_frequencies(start: float, stop: float, points: int) -> List[float]:
+    if start <= 0 or stop <= start or points < 2:
+        raise ValueError("Sweep needs 0 < start < stop and at least 2 points")
+    ratio = (stop / start) ** (1 / (points - 1))
+    return [start * ratio ** k for k in range(points)]
+
+def ac_sweep(graph: CircuitGraph, frequencies: Sequence[float], source: Optional[str] = None) -> FrequencyResponse:
+    # Small-signal response of a linear RLC network. The MNA system is
+    # assembled once as A(w) = G + jw*C (node voltages, then one current per
+    # voltage source and inductor) and solved for every frequency.
+    nets = graph.nets
+    potentials = _Potentials(len(nets) + 1)
+    terminals = _terminal_nodes(graph, potentials)
+
+    index: Dict[int, int] = {}
+    for node in range(1, len(nets) + 1):
+        root, _ = potentials.find(node)
+        if root != 0 and root not in index:
+            index[root] = len(index)
+    node_of = lambda node: index.get(potentials.find(node)[0])
+    kinds = {name: graph.components[name].type_name for name in terminals}
+    if source is None:
+        # The circuit's AC sources, else its DC supply as a 1 V input
+        excitations = [n for n, k in kinds.items() if k == 'VAC' or (k == 'IDC' and 'ac' in graph.components[n].parameters)]
+        candidates = excitations or [n for n, k in kinds.items() if k == 'VDC']
+        if not candidates:
+            raise AnalysisError("No source to drive the sweep: add a VAC")
+        source = candidates[0]
+    elif kinds.get(source) not in ('VAC', 'VDC', 'IDC'):
+        raise AnalysisError(f"'{source}' is not a source")
+
+    branches = [name for name, kind in kinds.items() if kind in ('VDC', 'VAC', 'IND')]
+    size = len(index) + len(branches)
+    G = [[0.0] * size for _ in range(size)]
+    C = [[0.0] * size for _ in range(size)]
+    b = [0j] * size
+
+    def admittance(matrix, a, c, y):
+        i, j = node_of(a), node_of(c)
+        for p, q in ((i, j), (j, i)):
+            if p is not None:
+                matrix[p][p] += y
+                if q is not None:
+                    matrix[p][q] -= y
+
+    for name, (a, c) in terminals.items():
+        comp = graph.components[name]
+        kind = comp.type_name
+        if kind == 'RES':
+            ohms = _value(comp, VALUE_KEYS[kind])
+            if ohms <= 0:
+                raise AnalysisError(f"RES '{name}' needs a positive value for AC analysis")
+            admittance(G, a, c, 1.0 / ohms)
+        elif kind == 'CAP':
+            admittance(C, a, c, _value(comp, VALUE_KEYS[kind]))
+        elif kind == 'IDC' and ('ac' in comp.parameters or name == source):
+            amps = _value(comp, AC_KEYS[kind], 1.0)
+            for node, sign in ((a, -1.0), (c, 1.0)):
+                if node_of(node) is not None:
+                    b[node_of(node)] += sign * amps
+    for k, name in enumerate(branches, start=len(index)):
+        comp = graph.components[name]
+        a, c = terminals[name]
+        # Branch current flows into the first terminal: V(a) - V(c) = E + jwL*I
+        for node, sign in ((a, 1.0), (c, -1.0)):
+            i = node_of(node)
+            if i is not None:
+                G[i][k] += sign
+                G[k][i] += sign
+        if comp.type_name == 'IND':
+            C[k][k] = -_value(comp, VALUE_KEYS['IND'])
+        elif comp.type_name == 'VAC':
+            amplitude = _value(comp, AC_KEYS['VAC'], 1.0)
+            phase = _value(comp, ('phase',), 0.0)
+            b[k] = cmath.rect(amplitude, math.radians(phase))
+        elif name == source:
+            b[k] = 1.0 # DC supplies are shorts, except the one driving the sweep
+
+    omegas = [2 * math.pi * f for f in frequencies]
+    solutions = _solve_sweep(G, C, b, omegas, frequencies)
+
+    # Input voltage: across the source, or at its driven terminal when the
+    # other one is ground
+    a, c = terminals[source]
+    if kinds[source] == 'IDC':
+        a, c = c, a # Drives its '-' terminal
+    ia, ic = node_of(a), node_of(c)
+    if ia is None:
+        ia, ic = ic, None
+    vin = [x[ia] - (x[ic] if ic is not None else 0j) if ia is not None else 0j for x in solutions]
+    transfer: Dict[str, List[complex]] = {}
+    for i, net in enumerate(nets):
+        k = node_of(i + 1)
+        if k is None:
+            continue # Ground
+        transfer[net.id] = [x[k] / v if v else 0j for x, v in zip(solutions, vin)]
+    return FrequencyResponse(list(frequencies), transfer, {net.id: _net_name(net) for net in nets}, source)
+
+def _solve_sweep(G, C, b, omegas: List[float], frequencies: Sequence[float]) -> List[List[complex]]:
+    try:
+        import numpy
+    except ImportError:
+        return [_solve_dense(G, C, b, w, f) for w, f in zip(omegas, frequencies)]
+    n = len(b)
+    G, C = numpy.asarray(G, dtype=float), numpy.asarray(C, dtype=float)
+    rhs = numpy.asarray(b, dtype=complex)
+    chunk = max(1, AC_BATCH_BYTES // (16 * n * n or 1))
+    results = []
+    for start in range(0, len(omegas), chunk):
+        w = numpy.asarray(omegas[start:start + chunk])
+        # One stacked (frequencies, n, n) system per chunk
+        stack = G[None, :, :] + 1j * w[:, None, None] * C[None, :, :]
+        try:
+            x = numpy.linalg.solve(stack, numpy.broadcast_to(rhs, (len(w), n))[..., None])[..., 0]
+        except numpy.linalg.LinAlgError:
+            # Re-solve the chunk one frequency at a time to report which failed
+            for w_k, f_k in zip(omegas[start:start + chunk], frequencies[start:start + chunk]):
+                _solve_dense(G.tolist(), C.tolist(), b, w_k, f_k)
+            raise AnalysisError("AC system is singular") from None
+        results.extend(x.tolist())
+    return results
+
+def _solve_dense(G, C, b, omega: float, frequency: float) -> List[complex]:
+    # Gaussian elimination with partial pivoting on G + jwC
+    n = len(b)
+    rows = [[complex(g, omega * c) for g, c in zip(G[i], C[i])] + [b[i]] for i in range(n)]
+    scale = max((abs(v) for row in rows for v in row[:n]), default=0.0) or 1.0
+    for p in range(n):
+        pivot = max(range(p, n), key=lambda i: abs(rows[i][p]))
+        if abs(rows[pivot][p]) <= SINGULAR_TOLERANCE * scale:
+            raise AnalysisError(f"AC system is singular at {format_value(frequency, 'Hz')} "
+                                "(a node with no path to ground, or an ideal LC resonance)")
+        rows[p], rows[pivot] = rows[pivot], rows[p]
+        top = rows[p]
+        for i in range(p + 1, n):
+            f = rows[i][p] / top[p]
+            if f:
+                row = rows[i]
+                for j in range(p, n + 1):
+                    row[j] -= f * top[j]
+    x = [0j] * n
+    for p in range(n - 1, -1, -1):
+        row = rows[p]
+        x[p] = (row[n] - sum(row[j] * x[j] for j in range(p + 1, n))) / row[p]
+    return x
+
+def annotations(op: OperatingPoint) -> "Annotations":
+    # Node voltages and branch currents as diagram annotations
+    from .renderer import Annotations
+    return Annotations(
+        components={name: format_value(amps, 'A') for name, amps in op.currents.items()},
+        nets={net: format_value(volts, 'V') for net, volts in op.voltages.items()},
+    )
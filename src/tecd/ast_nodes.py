@@ -1,43 +1,77 @@
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Union
 
-@dataclass
+@dataclass(slots=True)
 class SourceLocation:
     line: int
     column: int
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class ASTNode:
     location: Optional[SourceLocation] = None
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class Parameter(ASTNode):
     key: str
     value: str
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class Component(ASTNode):
     type_name: str
     name: str
     parameters: Dict[str, str]
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
+class ComponentArray(ASTNode):
+    # RES R[0..1023] (value=1k): one node for the whole array, expanded
+    # into R[0] .. R[1023] by the semantic analyzer
+    type_name: str
+    name: str
+    start: int
+    stop: int  # inclusive
+    parameters: Dict[str, str]
+
+@dataclass(kw_only=True, slots=True)
+class Index(ASTNode):
+    # R[i+1]: var='i', offset=1; R[0..7]: offset=0, stop=7
+    var: Optional[str] = None
+    offset: int = 0
+    stop: Optional[int] = None
+
+@dataclass(kw_only=True, slots=True)
 class PinReference(ASTNode):
     component_name: str
     pin_name: Optional[str] = None
+    # Set for R[i] and R[0..7]; literal subscripts (R[3]) are folded into component_name
+    index: Optional[Index] = None
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class Connection(ASTNode):
     source: PinReference
     target: PinReference
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class Option(ASTNode):
     key: str
     value: str
 
-@dataclass(kw_only=True)
+@dataclass(kw_only=True, slots=True)
 class Circuit(ASTNode):
-    components: List[Component] = field(default_factory=list)
+    name: Optional[str] = None # @circuit NAME
+    components: List[Union[Component, ComponentArray]] = field(default_factory=list)
     connections: List[Connection] = field(default_factory=list)
     options: Dict[str, str] = field(default_factory=dict)
+    # Definitions visible to this circuit, in definition order
+    subcircuits: Dict[str, 'SubcircuitDef'] = field(default_factory=dict)
+    # Absolute paths of every file pulled in by @include, transitively
+    dependencies: List[str] = field(default_factory=list)
+
+@dataclass(kw_only=True, slots=True)
+class SubcircuitDef(ASTNode):
+    # @subcircuit NAME (port, ...) ... @end. Ports are net names in the body.
+    name: str
+    ports: List[str]
+    body: Circuit
+    # Hash of the definition's tokens and of every definition it instantiates;
+    # compiled subcircuits are cached under it
+    digest: str
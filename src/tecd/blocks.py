@@ -0,0 +1,118 @@
+import os
+import re
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Lines that open or close a block; only the keyword and an optional name
+# are looked at, so the scan never tokenizes circuit bodies
+BLOCK_LINE = re.compile(r'^[ \t]*(@circuit|@subcircuit|@options|@end)\b[ \t]*([A-Za-z0-9_%+-]*)', re.M)
+
+@dataclass
+class CircuitBlock:
+    name: Optional[str]
+    start: int  # offset of the @circuit line
+    end: int    # offset just past the matching @end line
+    line: int
+
+def scan_blocks(source: str) -> List[CircuitBlock]:
+    # Top-level @circuit ... @end spans, found without parsing
+    blocks = []
+    depth = 0
+    opened: Optional[Tuple[re.Match, int]] = None
+    for m in BLOCK_LINE.finditer(source):
+        keyword = m.group(1)
+        if keyword == '@end':
+            depth -= 1
+            if depth == 0 and opened is not None:
+                start_match, line = opened
+                end = source.find('\n', m.end())
+                blocks.append(CircuitBlock(start_match.group(2) or None, start_match.start(),
+                                           len(source) if end < 0 else end + 1, line))
+                opened = None
+            depth = max(depth, 0)
+            continue
+        if depth == 0 and keyword == '@circuit':
+            opened = (m, source.count('\n', 0, m.start()) + 1)
+        depth += 1
+    return blocks
+
+def block_source(source: str, blocks: List[CircuitBlock], index: int) -> str:
+    # The file as block `index` sees it: includes and subcircuits kept, other
+    # circuits blanked to newlines so line numbers in errors stay correct
+    parts = []
+    pos = 0
+    for i, block in enumerate(blocks):
+        parts.append(source[pos:block.start])
+        text = source[block.start:block.end]
+        parts.append(text if i == index else '\n' * text.count('\n'))
+        pos = block.end
+    parts.append(source[pos:])
+    return ''.join(parts)
+
+def block_outputs(blocks: List[CircuitBlock], output_file: str) -> List[str]:
+    # out.svg -> out-<name>.svg, or out-<n>.svg for unnamed blocks
+    base, ext = os.path.splitext(output_file)
+    return [f"{base}-{block.name or i + 1}{ext or '.svg'}" for i, block in enumerate(blocks)]
+
+def _render_block(job: Tuple[str, str, str, Dict[str, str], Optional[bool], Optional[List[str]], bool, Optional[Dict]]) -> Tuple[str, Optional[str]]:
+    # Runs in a worker: compile, lay out, route and render one block (or
+    # emit each requested format from the one layout).
+    # Returns (output path, error message or None).
+    source, path, output_file, overrides, flatten, formats, parallel, search = job
+    from . import compile
+    from .layout import compute_layout
+    from .renderer import render_svg
+    from .routing import route_nets
+    try:
+        graph = compile(source, flatten, path)
+        graph.options.update(overrides)
+        if search:
+            # The blocks already share the pool, so each searches its
+            # starts in its own worker, one after another
+            from .search import search_layout
+            layout, _, _ = search_layout(graph, source, path, flatten, jobs=1, **search)
+        else:
+            layout = compute_layout(graph)
+        if formats:
+            from .emit import emit, emit_paths
+            errors = emit(graph, layout, route_nets(graph, layout), emit_paths(output_file, formats), parallel)
+            failed = [f"{name}: {error}" for name, error in errors.items() if error]
+            return output_file, "; ".join(failed) or None
+        svg = render_svg(graph, layout, routes=route_nets(graph, layout))
+        with open(output_file, 'w') as f:
+            f.write(svg)
+        return output_file, None
+    except Exception as e:
+        return output_file, str(e)
+
+def _render_pooled(job) -> Tuple[Tuple[str, Optional[str]], int]:
+    # _render_block in a pool worker, plus the layout-cache hits it scored
+    # there so the parent's count covers blocks laid out out of process
+    from .topology import layout_cache
+    hits = layout_cache.hits
+    result = _render_block(job)
+    return result, layout_cache.hits - hits
+
+def render_blocks(source: str, path: Optional[str], output_file: str, overrides: Optional[Dict[str, str]] = None,
+                  flatten: Optional[bool] = None, jobs: Optional[int] = None,
+                  formats: Optional[List[str]] = None, search: Optional[Dict] = None,
+                  emit_parallel: bool = False) -> List[Tuple[str, Optional[str]]]:
+    # Each @circuit block goes to its own worker process, so the wall time
+    # is set by the largest block rather than the sum of all of them
+    blocks = scan_blocks(source)
+    outputs = block_outputs(blocks, output_file)
+    work = [(block_source(source, blocks, i), path, outputs[i], overrides or {}, flatten, formats, emit_parallel, search)
+            for i in range(len(blocks))]
+    if jobs == 1 or len(work) <= 1:
+        return [_render_block(job) for job in work]
+    from concurrent.futures import ProcessPoolExecutor
+    from .topology import layout_cache
+
+    # Largest blocks are started first so a big one never runs alone at the end
+    order = sorted(range(len(work)), key=lambda i: blocks[i].start - blocks[i].end)
+    results: List[Tuple[str, Optional[str]]] = [None] * len(work)
+    with ProcessPoolExecutor(max_workers=min(jobs or os.cpu_count() or 1, len(work))) as pool:
+        for i, (result, hits) in zip(order, pool.map(_render_pooled, [work[i] for i in order])):
+            results[i] = result
+            layout_cache.hits += hits
+    return results
@@ -1,29 +1,104 @@
+# Only what `tecd check` needs is imported up front; layout, routing and
+# rendering (and the process pools) are imported by the commands that use them
 from . import compile
-from .layout import compute_layout
-from .renderer import render_svg
+from .blocks import block_source, render_blocks, scan_blocks
+from .erc import ERROR, check as check_graph
+from .lexer import tokenize
+from .parser import Parser, parse
+from .semantics import analyze
+from .modules import DependencyGraph
 import sys
 import os
 import time
 import argparse
 
-def visualize(source_file, output_file, layout_override=None):
+def visualize(source_file, output_file, layout_override=None, routing_override=None, flatten=None, dependencies=None, jobs=None, search=None,
+              emit=None, emit_parallel=False):
     print(f"Reading {source_file}...")
     try:
         with open(source_file, 'r') as f:
             source = f.read()
+
+        blocks = scan_blocks(source)
+        if len(blocks) > 1:
+            return visualize_blocks(source, source_file, output_file, layout_override, routing_override, flatten, dependencies, jobs,
+                                    emit, search, emit_parallel)
         
         print("Compiling...")
-        graph = compile(source)
-        
+        ast = parse(source, source_file)
+        if dependencies is not None:
+            dependencies.update(source_file, ast.dependencies)
+        graph = analyze(ast, flatten)
+        if search:
+            # Workers recompile the circuit from source for each start
+            search = (source, source_file, flatten, search, jobs)
+        return render_graph(graph, output_file, layout_override, routing_override, search=search, emit=emit, emit_parallel=emit_parallel)
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
+def visualize_blocks(source, source_file, output_file, layout_override=None, routing_override=None, flatten=None, dependencies=None, jobs=None,
+                     emit=None, search=None, emit_parallel=False):
+    if dependencies is not None:
+        # Includes live outside the circuit blocks: parse just that part
+        preamble = Parser(tokenize(block_source(source, scan_blocks(source), -1)), source_file)
+        preamble.parse_library()
+        dependencies.update(source_file, preamble.dependencies)
+
+    overrides = {}
+    if layout_override:
+        overrides['layout'] = layout_override
+    if routing_override:
+        overrides['routing'] = routing_override
+    results = render_blocks(source, source_file, output_file, overrides, flatten, jobs, emit, search, emit_parallel)
+    print(f"Compiled {len(results)} circuits")
+    ok = True
+    for path, error in results:
+        if error:
+            print(f"Error ({path}): {error}")
+            ok = False
+        else:
+            print(f"Saved to {path}")
+    return ok
+
+def render_graph(graph, output_file, layout_override=None, routing_override=None, annotations=None, search=None, emit=None, emit_parallel=False):
+    from .layout import compute_layout
+    from .renderer import render_svg
+    from .routing import route_nets, wire_stats
+
+    try:
         if layout_override:
             print(f"Overriding layout to: {layout_override}")
             graph.options['layout'] = layout_override
+        if routing_override:
+            graph.options['routing'] = routing_override
         
         print("Layout...")
-        layout = compute_layout(graph)
+        if search:
+            from .search import search_layout
+            source, path, flatten, options, jobs = search
+            layout, choice, score = search_layout(graph, source, path, flatten, jobs=jobs, **options)
+            print(f"Best layout: {choice} ({score.overlaps} overlaps, {score.crossings} crossings, length {score.length:.0f})")
+        else:
+            layout = compute_layout(graph)
         
+        print("Routing...")
+        routes = route_nets(graph, layout)
+        stats = wire_stats(routes)
+        print(f"Wires: {stats['nets']} nets, total length {stats['length']:.0f}, {stats['crossings']} crossings")
+
+        if emit:
+            # Every format from this one layout
+            from .emit import emit as emit_outputs, emit_paths
+            print(f"Emitting {', '.join(emit)}...")
+            paths = emit_paths(output_file, emit)
+            errors = emit_outputs(graph, layout, routes, paths, emit_parallel)
+            for name, error in errors.items():
+                print(f"Error ({paths[name]}): {error}" if error else f"Saved to {paths[name]}")
+            return not any(errors.values())
+
         print("Rendering...")
-        svg = render_svg(graph, layout)
+        svg = render_svg(graph, layout, routes=routes, annotations=annotations)
         
         with open(output_file, 'w') as f:
             f.write(svg)
@@ -33,35 +108,404 @@ def visualize(source_file, output_file, layout_override=None):
         print(f"Error: {e}")
         return False
 
-def watch_mode(source_file, output_file, layout_override=None):
+def watch_mode(source_file, output_file, layout_override=None, routing_override=None, flatten=None, jobs=None, search=None,
+               emit=None, emit_parallel=False):
     print(f"Watching {source_file} for changes...")
-    last_mtime = 0
+    dependencies = DependencyGraph()
     try:
+        while not os.path.exists(source_file):
+            print(f"File not found: {os.path.abspath(source_file)}")
+            time.sleep(1)
+        # Later rebuilds are triggered by the file or anything it includes
+        dependencies.update(source_file, [])
+        visualize(source_file, output_file, layout_override, routing_override, flatten, dependencies, jobs, search, emit, emit_parallel)
         while True:
-            try:
-                mtime = os.path.getmtime(source_file)
-            except FileNotFoundError:
-                print(f"File not found: {os.path.abspath(source_file)}")
-                time.sleep(1)
-                continue
-
-            if mtime > last_mtime:
+            if dependencies.changed():
                 print("\n--- Change detected ---")
-                visualize(source_file, output_file, layout_override)
-                last_mtime = mtime
+                visualize(source_file, output_file, layout_override, routing_override, flatten, dependencies, jobs, search, emit, emit_parallel)
             
             time.sleep(0.5)
     except KeyboardInterrupt:
         print("\nStopping watch mode.")
 
-def main():
+def build_command(argv):
+    parser = argparse.ArgumentParser(prog="tecd build", description="Render several .tecd files, sharing parsed @include files")
+    parser.add_argument("inputs", nargs="+", help="Input .tecd files")
+    parser.add_argument("--out-dir", "-o", help="Directory for the .svg files (default: next to each input)")
+    parser.add_argument("--layout", "-l", choices=['horizontal', 'vertical', 'automatic'], help="Override layout direction")
+    parser.add_argument("--routing", "-r", choices=['style', 'grid'], help="Wire routing: layout style (default) or obstacle-avoiding grid router")
+    parser.add_argument("--flatten", action="store_true", default=None, help="Expand subcircuit instances into their components")
+    parser.add_argument("--watch", "-w", action="store_true", help="Rebuild the files affected by each change")
+    args = parser.parse_args(argv)
+
+    if args.out_dir:
+        os.makedirs(args.out_dir, exist_ok=True)
+    outputs = {}
+    for source in args.inputs:
+        base = os.path.splitext(os.path.basename(source) if args.out_dir else source)[0]
+        outputs[os.path.abspath(source)] = os.path.join(args.out_dir or '', base + ".svg")
+
+    dependencies = DependencyGraph()
+    def build(sources):
+        ok = True
+        for source in sources:
+            ok = visualize(source, outputs[source], args.layout, args.routing, args.flatten, dependencies) and ok
+        return ok
+
+    for source in outputs:
+        dependencies.update(source, [])
+    ok = build(list(outputs))
+    from .topology import layout_cache
+    print(f"Built {len(outputs)} file(s), {layout_cache.hits} layout(s) reused from isomorphic circuits")
+    if not args.watch:
+        return ok
+
+    print("Watching for changes...")
+    try:
+        while True:
+            affected = dependencies.changed()
+            if affected:
+                print(f"\n--- Change detected: rebuilding {len(affected)} file(s) ---")
+                build(affected)
+            time.sleep(0.5)
+    except KeyboardInterrupt:
+        print("\nStopping watch mode.")
+    return True
+
+def tiles_command(argv):
+    from .layout import compute_layout
+    from .tiles import TILE_SIZE, render_tiles
+
+    parser = argparse.ArgumentParser(prog="tecd tiles", description="Render a pyramid of SVG tiles for a circuit")
+    parser.add_argument("input", help="Input .tecd file")
+    parser.add_argument("output_dir", help="Directory to write {z}/{x}/{y}.svg tiles into")
+    parser.add_argument("--levels", type=int, default=3, help="Number of zoom levels (default: 3)")
+    parser.add_argument("--tile-size", type=int, default=TILE_SIZE, help="Tile width/height in pixels")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Worker processes (default: CPU count)")
+    parser.add_argument("--layout", "-l", choices=['horizontal', 'vertical', 'automatic'], help="Override layout direction")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.input, 'r') as f:
+            source = f.read()
+        graph = compile(source, path=args.input)
+        if args.layout:
+            graph.options['layout'] = args.layout
+        layout = compute_layout(graph)
+        paths = render_tiles(graph, layout, args.output_dir, args.levels, args.tile_size, args.jobs)
+        print(f"Wrote {len(paths)} tiles to {args.output_dir}")
+        return True
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+
+def import_spice_command(argv):
+    from .spice import SpiceImporter
+
+    parser = argparse.ArgumentParser(prog="tecd import-spice", description="Render a SPICE netlist as a circuit diagram")
+    parser.add_argument("input", help="Input SPICE deck (.cir/.sp/.net)")
+    parser.add_argument("output", nargs="?", help="Output .svg file")
+    parser.add_argument("--layout", "-l", choices=['horizontal', 'vertical', 'automatic'], help="Override layout direction")
+    parser.add_argument("--routing", "-r", choices=['style', 'grid'], help="Wire routing: layout style (default) or obstacle-avoiding grid router")
+    args = parser.parse_args(argv)
+
+    output = args.output or os.path.splitext(args.input)[0] + ".svg"
+    print(f"Importing {args.input}...")
+    try:
+        importer = SpiceImporter()
+        graph = importer.import_file(args.input)
+    except Exception as e:
+        print(f"Error: {e}")
+        return False
+    print(f"Imported {len(graph.components)} components, {len(graph.nets)} nets")
+    for letter, count in sorted(importer.skipped.items()):
+        print(f"Skipped {count} unsupported '{letter}' element(s)")
+    return render_graph(graph, output, args.layout, args.routing)
+
+def check_source(source, path=None, erc=True):
+    # Lex, parse, analyze and (optionally) rule-check every circuit in the
+    # source; returns (circuit count, component count, net count, violations)
+    blocks = scan_blocks(source)
+    sources = [block_source(source, blocks, i) for i in range(len(blocks))] if len(blocks) > 1 else [source]
+    components = nets = 0
+    violations = []
+    for block in sources:
+        # Unknown types become placeholders here and are reported by the
+        # rule check along with everything else
+        graph = analyze(parse(block, path), strict=not erc)
+        components += len(graph.components)
+        nets += len(graph.nets)
+        if erc:
+            violations.extend(check_graph(graph))
+    return len(sources), components, nets, violations
+
+def check_command(argv):
+    parser = argparse.ArgumentParser(prog="tecd check", description="Validate .tecd files without laying them out or rendering")
+    parser.add_argument("inputs", nargs="+", help="Input .tecd files")
+    parser.add_argument("--quiet", "-q", action="store_true", help="Only report errors and warnings")
+    parser.add_argument("--no-erc", action="store_true", help="Skip the electrical rule checks")
+    parser.add_argument("--strict", action="store_true", help="Fail on rule-check warnings too")
+    args = parser.parse_args(argv)
+
+    ok = True
+    for path in args.inputs:
+        try:
+            with open(path, 'r') as f:
+                source = f.read()
+            circuits, components, nets, violations = check_source(source, path, erc=not args.no_erc)
+        except Exception as e:
+            print(f"{path}: error: {e}")
+            ok = False
+            continue
+        for violation in violations:
+            print(violation.format(path))
+            if violation.severity == ERROR or args.strict:
+                ok = False
+        if not args.quiet:
+            print(f"{path}: ok ({circuits} circuit(s), {components} components, {nets} nets)" if not violations else
+                  f"{path}: {len(violations)} problem(s) ({circuits} circuit(s), {components} components, {nets} nets)")
+    return ok
+
+def solve_command(argv):
+    import json
+    from .analysis import annotations, dc_operating_point
+    from .units import format_value
+
+    parser = argparse.ArgumentParser(prog="tecd solve", description="Solve the DC operating point of a resistor network")
+    parser.add_argument("input", help="Input .tecd file")
+    parser.add_argument("--annotate", "-a", metavar="SVG", help="Also render the diagram with node voltages and branch currents")
+    parser.add_argument("--json", action="store_true", help="Print the operating point as JSON")
+    parser.add_argument("--layout", "-l", choices=['horizontal', 'vertical', 'automatic'], help="Override layout direction")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.input, 'r') as f:
+            source = f.read()
+        # Subcircuit instances are solved through their contents
+        graph = compile(source, flatten=True, path=args.input)
+        op = dc_operating_point(graph)
+    except Exception as e:
+        print(f"{args.input}: error: {e}")
+        return False
+
+    if args.json:
+        print(json.dumps({
+            'voltages': {op.names[net]: volts for net, volts in op.voltages.items()},
+            'currents': op.currents,
+        }, indent=2))
+    else:
+        width = max([len(n) for n in op.names.values()] + [len(n) for n in op.currents] + [4])
+        print("Node voltages:")
+        for net, volts in op.voltages.items():
+            print(f"  {op.names[net]:<{width}}  {format_value(volts, 'V')}")
+        print("Branch currents:")
+        for name, amps in op.currents.items():
+            print(f"  {name:<{width}}  {format_value(amps, 'A')}")
+    if args.annotate:
+        with open(os.devnull, 'w') as quiet:
+            # Keep --json output parseable
+            stdout, sys.stdout = sys.stdout, quiet if args.json else sys.stdout
+            try:
+                ok = render_graph(graph, args.annotate, args.layout, annotations=annotations(op))
+            finally:
+                sys.stdout = stdout
+        return ok
+    return True
+
+def ac_command(argv):
+    import csv
+    import json
+    from .analysis import ac_sweep, log_frequencies
+    from .units import parse_value
+
+    parser = argparse.ArgumentParser(prog="tecd ac", description="AC frequency sweep: write a Bode table for the circuit's nodes")
+    parser.add_argument("input", help="Input .tecd file")
+    parser.add_argument("--start", default="1", help="First frequency in Hz, SI prefixes allowed (default: 1)")
+    parser.add_argument("--stop", default="1meg", help="Last frequency in Hz (default: 1meg)")
+    parser.add_argument("--points", type=int, default=500, help="Logarithmically spaced frequencies (default: 500)")
+    parser.add_argument("--source", help="Source driving the sweep (default: the first VAC, else the VDC supply)")
+    parser.add_argument("--node", action="append", help="Node (junction name or net id) to report; repeatable (default: all)")
+    parser.add_argument("--format", choices=['csv', 'json'], default='csv', help="Table format (default: csv)")
+    parser.add_argument("--output", "-o", help="Write the table here instead of stdout")
+    parser.add_argument("--plot", metavar="SVG", help="Also write a Bode plot")
+    args = parser.parse_args(argv)
+
+    try:
+        with open(args.input, 'r') as f:
+            source = f.read()
+        graph = compile(source, flatten=True, path=args.input)
+        frequencies = log_frequencies(parse_value(args.start), parse_value(args.stop), args.points)
+        response = ac_sweep(graph, frequencies, args.source)
+        ids = {name: net for net, name in response.names.items()}
+        nets = [ids.get(n, n) for n in args.node] if args.node else list(response.transfer)
+        for net in nets:
+            if net not in response.transfer:
+                raise ValueError(f"No node '{net}' (ground has no response)")
+    except Exception as e:
+        print(f"{args.input}: error: {e}")
+        return False
+
+    bode = {response.names[net]: response.bode(net) for net in nets}
+    out = open(args.output, 'w', newline='') if args.output else sys.stdout
+    try:
+        if args.format == 'json':
+            json.dump({
+                'source': response.source,
+                'frequency_hz': frequencies,
+                'nodes': {name: {'gain_db': gains, 'phase_deg': phases} for name, (gains, phases) in bode.items()},
+            }, out, indent=2)
+            out.write("\n")
+        else:
+            writer = csv.writer(out)
+            writer.writerow(['frequency_hz'] + [f"{name}_{column}" for name in bode for column in ('db', 'deg')])
+            for k, f in enumerate(frequencies):
+                writer.writerow([f"{f:.6g}"] + [f"{series[c][k]:.6g}" for series in bode.values() for c in (0, 1)])
+    finally:
+        if args.output:
+            out.close()
+    if args.plot:
+        from .plot import bode_svg
+        with open(args.plot, 'w') as f:
+            f.write(bode_svg(frequencies, bode))
+    return True
+
+def stats_command(argv):
+    import json
+    from .layout import compute_layout
+    from .metrics import measure
+    from .routing import route_nets
+
+    parser = argparse.ArgumentParser(prog="tecd stats", description="Lay out files and print layout quality metrics")
+    parser.add_argument("inputs", nargs="+", help="Input .tecd files")
+    parser.add_argument("--layout", "-l", choices=['horizontal', 'vertical', 'automatic'], help="Override layout direction")
+    parser.add_argument("--routing", "-r", choices=['style', 'grid'], help="Wire routing: layout style (default) or obstacle-avoiding grid router")
+    parser.add_argument("--flatten", action="store_true", default=None, help="Expand subcircuit instances into their components")
+    parser.add_argument("--json", action="store_true", help="Print one JSON object per file")
+    args = parser.parse_args(argv)
+
+    ok = True
+    for path in args.inputs:
+        try:
+            with open(path, 'r') as f:
+                graph = compile(f.read(), args.flatten, path)
+            if args.layout:
+                graph.options['layout'] = args.layout
+            if args.routing:
+                graph.options['routing'] = args.routing
+            start = time.perf_counter()
+            layout = compute_layout(graph, use_cache=False)
+            laid_out = time.perf_counter()
+            routes = route_nets(graph, layout)
+            routed = time.perf_counter()
+            metrics = measure(layout, routes)
+        except Exception as e:
+            print(f"{path}: error: {e}")
+            ok = False
+            continue
+        timings = {'layout_ms': round((laid_out - start) * 1000, 1), 'routing_ms': round((routed - laid_out) * 1000, 1)}
+        if args.json:
+            print(json.dumps({'file': path, **metrics.to_dict(), **timings}))
+            continue
+        print(f"{path}:")
+        print(f"  components  {metrics.components}")
+        print(f"  nets        {metrics.nets}")
+        print(f"  crossings   {metrics.crossings}")
+        print(f"  wire        {metrics.total_length:.0f} total, {metrics.max_length:.0f} longest net")
+        print(f"  bends       {metrics.bends}")
+        print(f"  overlaps    {metrics.overlaps}")
+        print(f"  bbox        {metrics.width:.0f} x {metrics.height:.0f} (aspect {metrics.aspect:.2f})")
+        print(f"  time        layout {timings['layout_ms']} ms, routing {timings['routing_ms']} ms")
+    return ok
+
+def http_command(argv):
+    import asyncio
+    from .server import QUEUE_LIMIT, RENDER_CACHE_SIZE, serve
+
+    parser = argparse.ArgumentParser(prog="tecd http", description="Serve SVG renders of TECD source over HTTP")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", "-p", type=int, default=8080, help="Port to listen on (default: 8080)")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Render worker processes (default: CPU count)")
+    parser.add_argument("--queue", type=int, default=QUEUE_LIMIT, help=f"Pending renders before answering 503 (default: {QUEUE_LIMIT})")
+    parser.add_argument("--cache", type=int, default=RENDER_CACHE_SIZE, help=f"Rendered SVGs kept in memory (default: {RENDER_CACHE_SIZE})")
+    args = parser.parse_args(argv)
+
+    try:
+        asyncio.run(serve(args.host, args.port, args.jobs, args.cache, args.queue))
+    except KeyboardInterrupt:
+        print("\nStopping server.")
+    return True
+
+def preview_command(argv):
+    import asyncio
+    from .preview import serve
+
+    parser = argparse.ArgumentParser(prog="tecd preview", description="Serve a live preview that updates as the file changes")
+    parser.add_argument("input", help="Input .tecd file")
+    parser.add_argument("--host", default="127.0.0.1", help="Address to listen on (default: 127.0.0.1)")
+    parser.add_argument("--port", "-p", type=int, default=8000, help="Port to listen on (default: 8000)")
+    parser.add_argument("--layout", "-l", choices=['horizontal', 'vertical', 'automatic'], help="Override layout direction")
+    parser.add_argument("--routing", "-r", choices=['style', 'grid'], help="Wire routing: layout style (default) or obstacle-avoiding grid router")
+    parser.add_argument("--flatten", action="store_true", default=None, help="Expand subcircuit instances into their components")
+    args = parser.parse_args(argv)
+
+    options = {}
+    if args.layout:
+        options['layout'] = args.layout
+    if args.routing:
+        options['routing'] = args.routing
+    try:
+        asyncio.run(serve(args.input, args.host, args.port, options, args.flatten))
+    except KeyboardInterrupt:
+        print("\nStopping preview.")
+    return True
+
+COMMANDS = {
+    'build': build_command,
+    'check': check_command,
+    'tiles': tiles_command,
+    'import-spice': import_spice_command,
+    'solve': solve_command,
+    'ac': ac_command,
+    'stats': stats_command,
+    'http': http_command,
+    'preview': preview_command,
+}
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if argv and argv[0] in COMMANDS:
+        ok = COMMANDS[argv[0]](argv[1:])
+        sys.exit(0 if ok else 1)
+
     parser = argparse.ArgumentParser(description="TECD: Text to Electrical Circuit Diagram Visualizer")
     parser.add_argument("input", help="Input .tecd file")
     parser.add_argument("output", nargs="?", help="Output .svg file")
     parser.add_argument("--layout", "-l", choices=['horizontal', 'vertical', 'automatic'], help="Override layout direction")
+    parser.add_argument("--routing", "-r", choices=['style', 'grid'], help="Wire routing: layout style (default) or obstacle-avoiding grid router")
     parser.add_argument("--watch", "-w", action="store_true", help="Watch input file for changes and re-render")
+    parser.add_argument("--flatten", action="store_true", default=None, help="Expand subcircuit instances into their components")
+    parser.add_argument("--jobs", "-j", type=int, default=None, help="Worker processes for files with several circuits or layout restarts (default: CPU count)")
+    parser.add_argument("--layout-restarts", type=int, default=None, metavar="N", help="Run N seeded force layouts and keep the best-scoring one")
+    parser.add_argument("--layout-seed", type=int, default=0, help="First seed of --layout-restarts (default: 0)")
+    parser.add_argument("--include-rank", action="store_true", help="Also score both rank layouts in --layout-restarts")
+    parser.add_argument("--emit", "-e", help="Comma-separated output formats from one layout: svg, json, netlist (default: svg)")
+    parser.add_argument("--emit-parallel", action="store_true", help="Write the --emit formats from parallel threads")
 
-    args = parser.parse_args()
+    args = parser.parse_args(argv)
+    emit = [name.strip() for name in args.emit.split(',') if name.strip()] if args.emit else None
+    if emit:
+        # Checked before anything is compiled or laid out
+        from .emit import emitter_names
+        unknown = [name for name in emit if name not in emitter_names()]
+        if unknown:
+            parser.error(f"unknown --emit format(s): {', '.join(unknown)} (choose from {', '.join(emitter_names())})")
+    search = None
+    if args.layout_restarts:
+        if args.layout:
+            # The search decides between force and (with --include-rank)
+            # rank layouts itself
+            parser.error("--layout cannot be combined with --layout-restarts")
+        search = {'restarts': args.layout_restarts, 'seed': args.layout_seed, 'include_rank': args.include_rank}
     
     source = args.input
     output = args.output
@@ -74,9 +518,10 @@ def main():
     print(f"Output: {output}")
 
     if args.watch:
-        watch_mode(source, output, args.layout)
+        watch_mode(source, output, args.layout, args.routing, args.flatten, args.jobs, search, emit, args.emit_parallel)
     else:
-        visualize(source, output, args.layout)
+        visualize(source, output, args.layout, args.routing, args.flatten, jobs=args.jobs, search=search,
+                  emit=emit, emit_parallel=args.emit_parallel)
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,180 @@
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Tuple
+from .ast_nodes import Component
+
+# Integer typecode for index arrays ('q' = int64, so numpy.frombuffer(..., dtype='int64') views them)
+INDEX_TYPE = 'q'
+# Nets with more members than this (supply and ground rails) add a star to the
+# adjacency instead of a clique, which would be quadratic in the rail size
+CLIQUE_LIMIT = 64
+
+@dataclass
+class Connectivity:
+    # Integer-indexed view of a CircuitGraph.
+    # Components and pins get dense ids; net membership and component
+    # adjacency are stored CSR-style: the members of row i are
+    # indices[indptr[i]:indptr[i+1]].
+    component_names: List[str]
+    component_index: Dict[str, int]
+    pin_component: array          # pin id -> component id
+    pin_names: List[str]          # pin id -> pin name
+    pin_net: array                # pin id -> net id
+    net_ids: List[str]            # net id -> Net.id
+    net_indptr: array
+    net_indices: array            # pin ids
+    comp_indptr: array
+    comp_indices: array           # pin ids of each component
+    adj_indptr: array
+    adj_indices: array            # component ids
+
+    @property
+    def num_components(self) -> int:
+        return len(self.component_names)
+
+    @property
+    def num_pins(self) -> int:
+        return len(self.pin_names)
+
+    @property
+    def num_nets(self) -> int:
+        return len(self.net_ids)
+
+    def net_pins(self, net: int) -> array:
+        return self.net_indices[self.net_indptr[net]:self.net_indptr[net + 1]]
+
+    def neighbors(self, component: int) -> array:
+        return self.adj_indices[self.adj_indptr[component]:self.adj_indptr[component + 1]]
+
+    def degree(self) -> array:
+        indptr = self.adj_indptr
+        return array(INDEX_TYPE, (indptr[i + 1] - indptr[i] for i in range(self.num_components)))
+
+    def _net_neighbors(self, component: int, seen_nets: array) -> Iterable[int]:
+        # Components reachable through nets not visited yet. Walking the
+        # component -> pin -> net -> pin incidence visits each net once, so a
+        # full traversal is O(pins) however large the nets are.
+        for k in range(self.comp_indptr[component], self.comp_indptr[component + 1]):
+            net = self.pin_net[self.comp_indices[k]]
+            if seen_nets[net]:
+                continue
+            seen_nets[net] = 1
+            for j in range(self.net_indptr[net], self.net_indptr[net + 1]):
+                yield self.pin_component[self.net_indices[j]]
+
+    def bfs_ranks(self, sources: Iterable[int]) -> array:
+        # Hop distance (number of nets crossed) from the nearest source; -1 where unreachable
+        ranks = array(INDEX_TYPE, [-1]) * self.num_components
+        seen_nets = bytearray(self.num_nets)
+        queue = deque()
+        for s in sources:
+            if ranks[s] < 0:
+                ranks[s] = 0
+                queue.append(s)
+        while queue:
+            c = queue.popleft()
+            r = ranks[c] + 1
+            for n in self._net_neighbors(c, seen_nets):
+                if ranks[n] < 0:
+                    ranks[n] = r
+                    queue.append(n)
+        return ranks
+
+    def connected_components(self) -> Tuple[int, array]:
+        # (count, label per component)
+        labels = array(INDEX_TYPE, [-1]) * self.num_components
+        seen_nets = bytearray(self.num_nets)
+        count = 0
+        for start in range(self.num_components):
+            if labels[start] >= 0:
+                continue
+            labels[start] = count
+            stack = [start]
+            while stack:
+                c = stack.pop()
+                for n in self._net_neighbors(c, seen_nets):
+                    if labels[n] < 0:
+                        labels[n] = count
+                        stack.append(n)
+            count += 1
+        return count, labels
+
+    def as_numpy(self) -> Dict[str, "numpy.ndarray"]:
+        # Zero-copy NumPy views of the index arrays, for vectorized algorithms
+        import numpy
+        return {name: numpy.frombuffer(getattr(self, name), dtype=numpy.int64)
+                for name in ('pin_component', 'pin_net', 'net_indptr', 'net_indices',
+                     'comp_indptr', 'comp_indices', 'adj_indptr', 'adj_indices')}
+
+def build_connectivity(components: Dict[str, Component], nets: List["Net"]) -> Connectivity:
+    component_names = list(components)
+    component_index = {name: i for i, name in enumerate(component_names)}
+
+    pin_component = array(INDEX_TYPE)
+    pin_names: List[str] = []
+    pin_net = array(INDEX_TYPE)
+    pin_index: Dict[Tuple[str, str], int] = {}
+    net_indptr = array(INDEX_TYPE, [0])
+    net_indices = array(INDEX_TYPE)
+
+    for net_id, net in enumerate(nets):
+        for point in net.points:
+            key = (point.component.name, point.pin_name)
+            pin = pin_index.get(key)
+            if pin is None:
+                pin = len(pin_names)
+                pin_index[key] = pin
+                pin_component.append(component_index[point.component.name])
+                pin_names.append(point.pin_name)
+                pin_net.append(net_id)
+            net_indices.append(pin)
+        net_indptr.append(len(net_indices))
+
+    # Component -> pins, by counting sort over pin_component
+    comp_indptr = array(INDEX_TYPE, [0]) * (len(component_names) + 1)
+    for c in pin_component:
+        comp_indptr[c + 1] += 1
+    for c in range(len(component_names)):
+        comp_indptr[c + 1] += comp_indptr[c]
+    comp_indices = array(INDEX_TYPE, [0]) * len(pin_names)
+    fill = array(INDEX_TYPE, comp_indptr[:-1])
+    for pin, c in enumerate(pin_component):
+        comp_indices[fill[c]] = pin
+        fill[c] += 1
+
+    # Component adjacency: components sharing a net, without duplicates or self loops
+    neighbor_sets: List[set] = [set() for _ in component_names]
+    for net_id in range(len(nets)):
+        members = list(dict.fromkeys(pin_component[p] for p in net_indices[net_indptr[net_id]:net_indptr[net_id + 1]]))
+        if len(members) <= 1:
+            continue
+        if len(members) <= CLIQUE_LIMIT:
+            for c in members:
+                neighbor_sets[c].update(members)
+        else:
+            hub = members[0]
+            neighbor_sets[hub].update(members)
+            for c in members[1:]:
+                neighbor_sets[c].add(hub)
+    adj_indptr = array(INDEX_TYPE, [0])
+    adj_indices = array(INDEX_TYPE)
+    for c, neighbors in enumerate(neighbor_sets):
+        neighbors.discard(c)
+        adj_indices.extend(sorted(neighbors))
+        adj_indptr.append(len(adj_indices))
+
+    return Connectivity(
+        component_names=component_names,
+        component_index=component_index,
+        pin_component=pin_component,
+        pin_names=pin_names,
+        pin_net=pin_net,
+        net_ids=[net.id for net in nets],
+        net_indptr=net_indptr,
+        net_indices=net_indices,
+        comp_indptr=comp_indptr,
+        comp_indices=comp_indices,
+        adj_indptr=adj_indptr,
+        adj_indices=adj_indices,
+    )
@@ -0,0 +1,103 @@
+import json
+import os
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, List, Optional, TextIO
+from .layout import Layout
+from .routing import Route
+from .semantics import CircuitGraph
+
+# write(graph, layout, routes, stream); every emitter sees the same compiled
+# graph, layout and routes and must not modify them
+EmitFunction = Callable[[CircuitGraph, Layout, List[Route], TextIO], None]
+
+@dataclass(frozen=True)
+class Emitter:
+    name: str
+    extension: str
+    write: EmitFunction
+
+_emitters: Dict[str, Emitter] = {}
+
+def register_emitter(name: str, extension: str, write: EmitFunction) -> Emitter:
+    emitter = Emitter(name, extension, write)
+    _emitters[name] = emitter
+    return emitter
+
+def get_emitter(name: str) -> Optional[Emitter]:
+    return _emitters.get(name)
+
+def emitter_names() -> List[str]:
+    return list(_emitters)
+
+def _check_formats(formats: Iterable[str]):
+    unknown = [name for name in formats if name not in _emitters]
+    if unknown:
+        raise ValueError(f"Unknown output format(s): {', '.join(unknown)} (known: {', '.join(_emitters)})")
+
+def emit_paths(output_file: str, formats: List[str]) -> Dict[str, str]:
+    # Format -> output path: the SVG keeps output_file, the others swap
+    # its extension for their own
+    _check_formats(formats)
+    base = os.path.splitext(output_file)[0]
+    return {name: output_file if name == 'svg' else base + _emitters[name].extension for name in formats}
+
+def emit(graph: CircuitGraph, layout: Layout, routes: List[Route], paths: Dict[str, str],
+         parallel: bool = False) -> Dict[str, Optional[str]]:
+    # Write every requested format from one layout; returns format -> error
+    # message or None. With parallel, each format is written from its own
+    # thread.
+    _check_formats(paths)
+
+    def run(name: str) -> Optional[str]:
+        try:
+            with open(paths[name], 'w') as f:
+                _emitters[name].write(graph, layout, routes, f)
+            return None
+        except Exception as e:
+            return str(e)
+
+    if not parallel or len(paths) <= 1:
+        return {name: run(name) for name in paths}
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=len(paths)) as pool:
+        return dict(zip(paths, pool.map(run, paths)))
+
+def _write_svg(graph: CircuitGraph, layout: Layout, routes: List[Route], out: TextIO):
+    from .renderer import render_svg
+    out.write(render_svg(graph, layout, routes=routes))
+
+def layout_document(graph: CircuitGraph, layout: Layout, routes: List[Route]) -> dict:
+    # Everything a viewer needs to draw or hit-test the diagram without
+    # re-running the layout: placed symbols with pin positions, and nets
+    # with their pins and wire polylines
+    routes_by_net = {route.net_id: route for route in routes}
+    return {
+        'width': layout.width,
+        'height': layout.height,
+        'components': [{
+            'name': pc.component.name,
+            'type': pc.component.type_name,
+            'x': pc.x,
+            'y': pc.y,
+            'rotation': pc.rotation,
+            'parameters': dict(pc.component.parameters),
+            'pins': {pin: list(pc.pin_position(pin)) for pin in pc.symbol.pins},
+        } for pc in layout.components],
+        'nets': [{
+            'id': net.id,
+            'pins': [f"{p.component.name}.{p.pin_name}" for p in net.points],
+            'wires': [[list(point) for point in line] for line in routes_by_net[net.id].polylines] if net.id in routes_by_net else [],
+        } for net in graph.nets],
+    }
+
+def _write_json(graph: CircuitGraph, layout: Layout, routes: List[Route], out: TextIO):
+    json.dump(layout_document(graph, layout, routes), out, indent=1)
+    out.write("\n")
+
+def _write_netlist(graph: CircuitGraph, layout: Layout, routes: List[Route], out: TextIO):
+    from .spice import write_spice
+    write_spice(graph, out)
+
+register_emitter('svg', '.svg', _write_svg)
+register_emitter('json', '.json', _write_json)
+register_emitter('netlist', '.cir', _write_netlist)
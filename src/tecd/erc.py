@@ -0,0 +1,112 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from .ast_nodes import Component, SourceLocation
+from .registry import BLOCK, GROUND, JUNCTION, SOURCE, UNKNOWN, get_type, symbol_for, use_types
+from .semantics import CircuitGraph
+
+ERROR = 'error'
+WARNING = 'warning'
+
+@dataclass(slots=True)
+class Violation:
+    rule: str
+    severity: str
+    message: str
+    location: Optional[SourceLocation] = None
+
+    def format(self, path: str) -> str:
+        # path:line:col: severity: message [rule], the usual compiler shape
+        # editors already know how to jump to
+        where = f"{path}:{self.location.line}:{self.location.column}" if self.location else path
+        return f"{where}: {self.severity}: {self.message} [{self.rule}]"
+
+# Type name -> {pin name: physical pin}; pin names drawn at the same spot on
+# the symbol ('+' and 'left' on a VDC) are aliases of one physical pin
+_physical_pins: Dict[str, Dict[str, str]] = {}
+
+def physical_pins(type_name: str) -> Optional[Dict[str, str]]:
+    mapping = _physical_pins.get(type_name)
+    if mapping is not None:
+        return mapping
+    ctype = get_type(type_name)
+    if ctype is None:
+        return None
+    if ctype.role == BLOCK:
+        # Ports are known without building the block's preview symbol. Not
+        # cached: block types belong to one circuit, not to the process.
+        return {port: port for port in ctype.default_pins}
+    first_at: Dict[Tuple[float, float], str] = {}
+    mapping = {}
+    for name, position in symbol_for(type_name).pins.items():
+        mapping[name] = first_at.setdefault(position, name)
+    _physical_pins[type_name] = mapping
+    return mapping
+
+def check(graph: CircuitGraph) -> List[Violation]:
+    # Electrical rule check over the graph's integer indexes: every component
+    # and every pin is visited a constant number of times, so the pass is
+    # O(components + pins) and cheap enough to run on each edit
+    conn = graph.connectivity
+    violations: List[Violation] = []
+    components: List[Component] = [graph.components[name] for name in conn.component_names]
+    with use_types(graph.types):
+        types = [get_type(comp.type_name) for comp in components]
+    roles = [ctype.role if ctype is not None else None for ctype in types]
+
+    # Components that can reach ground through the nets
+    count, labels = conn.connected_components()
+    grounded = bytearray(count)
+    for c, kind in enumerate(roles):
+        if kind == GROUND and conn.comp_indptr[c + 1] > conn.comp_indptr[c]:
+            grounded[labels[c]] = 1
+
+    for c, comp in enumerate(components):
+        ctype = types[c]
+        if ctype is None or ctype.role == UNKNOWN:
+            violations.append(Violation('unknown-type', ERROR, f"Unknown component type '{comp.type_name}' for '{comp.name}'", comp.location))
+            continue
+        if ctype.role in (JUNCTION, GROUND):
+            continue
+        pins = physical_pins(comp.type_name)
+        # Physical pin -> nets it is on
+        used: Dict[str, List[int]] = {}
+        for k in range(conn.comp_indptr[c], conn.comp_indptr[c + 1]):
+            pin = conn.comp_indices[k]
+            name = conn.pin_names[pin]
+            physical = pins.get(name)
+            if physical is None:
+                violations.append(Violation('unknown-pin', ERROR, f"{comp.type_name} '{comp.name}' has no pin '{name}'", comp.location))
+                continue
+            used.setdefault(physical, []).append(conn.pin_net[pin])
+        physical_set = list(dict.fromkeys(pins.values()))
+
+        if not used:
+            violations.append(Violation('unconnected', WARNING, f"'{comp.name}' is not connected", comp.location))
+            continue
+        missing = [p for p in physical_set if p not in used]
+        # A source with one pin wired ('Vin -> R1') is referenced to ground
+        if missing and not (ctype.role == SOURCE and len(missing) == 1 and len(physical_set) == 2):
+            violations.append(Violation('floating-pin', WARNING,
+                                        f"Pin{'s' if len(missing) > 1 else ''} {', '.join(repr(p) for p in missing)} of '{comp.name}' not connected",
+                                        comp.location))
+
+        if ctype.role == SOURCE:
+            nets = {net for nets_of_pin in used.values() for net in nets_of_pin}
+            if len(used) > 1 and len(nets) == 1:
+                violations.append(Violation('shorted-source', ERROR, f"Both pins of source '{comp.name}' are on the same net", comp.location))
+            if not grounded[labels[c]]:
+                violations.append(Violation('no-ground-path', ERROR, f"Source '{comp.name}' has no path to GND", comp.location))
+
+    # Nets that reach only one real pin: a dangling wire or a misspelt junction
+    junction = [kind == JUNCTION for kind in roles]
+    for net in range(conn.num_nets):
+        real = [p for p in conn.net_pins(net) if not junction[conn.pin_component[p]]]
+        if len(real) == 1:
+            comp = components[conn.pin_component[real[0]]]
+            named = [components[conn.pin_component[p]].name for p in conn.net_pins(net) if junction[conn.pin_component[p]]]
+            where = f"net '{named[0]}'" if named else f"net {conn.net_ids[net]}"
+            violations.append(Violation('single-pin-net', WARNING,
+                                        f"{where} only connects {comp.name}.{conn.pin_names[real[0]]}", comp.location))
+
+    violations.sort(key=lambda v: (v.location.line, v.location.column) if v.location else (0, 0))
+    return violations
@@ -0,0 +1,120 @@
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from .layout import Layout, PlacedComponent
+from .registry import GROUND, role
+from .routing import Route
+from .spatial import BBox, GridIndex
+
+NAME_FONT_SIZE = 12
+PARAM_FONT_SIZE = 10
+# Rough advance width of a sans-serif glyph relative to the font size
+CHAR_WIDTH = 0.6
+WIRE_CLEARANCE = 2
+
+@dataclass
+class PlacedLabel:
+    text: str
+    x: float
+    y: float
+    font_size: float
+    bbox: BBox
+    # True when every candidate collided and the least-bad one was used
+    overlapping: bool = False
+
+def text_bbox(text: str, x: float, y: float, font_size: float) -> BBox:
+    # Centred text (text-anchor=middle, dominant-baseline=middle)
+    half_w = len(text) * font_size * CHAR_WIDTH / 2
+    half_h = font_size * 0.6
+    return (x - half_w, y - half_h, x + half_w, y + half_h)
+
+def _overlap_area(a: BBox, b: BBox) -> float:
+    w = min(a[2], b[2]) - max(a[0], b[0])
+    h = min(a[3], b[3]) - max(a[1], b[1])
+    return w * h if w > 0 and h > 0 else 0.0
+
+class LabelPlacer:
+    # Greedy placement: every label tries a short list of screen offsets around
+    # its symbol and takes the first one that hits nothing in the index
+    # (symbols, wires and labels placed so far). Each index lookup is O(1) on
+    # average, so the whole pass is near-linear in the number of labels.
+    def __init__(self, layout: Layout, routes: List[Route]):
+        self.layout = layout
+        self.index: GridIndex[str] = GridIndex(cell_size=100)
+        for pc in layout.components:
+            self.index.insert(pc.bbox(), 'symbol')
+        for route in routes:
+            for (x1, y1), (x2, y2) in route.segments():
+                self.index.insert((min(x1, x2) - WIRE_CLEARANCE, min(y1, y2) - WIRE_CLEARANCE,
+                                   max(x1, x2) + WIRE_CLEARANCE, max(y1, y2) + WIRE_CLEARANCE), 'wire')
+
+    @staticmethod
+    def preferred_offsets(pc: PlacedComponent) -> Tuple[Tuple[float, float], Tuple[float, float]]:
+        # Default (Horizontal 0): Name Top (0, -30), Params Bottom (0, 30)
+        # Vertical (-90/270 or 90): Name Left (-35, 0), Params Right (35, 0)
+        rot = pc.rotation % 360
+        if role(pc.component.type_name) == GROUND:
+            # GND Special Case: Name Left and slightly Up
+            return (-30, -15), (30, 0)
+        if 45 <= rot <= 135 or 225 <= rot <= 315: # Vertical-ish (90 or 270/-90)
+            return (-35, 0), (35, 0)
+        return (0, -30), (0, 30)
+
+    @staticmethod
+    def candidates(preferred: Tuple[float, float], pc: PlacedComponent) -> List[Tuple[float, float]]:
+        # Preferred spot, its mirror, the other axis, the diagonals, then the
+        # same ring pushed further out
+        x0, y0, x1, y1 = pc.bbox()
+        dx = (x1 - x0) / 2 + 15
+        dy = (y1 - y0) / 2 + 12
+        ring = [preferred, (-preferred[0], -preferred[1]),
+                (0, -dy), (0, dy), (-dx, 0), (dx, 0),
+                (-dx, -dy), (dx, -dy), (-dx, dy), (dx, dy)]
+        seen, result = set(), []
+        for scale in (1, 2):
+            for ox, oy in ring:
+                offset = (ox * scale, oy * scale)
+                if offset not in seen:
+                    seen.add(offset)
+                    result.append(offset)
+        return result
+
+    def place_label(self, pc: PlacedComponent, text: str, font_size: float,
+                    preferred: Tuple[float, float]) -> PlacedLabel:
+        return self._place_first_free(text, font_size, [(pc.x + ox, pc.y + oy) for ox, oy in self.candidates(preferred, pc)])
+
+    def place_point_label(self, x: float, y: float, text: str, font_size: float) -> PlacedLabel:
+        # Labels for a point (a net's pin): above, below, then beside it
+        half_w = len(text) * font_size * CHAR_WIDTH / 2 + 4
+        offsets = [(half_w, -10), (-half_w, -10), (half_w, 10), (-half_w, 10),
+                   (0, -16), (0, 16), (half_w, -24), (-half_w, 24)]
+        return self._place_first_free(text, font_size, [(x + ox, y + oy) for ox, oy in offsets])
+
+    def _place_first_free(self, text: str, font_size: float, positions: List[Tuple[float, float]]) -> PlacedLabel:
+        best: Optional[Tuple[float, PlacedLabel]] = None
+        for x, y in positions:
+            bbox = text_bbox(text, x, y, font_size)
+            if not self.index.any_intersects(bbox):
+                label = PlacedLabel(text, x, y, font_size, bbox)
+                break
+            cost = sum(_overlap_area(bbox, other) for other, _ in self.index.query_boxes(bbox))
+            if best is None or cost < best[0]:
+                best = (cost, PlacedLabel(text, x, y, font_size, bbox, overlapping=True))
+        else:
+            # No room anywhere: fall back to the least-overlapping candidate
+            label = best[1]
+        self.index.insert(label.bbox, 'label')
+        return label
+
+    def place(self) -> Dict[str, List[PlacedLabel]]:
+        # Component name -> [name label, parameter label (if any)]
+        placed: Dict[str, List[PlacedLabel]] = {}
+        # Names first: they matter more than parameter text
+        for pc in self.layout.components:
+            name_offset, _ = self.preferred_offsets(pc)
+            placed[pc.component.name] = [self.place_label(pc, pc.component.name, NAME_FONT_SIZE, name_offset)]
+        for pc in self.layout.components:
+            _, param_offset = self.preferred_offsets(pc)
+            param_txt = " ".join(pc.component.parameters.values())
+            if param_txt:
+                placed[pc.component.name].append(self.place_label(pc, param_txt, PARAM_FONT_SIZE, param_offset))
+        return placed
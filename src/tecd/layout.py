@@ -1,10 +1,14 @@
 import random
 import math
 from dataclasses import dataclass, field
-from typing import Dict, List, Set, Deque, Tuple
+from typing import Dict, List, Optional, Set, Deque, Tuple
 from collections import deque, defaultdict
 from .semantics import CircuitGraph, Component, Net
-from .symbols import get_symbol
+from .registry import GROUND, JUNCTION, SOURCE, role, use_types
+from .spatial import BBox
+from .symbols import Symbol, get_symbol
+from .multilevel import multilevel_layout
+from .reduction import expand, reduce_series_parallel
 
 @dataclass
 class PlacedComponent:
@@ -13,6 +17,28 @@ class PlacedComponent:
     y: float
     symbol_ref: str
     rotation: float = 0.0
+    # Resolved on placement, while the circuit's own types are in scope
+    symbol: Symbol = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.symbol = get_symbol(self.component.type_name)
+
+    def pin_position(self, pin_name: str) -> Tuple[float, float]:
+        px, py = self.symbol.pins.get(pin_name, (0, 0))
+        if self.rotation:
+            rad = math.radians(self.rotation)
+            px, py = (px * math.cos(rad) - py * math.sin(rad),
+                      px * math.sin(rad) + py * math.cos(rad))
+        return (self.x + px, self.y + py)
+
+    def bbox(self, margin: float = 0.0) -> BBox:
+        # Extent of the rotated symbol rectangle, grown by margin on every side
+        symbol = self.symbol
+        rad = math.radians(self.rotation)
+        cos_a, sin_a = abs(math.cos(rad)), abs(math.sin(rad))
+        half_w = (symbol.width * cos_a + symbol.height * sin_a) / 2 + margin
+        half_h = (symbol.width * sin_a + symbol.height * cos_a) / 2 + margin
+        return (self.x - half_w, self.y - half_h, self.x + half_w, self.y + half_h)
 
 @dataclass
 class Layout:
@@ -21,9 +47,67 @@ class Layout:
     height: float
     routing_style: str = 'straight' # 'straight', 'HV', 'VH'
 
+GRID_SIZE = 40
+# Clearance kept around each symbol body when checking for overlaps
+SYMBOL_PADDING = 10
+# Force layouts with more nodes than this (after series/parallel reduction)
+# coarsen the graph first; see tecd.multilevel
+MULTILEVEL_THRESHOLD = 100
+# Canvas area given to each node by multilevel layouts
+MULTILEVEL_NODE_AREA = (3 * GRID_SIZE) ** 2
+
+def symbol_footprint(type_name: str, rotation: float = 0.0) -> Tuple[int, int]:
+    # Half-extent of a symbol in grid cells (0 = a single cell), after rotation.
+    # Counted from the edge of the centre cell, so a body reaching past it
+    # claims the neighbouring cells too
+    symbol = get_symbol(type_name)
+    rad = math.radians(rotation)
+    cos_a, sin_a = abs(math.cos(rad)), abs(math.sin(rad))
+    half_w = (symbol.width * cos_a + symbol.height * sin_a) / 2 + SYMBOL_PADDING
+    half_h = (symbol.width * sin_a + symbol.height * cos_a) / 2 + SYMBOL_PADDING
+    return (max(0, math.ceil((half_w - GRID_SIZE / 2) / GRID_SIZE)), max(0, math.ceil((half_h - GRID_SIZE / 2) / GRID_SIZE)))
+
+def resolve_overlaps(positions: Dict[str, Tuple[float, float]], footprints: Dict[str, Tuple[int, int]],
+                     order: List[str], grid: float = GRID_SIZE) -> Dict[str, Tuple[float, float]]:
+    # Spatial hash of occupied grid cells. Nodes are committed in `order`; a node
+    # whose footprint collides with an earlier one moves to the nearest cell
+    # (by ring distance) where its whole footprint is free. Each node touches
+    # O(footprint * search radius) cells, so the pass is near-linear.
+    occupied: Set[Tuple[int, int]] = set()
+    resolved: Dict[str, Tuple[float, float]] = {}
+
+    def cells(cx: int, cy: int, fx: int, fy: int):
+        return [(cx + i, cy + j) for i in range(-fx, fx + 1) for j in range(-fy, fy + 1)]
+
+    for node in order:
+        x, y = positions[node]
+        cx, cy = round(x / grid), round(y / grid)
+        fx, fy = footprints.get(node, (0, 0))
+
+        target = None
+        radius = 0
+        while target is None:
+            # Ring of cells at Chebyshev distance `radius`, nearest (Euclidean) first
+            ring = [(cx + dx, cy + dy)
+                    for dx in range(-radius, radius + 1)
+                    for dy in range(-radius, radius + 1)
+                    if max(abs(dx), abs(dy)) == radius]
+            ring.sort(key=lambda c: ((c[0] - cx) ** 2 + (c[1] - cy) ** 2, c[1], c[0]))
+            for c in ring:
+                if not any(cell in occupied for cell in cells(c[0], c[1], fx, fy)):
+                    target = c
+                    break
+            radius += 1
+
+        occupied.update(cells(target[0], target[1], fx, fy))
+        resolved[node] = positions[node] if target == (cx, cy) else (target[0] * grid, target[1] * grid)
+    return resolved
+
 class LayoutEngine:
-    def __init__(self, graph: CircuitGraph):
+    def __init__(self, graph: CircuitGraph, seed: Optional[int] = None):
         self.graph = graph
+        # Seeds the force layout's starting positions (None: a fixed circle)
+        self.seed = seed
 
     def layout(self) -> Layout:
         mode = self.graph.options.get('layout', 'automatic').strip().lower()
@@ -49,12 +133,12 @@ class LayoutEngine:
         # 2. Assign Ranks (BFS)
         start_nodes = []
         for name, comp in self.graph.components.items():
-            if comp.type_name == 'JUNCTION': continue
-            if comp.type_name.startswith('V') or comp.type_name.startswith('I'):
+            if role(comp.type_name) == JUNCTION: continue
+            if role(comp.type_name) == SOURCE:
                 start_nodes.append(name)
         
         if not start_nodes and self.graph.components:
-             first = next((c.name for c in self.graph.components.values() if c.type_name != 'JUNCTION'), None)
+             first = next((c.name for c in self.graph.components.values() if role(c.type_name) != JUNCTION), None)
              if first: start_nodes.append(first)
 
         ranks: Dict[str, int] = {}
@@ -74,13 +158,13 @@ class LayoutEngine:
                 sorted_neighbors = sorted(list(neighbors))
                 
                 for neighbor in sorted_neighbors:
-                    if neighbor not in visited and self.graph.components[neighbor].type_name != 'JUNCTION':
+                    if neighbor not in visited and role(self.graph.components[neighbor].type_name) != JUNCTION:
                         ranks[neighbor] = current_rank + 1
                         visited.add(neighbor)
                         queue.append(neighbor)
         
         for name, comp in self.graph.components.items():
-             if name not in visited and comp.type_name != 'JUNCTION':
+             if name not in visited and role(comp.type_name) != JUNCTION:
                  ranks[name] = 0
                  visited.add(name)
                  queue: Deque[str] = deque([name])
@@ -88,7 +172,7 @@ class LayoutEngine:
                     node = queue.popleft()
                     current_rank = ranks[node]
                     for neighbor in sorted(list(adj[node])):
-                        if neighbor not in visited and self.graph.components[neighbor].type_name != 'JUNCTION':
+                        if neighbor not in visited and role(self.graph.components[neighbor].type_name) != JUNCTION:
                              ranks[neighbor] = current_rank + 1
                              visited.add(neighbor)
                              queue.append(neighbor)
@@ -144,8 +228,8 @@ class LayoutEngine:
             nodes = layers[rank]
             
             # GND logic: push to end
-            gnds = [n for n in nodes if self.graph.components[n].type_name == 'GND']
-            others = [n for n in nodes if self.graph.components[n].type_name != 'GND']
+            gnds = [n for n in nodes if role(self.graph.components[n].type_name) == GROUND]
+            others = [n for n in nodes if role(self.graph.components[n].type_name) != GROUND]
             ordered_nodes = others + gnds
             
             for i, name in enumerate(ordered_nodes):
@@ -156,13 +240,13 @@ class LayoutEngine:
                     x = START_X + rank * H_SPACING
                     y = START_Y + i * V_SPACING
                     rotation = 0.0
-                    if comp.type_name == 'GND':
+                    if role(comp.type_name) == GROUND:
                          y += 60 # Offset GND down for elbow
                 else: # vertical
                     x = START_X + i * H_SPACING # Spread horizontally
                     y = START_Y + rank * V_SPACING # Flow down
                     rotation = 90.0
-                    if comp.type_name == 'GND':
+                    if role(comp.type_name) == GROUND:
                          y += 60 
                          rotation = 0.0
 
@@ -191,55 +275,21 @@ class LayoutEngine:
             routing_style=routing
         )
 
-    def force_layout(self, direction: str = 'horizontal') -> Layout:
-        # Simple Fruchterman-Reingold inspired layout
-        nodes = [name for name, c in self.graph.components.items() if c.type_name != 'JUNCTION']
-        if not nodes: return Layout([], 100, 100)
-
-        # Initialize positions (Circle or Random)
-        positions: Dict[str, Tuple[float, float]] = {}
-        width = 800
-        height = 600
-        if direction == 'vertical':
-             width, height = 600, 800
-             
+    def _force_simulate(self, nodes: List[str], positions: Dict[str, Tuple[float, float]], fixed_nodes: Set[str],
+                        owner: Dict[str, str], width: float, height: float):
+        # Fruchterman-Reingold iterations over `nodes`, updating positions in place
         center_x, center_y = width / 2, height / 2
-        radius = 200
-        
-        for i, node in enumerate(nodes):
-             angle = 2 * math.pi * i / len(nodes)
-             positions[node] = (center_x + radius * math.cos(angle), center_y + radius * math.sin(angle))
-        
-        # Fixed nodes strategies based on direction
-        fixed_nodes = set()
-        for node in nodes:
-             comp = self.graph.components[node]
-             if direction == 'horizontal':
-                 # Pin Voltage source to Left
-                 if comp.type_name.startswith('V'):
-                     positions[node] = (100, center_y)
-                     fixed_nodes.add(node)
-                 # Pin Ground to Right (or Bottom-Right?)
-                 elif comp.type_name == 'GND':
-                     positions[node] = (width - 100, center_y + 100) # Slightly down
-                     fixed_nodes.add(node)
-             else: # vertical
-                 # Pin Voltage source to Top
-                 if comp.type_name.startswith('V'):
-                     positions[node] = (center_x, 100)
-                     fixed_nodes.add(node)
-                 # Pin Ground to Bottom
-                 elif comp.type_name == 'GND':
-                     positions[node] = (center_x, height - 100)
-                     fixed_nodes.add(node)
 
         # Build edges
         edges = []
+        simulated = set(nodes)
         for net in self.graph.nets:
-            comps = [p.component.name for p in net.points if p.component.name in nodes]
+            comps = [owner.get(p.component.name, p.component.name) for p in net.points]
+            comps = [c for c in comps if c in simulated]
             for i in range(len(comps)):
                 for j in range(i+1, len(comps)):
-                     edges.append((comps[i], comps[j]))
+                     if comps[i] != comps[j]:
+                         edges.append((comps[i], comps[j]))
         
         # Iterations
         iterations = 2000
@@ -304,18 +354,103 @@ class LayoutEngine:
                 )
             
             t -= dt
+
+    def force_layout(self, direction: str = 'horizontal') -> Layout:
+        # Simple Fruchterman-Reingold inspired layout
+        nodes = [name for name, c in self.graph.components.items() if role(c.type_name) != JUNCTION]
+        if not nodes: return Layout([], 100, 100)
+
+        # Series chains and parallel groups are simulated as one node each
+        # and expanded afterwards, so the quadratic simulation only pays
+        # for the circuit's structure
+        supernodes = reduce_series_parallel(self.graph, nodes)
+        owner = {name: sn.representative for sn in supernodes for name in sn.members}
+        all_nodes = nodes
+        nodes = [n for n in nodes if owner.get(n, n) == n]
+
+        # Initialize positions (Circle or Random)
+        positions: Dict[str, Tuple[float, float]] = {}
+        width = 800
+        height = 600
+        multilevel = len(nodes) > MULTILEVEL_THRESHOLD
+        if multilevel:
+            # Room for every node; the 800x600 canvas fits a few dozen
+            width = max(width, round(math.sqrt(len(nodes) * MULTILEVEL_NODE_AREA * 4 / 3)))
+            height = max(height, round(width * 3 / 4))
+        if direction == 'vertical':
+             width, height = height, width
+             
+        center_x, center_y = width / 2, height / 2
+        radius = 200
+        
+        rng = random.Random(self.seed) if self.seed is not None else None
+        for i, node in enumerate(nodes):
+             angle = 2 * math.pi * i / len(nodes)
+             positions[node] = (center_x + radius * math.cos(angle), center_y + radius * math.sin(angle))
+             if rng:
+                 positions[node] = (rng.uniform(50, width - 50), rng.uniform(50, height - 50))
+        
+        # Fixed nodes strategies based on direction
+        fixed_nodes = set()
+        for node in nodes:
+             comp = self.graph.components[node]
+             if direction == 'horizontal':
+                 # Pin Voltage source to Left
+                 if role(comp.type_name) == SOURCE:
+                     positions[node] = (100, center_y)
+                     fixed_nodes.add(node)
+                 # Pin Ground to Right (or Bottom-Right?)
+                 elif role(comp.type_name) == GROUND:
+                     positions[node] = (width - 100, center_y + 100) # Slightly down
+                     fixed_nodes.add(node)
+             else: # vertical
+                 # Pin Voltage source to Top
+                 if role(comp.type_name) == SOURCE:
+                     positions[node] = (center_x, 100)
+                     fixed_nodes.add(node)
+                 # Pin Ground to Bottom
+                 elif role(comp.type_name) == GROUND:
+                     positions[node] = (center_x, height - 100)
+                     fixed_nodes.add(node)
+
+        if multilevel:
+            nets = [[owner.get(p.component.name, p.component.name) for p in net.points] for net in self.graph.nets]
+            positions.update(multilevel_layout(nodes, nets, {n: positions[n] for n in fixed_nodes}, width, height, self.seed))
+        else:
+            self._force_simulate(nodes, positions, fixed_nodes, owner, width, height)
         
         # Post-Processing: Grid Snapping
-        GRID_SIZE = 40
         for node in nodes:
             x, y = positions[node]
             positions[node] = (round(x / GRID_SIZE) * GRID_SIZE, round(y / GRID_SIZE) * GRID_SIZE)
 
-        # Calculate Rotations
+        # Expand super-nodes along the line between their two ends' neighbours
         rotations: Dict[str, float] = {}
+        for sn in supernodes:
+            center = positions.pop(sn.representative)
+            ends = []
+            for net_index in sn.ends:
+                neighbours = [positions[owner.get(p.component.name, p.component.name)] for p in self.graph.nets[net_index].points
+                              if owner.get(p.component.name) != sn.representative and owner.get(p.component.name, p.component.name) in positions]
+                ends.append((sum(x for x, _ in neighbours) / len(neighbours), sum(y for _, y in neighbours) / len(neighbours))
+                            if neighbours else center)
+            (x1, y1), (x2, y2) = ends
+            angle = round(math.degrees(math.atan2(y2 - y1, x2 - x1)) / 45) * 45 if (x1, y1) != (x2, y2) else 0.0
+            for name, (x, y, rotation) in expand(sn, center, angle, GRID_SIZE).items():
+                positions[name] = (x, y)
+                rotations[name] = rotation
+        nodes = all_nodes
+
+        # Calculate Rotations
+        nets_of: Dict[str, List[Net]] = defaultdict(list)
+        for net in self.graph.nets:
+            for name in dict.fromkeys(p.component.name for p in net.points):
+                nets_of[name].append(net)
         for node in nodes:
+            if node in owner:
+                continue
             comp = self.graph.components[node]
-            connected_nets = [net for net in self.graph.nets if any(p.component.name == node for p in net.points)]
+            connected_nets = nets_of[node]
             
             if len(connected_nets) == 2:
                  net1_points = [p for p in connected_nets[0].points if p.component.name != node and p.component.name in positions]
@@ -331,7 +466,21 @@ class LayoutEngine:
                      angle = math.degrees(math.atan2(y2 - y1, x2 - x1))
                      # angle is the visual angle (CW in SVG coords).
                      rotations[node] = round(angle / 45) * 45
-            
+
+        # Post-Processing: separate symbols that snapped onto the same cells
+        footprints = {node: symbol_footprint(self.graph.components[node].type_name, rotations.get(node, 0.0))
+                      for node in nodes}
+        order = [n for n in nodes if n in fixed_nodes] + [n for n in nodes if n not in fixed_nodes]
+        positions = resolve_overlaps(positions, footprints, order)
+        if supernodes:
+            # Long chains can expand past the canvas edge
+            shift_x = max(0, 50 - min(x for x, _ in positions.values()))
+            shift_y = max(0, 50 - min(y for _, y in positions.values()))
+            shift_x, shift_y = math.ceil(shift_x / GRID_SIZE) * GRID_SIZE, math.ceil(shift_y / GRID_SIZE) * GRID_SIZE
+            positions = {n: (x + shift_x, y + shift_y) for n, (x, y) in positions.items()}
+        width = max(width, max(x for x, _ in positions.values()) + 100)
+        height = max(height, max(y for _, y in positions.values()) + 100)
+
         placed = []
         for node in nodes:
             placed.append(PlacedComponent(
@@ -344,5 +493,17 @@ class LayoutEngine:
             
         return Layout(placed, width, height, routing_style='straight')
 
-def compute_layout(graph: CircuitGraph) -> Layout:
-    return LayoutEngine(graph).layout()
+def compute_layout(graph: CircuitGraph, use_cache: bool = True, seed: Optional[int] = None) -> Layout:
+    # Circuits with the same topology (up to names and values) share one
+    # layout per process; see tecd.topology. Seeded layouts are one-offs
+    # from a layout search and bypass the cache.
+    with use_types(graph.types):
+        if not use_cache or seed is not None:
+            return LayoutEngine(graph, seed).layout()
+        from .topology import canonical_form, layout_cache
+        form = canonical_form(graph)
+        layout = layout_cache.get(graph, form)
+        if layout is None:
+            layout = LayoutEngine(graph).layout()
+            layout_cache.put(form, layout)
+        return layout
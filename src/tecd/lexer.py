@@ -1,8 +1,10 @@
 import re
+import sys
 from dataclasses import dataclass
 from typing import List, Generator
+from .registry import KEYWORDS, load_plugins
 
-@dataclass
+@dataclass(slots=True)
 class Token:
     type: str
     value: str
@@ -13,6 +15,8 @@ class TokenType:
     KW_CIRCUIT = 'KW_CIRCUIT'
     KW_END = 'KW_END'
     KW_OPTIONS = 'KW_OPTIONS'
+    KW_SUBCIRCUIT = 'KW_SUBCIRCUIT'
+    KW_INCLUDE = 'KW_INCLUDE'
     TYPE = 'TYPE'  # VDC, RES, CAP, IND, etc.
     ID = 'ID'
     ARROW = 'ARROW'   # ->
@@ -20,9 +24,14 @@ class TokenType:
     EQUALS = 'EQUALS' # =
     LPAREN = 'LPAREN' # (
     RPAREN = 'RPAREN' # )
+    COMMA = 'COMMA'   # ,
     NEWLINE = 'NEWLINE'
     EOF = 'EOF'
     STRING = 'STRING' # For values like "1k", "5V"
+    INDEX = 'INDEX'   # [0..7], [i], [i+1] (bracket contents, unparsed)
+
+ID_PATTERN = re.compile(r'(@?[a-zA-Z0-9_%+-]+)')
+VALUE_PATTERN = re.compile(r'([a-zA-Z0-9%\.]+)')
 
 class Lexer:
     def __init__(self, source: str):
@@ -32,6 +41,7 @@ class Lexer:
         self.current_col = 1
     
     def tokenize(self) -> List[Token]:
+        load_plugins() # Plugin types must be keywords before the first identifier
         pos = 0
         while pos < len(self.source):
             match = None
@@ -67,16 +77,19 @@ class Lexer:
             # Allow + and - to start an ID (e.g. V+.pin, -5V)
             if self.source[pos].isalpha() or self.source[pos] in '@+-%0-9': 
                  # Regex for ID/Value: alphanumeric, _, %, +, -
-                match = re.match(r'(@?[a-zA-Z0-9_%+-]+)', self.source[pos:])
+                match = ID_PATTERN.match(self.source, pos)
                 if match:
-                    val = match.group(1)
+                    # Names, pins and type keywords repeat throughout a netlist;
+                    # interning makes every token, AST node and graph object share one copy
+                    val = sys.intern(match.group(1))
                     token_type = TokenType.ID
                     
                     if val == '@circuit': token_type = TokenType.KW_CIRCUIT
                     elif val == '@end': token_type = TokenType.KW_END
                     elif val == '@options': token_type = TokenType.KW_OPTIONS
-                    elif val in ['VDC', 'RES', 'CAP', 'IND', 'GND', 'DIODE', 'LED', 'SWITCH', 'VAC', 'IDC',
-                                 'NPN', 'PNP', 'NMOS', 'PMOS', 'AND', 'OR', 'NOT', 'NAND']: 
+                    elif val == '@subcircuit': token_type = TokenType.KW_SUBCIRCUIT
+                    elif val == '@include': token_type = TokenType.KW_INCLUDE
+                    elif val in KEYWORDS:
                         token_type = TokenType.TYPE
                     # Fallback ID for values or pin names
                     
@@ -86,7 +99,28 @@ class Lexer:
                     continue
                 
             char = self.source[pos]
-            if char == '.':
+            if char == '"':
+                # Quoted string (include paths); no escapes, no line breaks
+                end = self.source.find('"', pos + 1)
+                newline = self.source.find('\n', pos)
+                if end < 0 or 0 <= newline < end:
+                    raise SyntaxError(f"Unterminated string at {self.current_line}:{self.current_col}")
+                self.tokens.append(Token(TokenType.STRING, self.source[pos + 1:end], self.current_line, self.current_col))
+                self.current_col += end + 1 - pos
+                pos = end + 1
+                continue
+            elif char == '[':
+                # The whole subscript is one token; the parser interprets it
+                end = self.source.find(']', pos)
+                newline = self.source.find('\n', pos)
+                if end < 0 or 0 <= newline < end:
+                    raise SyntaxError(f"Unterminated '[' at {self.current_line}:{self.current_col}")
+                val = self.source[pos + 1:end].replace(' ', '').replace('\t', '')
+                self.tokens.append(Token(TokenType.INDEX, val, self.current_line, self.current_col))
+                self.current_col += end + 1 - pos
+                pos = end + 1
+                continue
+            elif char == '.':
                 self.tokens.append(Token(TokenType.DOT, '.', self.current_line, self.current_col))
             elif char == '=':
                 self.tokens.append(Token(TokenType.EQUALS, '=', self.current_line, self.current_col))
@@ -94,12 +128,14 @@ class Lexer:
                 self.tokens.append(Token(TokenType.LPAREN, '(', self.current_line, self.current_col))
             elif char == ')':
                 self.tokens.append(Token(TokenType.RPAREN, ')', self.current_line, self.current_col))
+            elif char == ',':
+                self.tokens.append(Token(TokenType.COMMA, ',', self.current_line, self.current_col))
             else:
                 # Fallback for values (can contain numbers, percent, etc.)
                 # This is a bit loose, refinement might be needed for strict parsing
-                match = re.match(r'([a-zA-Z0-9%\.]+)', self.source[pos:])
+                match = VALUE_PATTERN.match(self.source, pos)
                 if match:
-                    val = match.group(1)
+                    val = sys.intern(match.group(1))
                     self.tokens.append(Token(TokenType.STRING, val, self.current_line, self.current_col))
                     self.current_col += len(val)
                     pos += len(val)
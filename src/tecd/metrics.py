@@ -0,0 +1,167 @@
+import heapq
+from bisect import bisect_left, bisect_right
+from dataclasses import asdict, dataclass
+from typing import TYPE_CHECKING, Dict, List, Tuple
+from .layout import Layout
+from .spatial import GridIndex
+
+if TYPE_CHECKING:
+    from .routing import Route
+
+Point = Tuple[float, float]
+Segment = Tuple[Point, Point]
+
+@dataclass
+class LayoutMetrics:
+    components: int
+    nets: int
+    crossings: int
+    total_length: float
+    max_length: float  # longest single net
+    bends: int
+    overlaps: int
+    width: float  # bounding box of symbols and wires
+    height: float
+
+    @property
+    def area(self) -> float:
+        return self.width * self.height
+
+    @property
+    def aspect(self) -> float:
+        return self.width / self.height if self.height else 0.0
+
+    def to_dict(self) -> Dict[str, float]:
+        data = asdict(self)
+        data.update(area=self.area, aspect=round(self.aspect, 4))
+        return data
+
+def _orient(a: Point, b: Point, c: Point) -> float:
+    return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+
+def _proper_cross(s1: Segment, s2: Segment) -> bool:
+    (a, b), (c, d) = s1, s2
+    return _orient(a, b, c) * _orient(a, b, d) < 0 and _orient(c, d, a) * _orient(c, d, b) < 0
+
+class _Fenwick:
+    def __init__(self, size: int):
+        self.tree = [0] * (size + 1)
+
+    def add(self, i: int, delta: int):
+        i += 1
+        while i < len(self.tree):
+            self.tree[i] += delta
+            i += i & -i
+
+    def prefix(self, i: int) -> int:
+        # Sum of entries [0, i)
+        total = 0
+        while i > 0:
+            total += self.tree[i]
+            i -= i & -i
+        return total
+
+def _orthogonal_crossings(horizontal: List[Tuple[float, float, float]], vertical: List[Tuple[float, float, float]]) -> int:
+    # Horizontal (y, x0, x1) against vertical (x, y0, y1) segments: sweep x,
+    # keeping the active horizontals' y in a Fenwick tree, so each vertical
+    # counts the strictly-inside ys in O(log n). At equal x, horizontals
+    # ending there leave before the query and those starting there join
+    # after it: touching is not crossing.
+    if not horizontal or not vertical:
+        return 0
+    ys = sorted({y for y, _, _ in horizontal})
+    events = []
+    for y, x0, x1 in horizontal:
+        events.append((x0, 2, y, 0.0))
+        events.append((x1, 0, y, 0.0))
+    for x, y0, y1 in vertical:
+        events.append((x, 1, y0, y1))
+    events.sort(key=lambda e: (e[0], e[1]))
+    tree = _Fenwick(len(ys))
+    count = 0
+    for _, kind, a, b in events:
+        if kind == 1:
+            count += tree.prefix(bisect_left(ys, b)) - tree.prefix(bisect_right(ys, a))
+        else:
+            tree.add(bisect_left(ys, a), 1 if kind == 2 else -1)
+    return count
+
+def _all_crossings(segments: List[Segment]) -> int:
+    # Proper crossings among one set of segments. Horizontal/vertical pairs
+    # (nearly all of a routed schematic) go through the sweep above; the
+    # few pairs involving a diagonal are found by sweep-and-prune on x.
+    horizontal, vertical, indexed = [], [], []
+    for (x0, y0), (x1, y1) in segments:
+        if y0 == y1 and x0 != x1:
+            horizontal.append((y0, min(x0, x1), max(x0, x1)))
+            indexed.append((min(x0, x1), max(x0, x1), min(y0, y1), max(y0, y1), 'h', ((x0, y0), (x1, y1))))
+        elif x0 == x1 and y0 != y1:
+            vertical.append((x0, min(y0, y1), max(y0, y1)))
+            indexed.append((min(x0, x1), max(x0, x1), min(y0, y1), max(y0, y1), 'v', ((x0, y0), (x1, y1))))
+        elif x0 != x1:
+            indexed.append((min(x0, x1), max(x0, x1), min(y0, y1), max(y0, y1), 'd', ((x0, y0), (x1, y1))))
+    count = _orthogonal_crossings(horizontal, vertical)
+    if not any(kind == 'd' for *_, kind, _ in indexed):
+        return count
+
+    indexed.sort(key=lambda s: s[0])
+    active: List[Tuple[float, int]] = []  # heap of (max x, index)
+    for i, (lo, hi, ylo, yhi, kind, seg) in enumerate(indexed):
+        while active and active[0][0] < lo:
+            heapq.heappop(active)
+        for _, j in active:
+            other = indexed[j]
+            if (kind == 'd' or other[4] == 'd') and other[1] >= lo and other[2] <= yhi and ylo <= other[3] and _proper_cross(seg, other[5]):
+                count += 1
+        heapq.heappush(active, (hi, i))
+    return count
+
+def count_crossings(routes: List["Route"]) -> int:
+    # Proper crossings between wires of different nets: all crossings minus
+    # those inside each net, each counted in O(n log n) for orthogonal wires
+    segments_by_net = [[seg for seg in route.segments() if seg[0] != seg[1]] for route in routes]
+    total = _all_crossings([seg for segments in segments_by_net for seg in segments])
+    return total - sum(_all_crossings(segments) for segments in segments_by_net)
+
+def count_bends(routes: List["Route"]) -> int:
+    # Polyline vertices where the wire changes direction
+    bends = 0
+    for route in routes:
+        for line in route.polylines:
+            for a, b, c in zip(line, line[1:], line[2:]):
+                if a != b and b != c and _orient(a, b, c) != 0:
+                    bends += 1
+    return bends
+
+def count_overlaps(layout: Layout) -> int:
+    # Pairs of symbols whose bodies intersect (touching edges are fine)
+    index: GridIndex[int] = GridIndex(cell_size=100)
+    overlaps = 0
+    for i, pc in enumerate(layout.components):
+        x0, y0, x1, y1 = bbox = pc.bbox()
+        overlaps += sum(1 for (a0, b0, a1, b1), _ in index.query_boxes(bbox) if a0 < x1 and x0 < a1 and b0 < y1 and y0 < b1)
+        index.insert(bbox, i)
+    return overlaps
+
+def measure(layout: Layout, routes: List["Route"]) -> LayoutMetrics:
+    # Every metric in one pass over symbols and wire segments; O(n log n),
+    # cheap enough to score candidates inside a layout search
+    lengths = [route.length for route in routes]
+    boxes = [pc.bbox() for pc in layout.components]
+    xs = [x for box in boxes for x in (box[0], box[2])]
+    ys = [y for box in boxes for y in (box[1], box[3])]
+    for route in routes:
+        for line in route.polylines:
+            xs.extend(x for x, _ in line)
+            ys.extend(y for _, y in line)
+    return LayoutMetrics(
+        components=len(layout.components),
+        nets=len(routes),
+        crossings=count_crossings(routes),
+        total_length=sum(lengths),
+        max_length=max(lengths, default=0.0),
+        bends=count_bends(routes),
+        overlaps=count_overlaps(layout),
+        width=max(xs) - min(xs) if xs else 0.0,
+        height=max(ys) - min(ys) if ys else 0.0,
+    )
@@ -0,0 +1,89 @@
+import os
+from dataclasses import dataclass
+from typing import Dict, Iterable, List, Set
+from .ast_nodes import SubcircuitDef
+
+@dataclass
+class Module:
+    # A parsed @include file
+    path: str
+    subcircuits: Dict[str, SubcircuitDef]
+    # This file and everything it includes, transitively -> mtime when read
+    files: Dict[str, float]
+
+# Absolute path -> parsed module. Shared by every file compiled in this
+# process, so a library included by a whole batch is tokenized and parsed once.
+_modules: Dict[str, Module] = {}
+_loading: List[str] = []
+
+def _is_current(module: Module) -> bool:
+    for path, mtime in module.files.items():
+        try:
+            if os.path.getmtime(path) != mtime:
+                return False
+        except OSError:
+            return False
+    return True
+
+def load_module(path: str) -> Module:
+    from .lexer import tokenize
+    from .parser import Parser
+
+    path = os.path.abspath(path)
+    module = _modules.get(path)
+    if module is not None and _is_current(module):
+        return module
+    if path in _loading:
+        raise SyntaxError(f"Recursive @include of '{path}'")
+
+    _loading.append(path)
+    try:
+        mtime = os.path.getmtime(path)
+        with open(path, 'r') as f:
+            source = f.read()
+        parser = Parser(tokenize(source), path)
+        parser.parse_library()
+    finally:
+        _loading.pop()
+    files = {path: mtime}
+    files.update(parser.dependencies)
+    module = Module(path, parser.subcircuits, files)
+    _modules[path] = module
+    return module
+
+class DependencyGraph:
+    # Which root files (the ones being built) read which files, so a change
+    # only rebuilds the roots that depend on it
+    def __init__(self):
+        self.files: Dict[str, Set[str]] = {}   # root -> files it reads, itself included
+        self._mtimes: Dict[str, float] = {}
+
+    def update(self, root: str, dependencies: Iterable[str]):
+        root = os.path.abspath(root)
+        self.files[root] = {root, *(os.path.abspath(p) for p in dependencies)}
+        # Files seen for the first time are current as of now (they were
+        # just read); only later modifications count as changes
+        for path in self.files[root]:
+            if path not in self._mtimes:
+                try:
+                    self._mtimes[path] = os.path.getmtime(path)
+                except OSError:
+                    self._mtimes[path] = -1.0
+
+    def dependents(self, path: str) -> List[str]:
+        path = os.path.abspath(path)
+        return [root for root, files in self.files.items() if path in files]
+
+    def changed(self) -> List[str]:
+        # Roots affected by files modified (or removed) since the last call
+        affected: Set[str] = set()
+        watched = set().union(*self.files.values()) if self.files else set()
+        for path in watched:
+            try:
+                mtime = os.path.getmtime(path)
+            except OSError:
+                mtime = -1.0
+            if self._mtimes.get(path) != mtime:
+                self._mtimes[path] = mtime
+                affected.update(self.dependents(path))
+        return sorted(affected)
@@ -0,0 +1,207 @@
+import math
+import random
+from collections import defaultdict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+
+# Stop coarsening at this many nodes
+COARSEST_SIZE = 40
+# ...or when a round of matching removes less than this share of the nodes
+# (stars and other graphs with few disjoint edges)
+MIN_SHRINK = 0.1
+# Nets with more members become one virtual hub node instead of a clique
+CLIQUE_LIMIT = 8
+# Levels up to this size compute every pairwise repulsion; larger ones only
+# look at the neighbouring cells of a spatial hash (radius 2k)
+EXACT_REPULSION = 300
+COARSEST_ITERATIONS = 300
+REFINE_ITERATIONS = 30
+
+@dataclass
+class _Level:
+    adjacency: List[Dict[int, float]]  # node -> {neighbour: edge weight}
+    mass: List[float]  # fine nodes merged into each node
+    pinned: List[Optional[Tuple[float, float]]]
+    # Index of each node's coarse node one level up (set when coarsened)
+    parent: Optional[List[int]] = None
+
+def _coarsen(level: _Level) -> _Level:
+    # Heavy-edge matching: visiting low-degree nodes first, merge each
+    # unmatched node with its unmatched neighbour of heaviest edge (lightest
+    # mass on ties). Pinned nodes stay single so their anchors survive.
+    n = len(level.adjacency)
+    match = [-1] * n
+    for u in sorted(range(n), key=lambda u: (len(level.adjacency[u]), u)):
+        if match[u] >= 0 or level.pinned[u] is not None:
+            continue
+        best = None
+        for v, weight in level.adjacency[u].items():
+            if match[v] < 0 and v != u and level.pinned[v] is None:
+                key = (-weight, level.mass[v], v)
+                if best is None or key < best:
+                    best = key
+        if best is not None:
+            match[u], match[best[2]] = best[2], u
+
+    parent = [-1] * n
+    count = 0
+    for u in range(n):
+        if parent[u] < 0:
+            parent[u] = count
+            if match[u] >= 0:
+                parent[match[u]] = count
+            count += 1
+    level.parent = parent
+
+    adjacency: List[Dict[int, float]] = [defaultdict(float) for _ in range(count)]
+    mass = [0.0] * count
+    pinned: List[Optional[Tuple[float, float]]] = [None] * count
+    for u in range(n):
+        cu = parent[u]
+        mass[cu] += level.mass[u]
+        if level.pinned[u] is not None:
+            pinned[cu] = level.pinned[u]
+        for v, weight in level.adjacency[u].items():
+            cv = parent[v]
+            if cv != cu:
+                adjacency[cu][cv] += weight
+    return _Level([dict(a) for a in adjacency], mass, pinned)
+
+def _cell_pairs(buckets: Dict[Tuple[int, int], List[int]]):
+    # (node, others) covering each pair of nodes in neighbouring cells once:
+    # the rest of its own cell plus the four cells ahead of it
+    for (cx, cy), members in buckets.items():
+        ahead = [j for dx, dy in ((1, -1), (1, 0), (1, 1), (0, 1)) for j in buckets.get((cx + dx, cy + dy), ())]
+        for a, i in enumerate(members):
+            yield i, members[a + 1:] + ahead
+
+def _relax(level: _Level, positions: List[List[float]], k: float, iterations: int, t: float,
+           bounds: Tuple[float, float, float, float]):
+    # Fruchterman-Reingold with mass-weighted repulsion, cooling linearly
+    # from t. In place.
+    n = len(positions)
+    adjacency, mass, pinned = level.adjacency, level.mass, level.pinned
+    left, top, right, bottom = bounds
+    cutoff = 2 * k
+    dt = t / (iterations + 1)
+    for _ in range(iterations):
+        disp = [[0.0, 0.0] for _ in range(n)]
+
+        # Repulsion
+        if n <= EXACT_REPULSION:
+            pairs = ((i, range(i + 1, n)) for i in range(n))
+        else:
+            buckets: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+            for i, (x, y) in enumerate(positions):
+                buckets[(int(x // cutoff), int(y // cutoff))].append(i)
+            pairs = _cell_pairs(buckets)
+        for i, others in pairs:
+            xi, yi = positions[i]
+            for j in others:
+                dx = xi - positions[j][0]
+                dy = yi - positions[j][1]
+                dist = math.sqrt(dx * dx + dy * dy) or 0.1
+                # Heavier nodes push harder, so coarse levels keep their spacing
+                repulse = k * k / (dist * dist)
+                disp[i][0] += dx * repulse * mass[j]
+                disp[i][1] += dy * repulse * mass[j]
+                disp[j][0] -= dx * repulse * mass[i]
+                disp[j][1] -= dy * repulse * mass[i]
+
+        # Attraction
+        for u in range(n):
+            xu, yu = positions[u]
+            for v, weight in adjacency[u].items():
+                if v <= u:
+                    continue
+                dx = xu - positions[v][0]
+                dy = yu - positions[v][1]
+                dist = math.sqrt(dx * dx + dy * dy) or 0.1
+                attract = weight * dist / k
+                disp[u][0] -= dx * attract / mass[u]
+                disp[u][1] -= dy * attract / mass[u]
+                disp[v][0] += dx * attract / mass[v]
+                disp[v][1] += dy * attract / mass[v]
+
+        for i in range(n):
+            if pinned[i] is not None:
+                continue
+            d = math.sqrt(disp[i][0] ** 2 + disp[i][1] ** 2) or 0.1
+            step = min(d, t) / d
+            positions[i][0] = max(left, min(right, positions[i][0] + disp[i][0] * step))
+            positions[i][1] = max(top, min(bottom, positions[i][1] + disp[i][1] * step))
+        t -= dt
+
+def multilevel_layout(nodes: List[str], nets: List[List[str]], fixed: Dict[str, Tuple[float, float]],
+                      width: float, height: float, seed: Optional[int] = None) -> Dict[str, Tuple[float, float]]:
+    # Coarsen by heavy-edge matching down to a few dozen nodes, lay that out,
+    # then prolong level by level (each node starts at its coarse node's
+    # position) with a short refinement at each level. nets lists the nodes
+    # on each net; fixed nodes keep their positions at every level. A seed
+    # scatters the coarsest level randomly instead of around a circle.
+    index = {name: i for i, name in enumerate(nodes)}
+    adjacency: List[Dict[int, float]] = [defaultdict(float) for _ in nodes]
+    for members in nets:
+        members = list(dict.fromkeys(index[name] for name in members if name in index))
+        if len(members) < 2:
+            continue
+        if len(members) > CLIQUE_LIMIT:
+            # Hub node standing in for the net; dropped from the result
+            hub = len(adjacency)
+            adjacency.append(defaultdict(float))
+            for u in members:
+                adjacency[u][hub] += 1
+                adjacency[hub][u] += 1
+            continue
+        for a in range(len(members)):
+            for b in range(a + 1, len(members)):
+                adjacency[members[a]][members[b]] += 1
+                adjacency[members[b]][members[a]] += 1
+    pinned = [fixed.get(name) for name in nodes] + [None] * (len(adjacency) - len(nodes))
+    levels = [_Level([dict(a) for a in adjacency], [1.0] * len(adjacency), pinned)]
+    while len(levels[-1].mass) > COARSEST_SIZE:
+        coarse = _coarsen(levels[-1])
+        if len(coarse.mass) > (1 - MIN_SHRINK) * len(levels[-1].mass):
+            levels[-1].parent = None
+            break
+        levels.append(coarse)
+
+    margin = 50
+    bounds = (margin, margin, width - margin, height - margin)
+    area = (width - 2 * margin) * (height - 2 * margin)
+    center_x, center_y = width / 2, height / 2
+    radius = min(width, height) / 4
+
+    coarsest = levels[-1]
+    rng = random.Random(seed) if seed is not None else None
+    positions = []
+    for i, anchor in enumerate(coarsest.pinned):
+        angle = 2 * math.pi * i / len(coarsest.pinned)
+        if anchor is not None:
+            positions.append(list(anchor))
+        elif rng:
+            positions.append([rng.uniform(bounds[0], bounds[2]), rng.uniform(bounds[1], bounds[3])])
+        else:
+            positions.append([center_x + radius * math.cos(angle), center_y + radius * math.sin(angle)])
+    _relax(coarsest, positions, math.sqrt(area / len(positions)), COARSEST_ITERATIONS, width / 10, bounds)
+
+    for level in reversed(levels[:-1]):
+        k = math.sqrt(area / len(level.mass))
+        seen = set()
+        fine = []
+        for i, anchor in enumerate(level.pinned):
+            if anchor is not None:
+                fine.append(list(anchor))
+                continue
+            x, y = positions[level.parent[i]]
+            if level.parent[i] in seen:
+                # Second node of a matched pair: step aside by a fraction of
+                # k in a direction that varies from pair to pair (golden angle)
+                angle = i * 2.399963
+                x, y = x + 0.5 * k * math.cos(angle), y + 0.5 * k * math.sin(angle)
+            seen.add(level.parent[i])
+            fine.append([x, y])
+        positions = fine
+        _relax(level, positions, k, REFINE_ITERATIONS, k, bounds)
+
+    return {name: (positions[i][0], positions[i][1]) for i, name in enumerate(nodes)}
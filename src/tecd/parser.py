@@ -1,12 +1,27 @@
-from typing import List, Optional
-from .ast_nodes import Circuit, Component, Connection, Option, PinReference, SourceLocation
+import os
+import re
+import sys
+from typing import Dict, List, Optional, Set
+from .ast_nodes import Circuit, Component, ComponentArray, Connection, Index, Option, PinReference, SourceLocation, SubcircuitDef
 from .lexer import Token, TokenType, tokenize
 
+# Subscript forms: [3], [0..7], [i], [i+1], [i-1]
+LITERAL_INDEX = re.compile(r'\d+$')
+RANGE_INDEX = re.compile(r'(\d+)\.\.(\d+)$')
+VAR_INDEX = re.compile(r'([A-Za-z_]\w*)(?:([+-])(\d+))?$')
+
 class Parser:
-    def __init__(self, tokens: List[Token]):
+    def __init__(self, tokens: List[Token], path: Optional[str] = None):
         self.tokens = tokens
+        # Source file, for resolving @include paths (None: relative to the cwd)
+        self.path = path
+        # Included file -> mtime when it was read
+        self.dependencies: Dict[str, float] = {}
         self.pos = 0
         self.current_circuit = Circuit()
+        self.subcircuits: Dict[str, SubcircuitDef] = {}
+        # Subcircuits instantiated by the body being parsed
+        self._instantiated: Set[str] = set()
 
     def current(self) -> Token:
         if self.pos < len(self.tokens):
@@ -36,9 +51,12 @@ class Parser:
         raise SyntaxError(f"Expected {token_type} at {self.current().line}:{self.current().column}, found {self.current().type}")
 
     def parse(self) -> Circuit:
-        while self.current().type == TokenType.NEWLINE:
-            self.advance()
+        self.parse_preamble()
         self.expect(TokenType.KW_CIRCUIT)
+        if self.current().type == TokenType.ID:
+            self.current_circuit.name = self.advance().value
+        self.current_circuit.subcircuits = self.subcircuits
+        self.current_circuit.dependencies = list(self.dependencies)
         
         while self.current().type != TokenType.KW_END and self.current().type != TokenType.EOF:
             self.parse_statement()
@@ -46,6 +64,79 @@ class Parser:
         self.expect(TokenType.KW_END)
         return self.current_circuit
 
+    def parse_library(self):
+        # An included file: only @include and @subcircuit at the top level
+        self.parse_preamble()
+        self.expect(TokenType.EOF)
+
+    def parse_preamble(self):
+        while True:
+            token = self.current()
+            if token.type == TokenType.NEWLINE:
+                self.advance()
+            elif token.type == TokenType.KW_INCLUDE:
+                self.parse_include()
+            elif token.type == TokenType.KW_SUBCIRCUIT:
+                self.parse_subcircuit()
+            else:
+                return
+
+    def parse_include(self):
+        from .modules import load_module
+
+        self.advance()
+        path_token = self.expect(TokenType.STRING)
+        base_dir = os.path.dirname(self.path) if self.path else ''
+        module = load_module(os.path.join(base_dir, path_token.value))
+        for name, definition in module.subcircuits.items():
+            existing = self.subcircuits.get(name)
+            if existing is not None and existing.digest != definition.digest:
+                raise SyntaxError(f"Subcircuit '{name}' from '{path_token.value}' conflicts with an earlier definition at {path_token.line}:{path_token.column}")
+            self.subcircuits[name] = definition
+        self.dependencies.update(module.files)
+
+    def parse_subcircuit(self):
+        start = self.pos
+        keyword = self.advance()
+        name_token = self.expect(TokenType.ID)
+        if name_token.value in self.subcircuits:
+            raise SyntaxError(f"Duplicate subcircuit '{name_token.value}' at {name_token.line}:{name_token.column}")
+
+        ports = []
+        self.expect(TokenType.LPAREN)
+        while self.current().type != TokenType.RPAREN:
+            if self.match(TokenType.COMMA) or self.match(TokenType.NEWLINE):
+                continue
+            ports.append(self.expect(TokenType.ID).value)
+        self.expect(TokenType.RPAREN)
+
+        outer, self.current_circuit = self.current_circuit, Circuit(
+            location=SourceLocation(keyword.line, keyword.column), subcircuits=dict(self.subcircuits))
+        self._instantiated = set()
+        while self.current().type != TokenType.KW_END and self.current().type != TokenType.EOF:
+            self.parse_statement()
+        self.expect(TokenType.KW_END)
+        body, self.current_circuit = self.current_circuit, outer
+
+        import hashlib
+
+        # Positions are left out so moving a definition within (or between)
+        # files keeps its cache entry
+        digest = hashlib.sha1()
+        for token in self.tokens[start:self.pos]:
+            digest.update(f"{token.type}\0{token.value}\n".encode())
+        for used in sorted(self._instantiated):
+            digest.update(self.subcircuits[used].digest.encode())
+        self._instantiated = set()
+
+        self.subcircuits[name_token.value] = SubcircuitDef(
+            location=body.location,
+            name=name_token.value,
+            ports=ports,
+            body=body,
+            digest=digest.hexdigest()
+        )
+
     def parse_statement(self):
         token = self.current()
         
@@ -59,7 +150,12 @@ class Parser:
             else:
                 self.parse_component()
         elif token.type == TokenType.ID:
-            self.parse_connection_chain()
+            if self.peek().type == TokenType.ID:
+                # Subcircuit instance (STAGE X1), or a declaration with an
+                # unknown type, kept for the rule checker to report
+                self.parse_component()
+            else:
+                self.parse_connection_chain()
         elif token.type == TokenType.NEWLINE:
             self.advance()
         else:
@@ -84,6 +180,17 @@ class Parser:
     def parse_component(self):
         type_token = self.advance()
         name_token = self.expect(TokenType.ID)
+        name = name_token.value
+        if type_token.value in self.subcircuits:
+            self._instantiated.add(type_token.value)
+        index = None
+        if self.current().type == TokenType.INDEX:
+            index = self.parse_index()
+            if index.var is not None:
+                raise SyntaxError(f"Array declaration needs a range like [0..7] at {name_token.line}:{name_token.column}")
+            if index.stop is None:
+                name = sys.intern(f"{name}[{index.offset}]")
+                index = None
         
         params = {}
         if self.match(TokenType.LPAREN):
@@ -106,10 +213,21 @@ class Parser:
                  params[key] = value
             self.expect(TokenType.RPAREN)
             
+        location = SourceLocation(type_token.line, type_token.column)
+        if index is not None:
+            self.current_circuit.components.append(ComponentArray(
+                location=location,
+                type_name=type_token.value,
+                name=name,
+                start=index.offset,
+                stop=index.stop,
+                parameters=params
+            ))
+            return
         self.current_circuit.components.append(Component(
-            location=SourceLocation(type_token.line, type_token.column),
+            location=location,
             type_name=type_token.value,
-            name=name_token.value,
+            name=name,
             parameters=params
         ))
 
@@ -140,6 +258,12 @@ class Parser:
             
         component_name = name_token.value
         pin_name = None
+        index = None
+        if self.current().type == TokenType.INDEX:
+            index = self.parse_index()
+            if index.var is None and index.stop is None:
+                component_name = sys.intern(f"{component_name}[{index.offset}]")
+                index = None
         
         if self.match(TokenType.DOT):
             pin_name_token = self.current()
@@ -149,9 +273,27 @@ class Parser:
             else:
                  raise SyntaxError(f"Expected pin name at {pin_name_token.line}:{pin_name_token.column}")
                  
-        return PinReference(component_name=component_name, pin_name=pin_name)
+        return PinReference(component_name=component_name, pin_name=pin_name, index=index)
+
+    def parse_index(self) -> Index:
+        token = self.expect(TokenType.INDEX)
+        location = SourceLocation(token.line, token.column)
+        text = token.value
+        if LITERAL_INDEX.match(text):
+            return Index(location=location, offset=int(text))
+        m = RANGE_INDEX.match(text)
+        if m:
+            start, stop = int(m.group(1)), int(m.group(2))
+            if stop < start:
+                raise SyntaxError(f"Empty range [{text}] at {token.line}:{token.column}")
+            return Index(location=location, offset=start, stop=stop)
+        m = VAR_INDEX.match(text)
+        if m:
+            offset = int(m.group(3) or 0)
+            return Index(location=location, var=sys.intern(m.group(1)), offset=-offset if m.group(2) == '-' else offset)
+        raise SyntaxError(f"Invalid subscript [{text}] at {token.line}:{token.column}")
 
-def parse(source: str) -> Circuit:
+def parse(source: str, path: Optional[str] = None) -> Circuit:
     tokens = tokenize(source)
-    parser = Parser(tokens)
+    parser = Parser(tokens, path)
     return parser.parse()
@@ -0,0 +1,75 @@
+import math
+from typing import Dict, List, Sequence, Tuple
+
+PLOT_WIDTH = 640
+PANEL_HEIGHT = 200
+MARGIN_LEFT = 60
+MARGIN_RIGHT = 20
+MARGIN_TOP = 30
+PANEL_GAP = 40
+COLORS = ('#1f77b4', '#d62728', '#2ca02c', '#9467bd', '#ff7f0e', '#8c564b', '#e377c2', '#17becf')
+
+def _nice_step(span: float, target: int) -> float:
+    # 1, 2 or 5 times a power of ten giving about `target` intervals
+    raw = span / target if span > 0 else 1.0
+    power = 10 ** math.floor(math.log10(raw))
+    for factor in (1, 2, 5, 10):
+        if factor * power >= raw:
+            return factor * power
+    return 10 * power
+
+def _frequency_label(f: float) -> str:
+    for scale, prefix in ((1e9, 'G'), (1e6, 'M'), (1e3, 'k')):
+        if f >= scale:
+            return f"{f / scale:g}{prefix}"
+    return f"{f:g}"
+
+def bode_svg(frequencies: Sequence[float], series: Dict[str, Tuple[List[float], List[float]]]) -> str:
+    # Gain (dB) above phase (degrees) against a log frequency axis;
+    # series maps a trace name to its (gains, phases)
+    inner_w = PLOT_WIDTH - MARGIN_LEFT - MARGIN_RIGHT
+    height = MARGIN_TOP + 2 * PANEL_HEIGHT + PANEL_GAP + 50
+    lo, hi = math.log10(frequencies[0]), math.log10(frequencies[-1])
+    x_of = lambda f: MARGIN_LEFT + (math.log10(f) - lo) / (hi - lo) * inner_w
+
+    lines = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{PLOT_WIDTH}" height="{height}" viewBox="0 0 {PLOT_WIDTH} {height}">',
+             '<style> text { font-family: sans-serif; font-size: 10px; fill: black; } </style>',
+             '<rect width="100%" height="100%" fill="white"/>']
+    for panel, (title, unit) in enumerate((('Gain', 'dB'), ('Phase', 'deg'))):
+        top = MARGIN_TOP + panel * (PANEL_HEIGHT + PANEL_GAP)
+        values = [v for gains_phases in series.values() for v in gains_phases[panel]]
+        # Clipped gains (-400 dB for a zero) would flatten the rest of the plot
+        values = [v for v in values if v > -300] or [0.0]
+        vmin, vmax = min(values), max(values)
+        if vmax - vmin < 1e-9:
+            vmin, vmax = vmin - 1, vmax + 1
+        step = _nice_step(vmax - vmin, 5)
+        vmin, vmax = math.floor(vmin / step) * step, math.ceil(vmax / step) * step
+        y_of = lambda v: top + (vmax - max(v, vmin)) / (vmax - vmin) * PANEL_HEIGHT
+
+        lines.append(f'<text x="{MARGIN_LEFT}" y="{top - 8}">{title} ({unit})</text>')
+        for decade in range(math.ceil(lo), math.floor(hi) + 1):
+            x = x_of(10 ** decade)
+            lines.append(f'<line x1="{x:.1f}" y1="{top}" x2="{x:.1f}" y2="{top + PANEL_HEIGHT}" stroke="#ddd"/>')
+            lines.append(f'<text x="{x:.1f}" y="{top + PANEL_HEIGHT + 12}" text-anchor="middle">{_frequency_label(10 ** decade)}</text>')
+        ticks = int(round((vmax - vmin) / step))
+        for k in range(ticks + 1):
+            v = vmin + k * step
+            y = y_of(v)
+            lines.append(f'<line x1="{MARGIN_LEFT}" y1="{y:.1f}" x2="{MARGIN_LEFT + inner_w}" y2="{y:.1f}" stroke="#ddd"/>')
+            lines.append(f'<text x="{MARGIN_LEFT - 4}" y="{y + 3:.1f}" text-anchor="end">{v:g}</text>')
+        lines.append(f'<rect x="{MARGIN_LEFT}" y="{top}" width="{inner_w}" height="{PANEL_HEIGHT}" fill="none" stroke="black"/>')
+        for n, (name, gains_phases) in enumerate(series.items()):
+            points = " ".join(f"{x_of(f):.1f},{y_of(v):.1f}" for f, v in zip(frequencies, gains_phases[panel]))
+            lines.append(f'<polyline points="{points}" fill="none" stroke="{COLORS[n % len(COLORS)]}" stroke-width="1.5"/>')
+
+    legend_y = height - 6
+    lines.append(f'<text x="{MARGIN_LEFT + inner_w}" y="{legend_y - 16}" text-anchor="end">Frequency (Hz)</text>')
+    x = MARGIN_LEFT
+    for n, name in enumerate(series):
+        color = COLORS[n % len(COLORS)]
+        lines.append(f'<line x1="{x}" y1="{legend_y - 3}" x2="{x + 16}" y2="{legend_y - 3}" stroke="{color}" stroke-width="2"/>')
+        lines.append(f'<text x="{x + 20}" y="{legend_y}">{name}</text>')
+        x += 30 + len(name) * 6
+    lines.append('</svg>')
+    return "\n".join(lines)
@@ -0,0 +1,178 @@
+import asyncio
+import html
+import json
+from typing import Dict, List, Optional, Set, Tuple
+from .modules import DependencyGraph
+from .registry import JUNCTION, role
+from .semantics import CircuitGraph
+from .server import http_response, read_request
+
+# Seconds between checks of the watched files
+PREVIEW_POLL = 0.3
+
+# id -> markup of every drawable element, in draw order
+Elements = Dict[str, str]
+
+def net_key(graph: CircuitGraph, net) -> str:
+    # Stable across edits elsewhere in the file: the net's first junction
+    # name, else its alphabetically first component pin
+    junctions = sorted(p.component.name for p in net.points if role(p.component.type_name) == JUNCTION)
+    if junctions:
+        return junctions[0]
+    return min(f"{p.component.name}.{p.pin_name}" for p in net.points)
+
+def render_elements(source: str, path: Optional[str] = None, options: Optional[Dict[str, str]] = None,
+                    flatten: Optional[bool] = None) -> Tuple[Tuple[float, float], Elements, List[str]]:
+    # ((width, height), elements, dependencies). Components are keyed 'c-'
+    # plus their name (the group holds the symbol and its labels), wires
+    # 'w-' plus the net key.
+    from .layout import compute_layout
+    from .parser import parse
+    from .renderer import SVGRenderer
+    from .routing import route_nets
+    from .semantics import analyze
+
+    ast = parse(source, path)
+    graph = analyze(ast, flatten)
+    graph.options.update(options or {})
+    layout = compute_layout(graph)
+    routes = route_nets(graph, layout)
+    renderer = SVGRenderer(graph, layout, routes)
+    keys_of_net = {net.id: net_key(graph, net) for net in graph.nets}
+    keys = [f"c-{pc.component.name}" for pc in layout.components] + [f"w-{keys_of_net[route.net_id]}" for route in routes]
+    elements = {key: f'<g id="{key}">{markup}</g>' for key, (_, markup) in zip(keys, renderer.elements)}
+    return (layout.width, layout.height), elements, ast.dependencies
+
+def diff_elements(old: Elements, new: Elements) -> Tuple[Elements, List[str]]:
+    # (changed or added elements, removed ids)
+    changed = {key: markup for key, markup in new.items() if old.get(key) != markup}
+    return changed, [key for key in old if key not in new]
+
+PAGE = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title>
+<style> body {{ margin: 0; font-family: sans-serif; }} #error {{ display: none; padding: 6px 10px; background: #fdd; color: #900; white-space: pre-wrap; }} </style>
+</head><body>
+<div id="error"></div>
+<svg id="diagram" xmlns="http://www.w3.org/2000/svg">{style}<rect width="100%" height="100%" fill="white"/><g id="components"></g><g id="wires"></g></svg>
+<script>
+const NS = "http://www.w3.org/2000/svg";
+const svg = document.getElementById("diagram"), error = document.getElementById("error");
+function place(id, markup) {{
+  const doc = new DOMParser().parseFromString('<svg xmlns="' + NS + '">' + markup + '</svg>', "image/svg+xml");
+  const node = document.importNode(doc.documentElement.firstElementChild, true);
+  const old = document.getElementById(id);
+  if (old) old.replaceWith(node);
+  else document.getElementById(id.startsWith("c-") ? "components" : "wires").appendChild(node);
+}}
+function apply(message) {{
+  if (message.error) {{ error.textContent = message.error; error.style.display = "block"; return; }}
+  error.style.display = "none";
+  if (message.full) {{ document.getElementById("components").replaceChildren(); document.getElementById("wires").replaceChildren(); }}
+  const [w, h] = message.size;
+  svg.setAttribute("width", w); svg.setAttribute("height", h); svg.setAttribute("viewBox", "0 0 " + w + " " + h);
+  for (const id of message.remove) document.getElementById(id)?.remove();
+  for (const [id, markup] of Object.entries(message.set)) place(id, markup);
+}}
+new EventSource("/events").onmessage = (event) => apply(JSON.parse(event.data));
+</script>
+</body></html>
+"""
+
+class PreviewServer:
+    # Serves PAGE, then streams the diagram over server-sent events: the
+    # whole element set once per connection, after that only the elements
+    # that changed (by stable id) and the ids that went away
+    def __init__(self, path: str, options: Optional[Dict[str, str]] = None, flatten: Optional[bool] = None,
+                 poll: float = PREVIEW_POLL):
+        self.path = path
+        self.options = options or {}
+        self.flatten = flatten
+        self.poll = poll
+        self.size: Tuple[float, float] = (0, 0)
+        self.elements: Elements = {}
+        self.error: Optional[str] = None
+        self.dependencies = DependencyGraph()
+        self._clients: Set[asyncio.Queue] = set()
+
+    async def refresh(self) -> Optional[dict]:
+        # Re-render and return the message for connected clients (None if
+        # nothing visible changed). Compiling runs in a thread so streams
+        # keep flowing.
+        try:
+            with open(self.path, 'r') as f:
+                source = f.read()
+            size, elements, dependencies = await asyncio.get_running_loop().run_in_executor(
+                None, render_elements, source, self.path, self.options, self.flatten)
+        except Exception as e:
+            self.dependencies.update(self.path, self.dependencies.files.get(self.path, []))
+            if str(e) == self.error:
+                return None
+            self.error = str(e)
+            return {'error': self.error}
+        self.dependencies.update(self.path, dependencies)
+        changed, removed = diff_elements(self.elements, elements)
+        had_error, self.error = self.error, None
+        if not changed and not removed and size == self.size and not had_error:
+            return None
+        self.size, self.elements = size, elements
+        return {'size': list(size), 'set': changed, 'remove': removed}
+
+    def snapshot(self) -> dict:
+        if self.error:
+            return {'error': self.error}
+        return {'full': True, 'size': list(self.size), 'set': self.elements, 'remove': []}
+
+    async def watch(self):
+        message = await self.refresh()
+        while True:
+            if message is not None:
+                for queue in self._clients:
+                    queue.put_nowait(message)
+            await asyncio.sleep(self.poll)
+            message = await self.refresh() if self.dependencies.changed() else None
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            request = await read_request(reader)
+            if request is None:
+                return
+            _, target, _, _ = request
+            if target == '/':
+                from .renderer import SVG_STYLE
+                page = PAGE.format(title=html.escape(self.path), style=SVG_STYLE)
+                writer.write(http_response(200, page.encode(), 'text/html; charset=utf-8', keep_alive=False))
+            elif target == '/events':
+                await self._stream(writer)
+            else:
+                writer.write(http_response(404, b'not found\n', keep_alive=False))
+            await writer.drain()
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _stream(self, writer: asyncio.StreamWriter):
+        writer.write(b"HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\nCache-Control: no-cache\r\n"
+                     b"Connection: keep-alive\r\n\r\n")
+        queue: asyncio.Queue = asyncio.Queue()
+        queue.put_nowait(self.snapshot())
+        self._clients.add(queue)
+        try:
+            while True:
+                message = await queue.get()
+                writer.write(f"data: {json.dumps(message)}\n\n".encode())
+                await writer.drain()
+        finally:
+            self._clients.discard(queue)
+
+async def serve(path: str, host: str = '127.0.0.1', port: int = 8000, options: Optional[Dict[str, str]] = None,
+                flatten: Optional[bool] = None):
+    preview = PreviewServer(path, options, flatten)
+    watcher = asyncio.ensure_future(preview.watch())
+    listener = await asyncio.start_server(preview.handle, host, port)
+    print(f"Previewing {path} on http://{host}:{port}/")
+    try:
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        watcher.cancel()
@@ -0,0 +1,132 @@
+import math
+from dataclasses import dataclass
+from typing import Dict, List, Set, Tuple
+from .registry import BLOCK, GROUND, JUNCTION, SOURCE, role
+from .semantics import CircuitGraph
+
+# Distance between neighbouring members when a super-node is expanded
+MEMBER_SPACING = 80
+
+@dataclass
+class SuperNode:
+    # A series chain of units; each unit is one component or a parallel group
+    # (several components across the same two nets). Laid out as a single
+    # node, then expanded in place.
+    units: List[List[str]]
+    # Outer net index at each end of the chain (into CircuitGraph.nets)
+    ends: Tuple[int, int]
+
+    @property
+    def representative(self) -> str:
+        return self.units[0][0]
+
+    @property
+    def members(self) -> List[str]:
+        return [name for unit in self.units for name in unit]
+
+def _two_net_components(graph: CircuitGraph, nodes: List[str]) -> Dict[str, Tuple[int, int]]:
+    # Placed components with exactly two distinct nets that may be moved as
+    # part of a group: not sources/ground (pinned by the layouts) or blocks
+    conn = graph.connectivity
+    result = {}
+    for name in nodes:
+        if role(graph.components[name].type_name) in (SOURCE, GROUND, BLOCK, JUNCTION):
+            continue
+        c = conn.component_index[name]
+        nets = sorted({conn.pin_net[conn.comp_indices[k]] for k in range(conn.comp_indptr[c], conn.comp_indptr[c + 1])})
+        if len(nets) == 2:
+            result[name] = (nets[0], nets[1])
+    return result
+
+def reduce_series_parallel(graph: CircuitGraph, nodes: List[str]) -> List[SuperNode]:
+    # Parallel groups first (same net pair), then maximal series chains of
+    # those units through nets touched by nothing else. O(pins) overall.
+    conn = graph.connectivity
+    pairs = _two_net_components(graph, nodes)
+    if len(pairs) < 2:
+        return []
+
+    units: Dict[Tuple[int, int], List[str]] = {}
+    for name, pair in pairs.items():
+        units.setdefault(pair, []).append(name)
+    unit_list = list(units.items())
+
+    # Real (non-junction) components on each net, capped: only nets with
+    # exactly two units matter
+    owners: Dict[int, Set[int]] = {}
+    unit_of = {name: u for u, (_, members) in enumerate(unit_list) for name in members}
+    for net in range(conn.num_nets):
+        members = set()
+        for p in conn.net_pins(net):
+            name = conn.component_names[conn.pin_component[p]]
+            if role(graph.components[name].type_name) == JUNCTION:
+                continue
+            members.add(unit_of.get(name, ('other', name)))
+            if len(members) > 2:
+                break
+        owners[net] = members
+
+    # Units linked through a net that only they touch
+    links: Dict[int, List[Tuple[int, int]]] = {u: [] for u in range(len(unit_list))}
+    for net, members in owners.items():
+        if len(members) == 2 and all(isinstance(m, int) for m in members):
+            u, v = members
+            links[u].append((v, net))
+            links[v].append((u, net))
+
+    supernodes: List[SuperNode] = []
+    seen: Set[int] = set()
+    for start in range(len(unit_list)):
+        if start in seen:
+            continue
+        # Walk to one end of the chain (or around a ring), then collect
+        # units towards the other end
+        end, prev = start, None
+        for _ in range(len(unit_list)):
+            step = next(((v, net) for v, net in links[end] if v != prev), None)
+            if step is None or step[0] == start:
+                break
+            prev, end = end, step[0]
+            if len(links[end]) < 2:
+                break
+        chain, inner = [end], []
+        seen.add(end)
+        prev = None
+        while True:
+            step = next(((v, net) for v, net in links[chain[-1]] if v != prev and v not in seen), None)
+            if step is None:
+                break
+            prev = chain[-1]
+            chain.append(step[0])
+            inner.append(step[1])
+            seen.add(step[0])
+        if len(chain) == 1 and len(unit_list[chain[0]][1]) == 1:
+            continue # A lone component: nothing to collapse
+        first_pair, last_pair = unit_list[chain[0]][0], unit_list[chain[-1]][0]
+        if len(chain) == 1:
+            ends = first_pair
+        else:
+            ends = (next(n for n in first_pair if n != inner[0]), next(n for n in last_pair if n != inner[-1]))
+        supernodes.append(SuperNode([unit_list[u][1] for u in chain], ends))
+    return supernodes
+
+def expand(node: SuperNode, center: Tuple[float, float], angle: float, grid: float) -> Dict[str, Tuple[float, float, float]]:
+    # name -> (x, y, rotation). Units are spaced along `angle` (first end
+    # first) around the super-node's position; members of a parallel group
+    # are stacked across that line. Deterministic, O(members).
+    units = node.units
+    if not -90 < angle <= 90:
+        # Same cells walked from the other end; keeps symbols upright
+        units, angle = units[::-1], angle - 180 if angle > 0 else angle + 180
+    rad = math.radians(angle)
+    dx, dy = math.cos(rad), math.sin(rad)
+    placed = {}
+    count = len(units)
+    for i, unit in enumerate(units):
+        along = (i - (count - 1) / 2) * MEMBER_SPACING
+        for j, name in enumerate(unit):
+            across = (j - (len(unit) - 1) / 2) * MEMBER_SPACING
+            x = center[0] + along * dx - across * dy
+            y = center[1] + along * dy + across * dx
+            placed[name] = (round(x / grid) * grid, round(y / grid) * grid, angle)
+    return placed
@@ -0,0 +1,141 @@
+import importlib
+import os
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, Mapping, Optional, Set, Tuple, Union
+
+# Roles the analyzer and layout engines act on
+SOURCE = 'source'       # ranked first / pinned to the left (or top)
+GROUND = 'ground'       # pinned to the right (or bottom); always pin '0'
+JUNCTION = 'junction'   # implicit net node, not placed as a symbol
+BLOCK = 'block'         # subcircuit instance
+UNKNOWN = 'unknown'     # placeholder for an unregistered type (non-strict analysis)
+
+# Comma-separated modules imported before the first lookup; each registers
+# its types with register_type() at import time
+PLUGIN_ENV = 'TECD_PLUGINS'
+
+@dataclass(slots=True)
+class ComponentType:
+    name: str
+    # Pins used when a chain omits them: (target side, source side) of A -> B.
+    # Empty for types whose pins must always be named (transistors, gates).
+    default_pins: Tuple[str, ...] = ()
+    # A Symbol, a zero-argument factory, or 'module:ATTR' (imported on first use)
+    symbol: Union[str, Callable[[], "Symbol"], "Symbol", None] = None
+    role: Optional[str] = None
+    # Lexed as a TYPE keyword; subcircuit blocks are registered with False
+    keyword: bool = True
+
+_types: Dict[str, ComponentType] = {}
+# Lexer keywords; a set so classifying an identifier is one hash lookup
+KEYWORDS: Set[str] = set()
+_symbols: Dict[str, "Symbol"] = {}
+_plugins_loaded = False
+# Types visible only while one circuit is being analyzed, laid out or drawn
+# (its subcircuit blocks), looked up before the global table; see use_types
+_overlay: ContextVar[Mapping[str, ComponentType]] = ContextVar('tecd_type_overlay', default={})
+
+def register_type(ctype: ComponentType, replace: bool = False):
+    if ctype.name in _types and not replace:
+        raise ValueError(f"Component type '{ctype.name}' is already registered")
+    _types[ctype.name] = ctype
+    _symbols.pop(ctype.name, None)
+    if ctype.keyword:
+        KEYWORDS.add(ctype.name)
+    else:
+        KEYWORDS.discard(ctype.name)
+
+def unregister_type(name: str):
+    # Removes a type and its cached symbol (tests, plugin reloads)
+    _types.pop(name, None)
+    _symbols.pop(name, None)
+    KEYWORDS.discard(name)
+
+def load_plugins(modules: Optional[Iterable[str]] = None):
+    # Imports plugin modules (by default those named in $TECD_PLUGINS) once
+    global _plugins_loaded
+    if modules is None:
+        if _plugins_loaded:
+            return
+        _plugins_loaded = True
+        modules = [m.strip() for m in os.environ.get(PLUGIN_ENV, '').split(',') if m.strip()]
+    for module in modules:
+        importlib.import_module(module)
+
+@contextmanager
+def use_types(types: Mapping[str, ComponentType]) -> Iterator[None]:
+    # Makes a circuit's own types (CircuitGraph.types) resolvable on top of
+    # the global registry, and of any overlay already active, for the block
+    if not types:
+        yield
+        return
+    token = _overlay.set({**_overlay.get(), **types})
+    try:
+        yield
+    finally:
+        _overlay.reset(token)
+
+def get_type(name: str) -> Optional[ComponentType]:
+    load_plugins()
+    ctype = _overlay.get().get(name)
+    return ctype if ctype is not None else _types.get(name)
+
+def is_keyword(name: str) -> bool:
+    load_plugins()
+    return name in KEYWORDS
+
+def role(name: str) -> Optional[str]:
+    ctype = get_type(name)
+    return ctype.role if ctype else None
+
+def _resolve_symbol(ctype: ComponentType) -> "Symbol":
+    ref = ctype.symbol
+    if ref is None:
+        raise KeyError(f"No symbol registered for component type '{ctype.name}'")
+    if isinstance(ref, str):
+        module, _, attr = ref.partition(':')
+        return getattr(importlib.import_module(module), attr)
+    return ref() if callable(ref) else ref
+
+def symbol_for(name: str) -> "Symbol":
+    local = _overlay.get().get(name)
+    if local is not None:
+        # Not cached here: the overlay's factories cache their own symbols
+        return _resolve_symbol(local)
+    symbol = _symbols.get(name)
+    if symbol is not None:
+        return symbol
+    ctype = get_type(name)
+    if ctype is None:
+        raise KeyError(f"No symbol registered for component type '{name}'")
+    symbol = _symbols[name] = _resolve_symbol(ctype)
+    return symbol
+
+# name, default pins, symbol attribute in tecd.symbols, role
+_BUILTINS = (
+    ('RES', ('left', 'right'), 'RESISTOR', None),
+    ('CAP', ('top', 'bottom'), 'CAPACITOR', None),
+    ('IND', ('left', 'right'), 'INDUCTOR', None),
+    ('VDC', ('-', '+'), 'VDC', SOURCE),
+    ('GND', ('0',), 'GND', GROUND),
+    ('DIODE', ('anode', 'cathode'), 'DIODE', None),
+    ('LED', ('anode', 'cathode'), 'LED', None),
+    ('SWITCH', ('1', '2'), 'SWITCH', None),
+    ('VAC', ('+', '-'), 'VAC', SOURCE),
+    ('IDC', ('+', '-'), 'IDC', SOURCE),
+    ('NPN', (), 'NPN', None),
+    ('PNP', (), 'PNP', None),
+    ('NMOS', (), 'NMOS', None),
+    ('PMOS', (), 'PMOS', None),
+    ('AND', (), 'AND', None),
+    ('OR', (), 'OR', None),
+    ('NOT', (), 'NOT', None),
+    ('NAND', (), 'NAND', None),
+)
+
+for _name, _pins, _symbol, _role in _BUILTINS:
+    register_type(ComponentType(_name, _pins, f'tecd.symbols:{_symbol}', _role))
+# Created implicitly for undeclared names in connections; never a keyword
+register_type(ComponentType('JUNCTION', ('0',), 'tecd.symbols:JUNCTION', JUNCTION, keyword=False))
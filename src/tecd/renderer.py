@@ -1,146 +1,133 @@
-from typing import Dict, List
-import math
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Tuple
 from .semantics import CircuitGraph, Net
+from .labels import PARAM_FONT_SIZE, LabelPlacer, PlacedLabel
 from .layout import Layout, PlacedComponent
-from .symbols import get_symbol
+from .routing import Route, route_nets
+from .spatial import BBox, GridIndex, bbox_of_points
+from .registry import use_types
+
+# (x, y, width, height) of the visible region in layout coordinates
+Viewport = Tuple[float, float, float, float]
+
+INDEX_CELL_SIZE = 200
+SVG_STYLE = '<style> text { font-family: sans-serif; fill: black; } path, line, rect { stroke: black; } </style>'
+ANNOTATION_COLOR = '#b00000'
+
+@dataclass
+class Annotations:
+    # Extra text drawn on top of the diagram, e.g. a solved operating point
+    components: Dict[str, str] = field(default_factory=dict) # component name -> text
+    nets: Dict[str, str] = field(default_factory=dict)       # Net.id -> text
 
 class SVGRenderer:
-    def __init__(self, graph: CircuitGraph, layout: Layout):
+    def __init__(self, graph: CircuitGraph, layout: Layout, routes: Optional[List[Route]] = None,
+                 annotations: Optional[Annotations] = None):
         self.graph = graph
         self.layout = layout
+        self.routes = routes if routes is not None else route_nets(graph, layout)
+        self.annotations = annotations
         self.comp_map = {pc.component.name: pc for pc in layout.components}
+        self._elements: Optional[List[Tuple[BBox, str]]] = None
+        self._index: Optional[GridIndex[str]] = None
 
-    def render(self) -> str:
+    def render(self, viewport: Optional[Viewport] = None, size: Optional[Tuple[float, float]] = None) -> str:
         lines = []
-        lines.append(f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.layout.width}" height="{self.layout.height}" viewBox="0 0 {self.layout.width} {self.layout.height}">')
-        lines.append('<style> text { font-family: sans-serif; fill: black; } path, line, rect { stroke: black; } </style>')
+        if viewport:
+            vx, vy, vw, vh = viewport
+            width, height = size or (vw, vh)
+            lines.append(f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" viewBox="{vx} {vy} {vw} {vh}">')
+        else:
+            lines.append(f'<svg xmlns="http://www.w3.org/2000/svg" width="{self.layout.width}" height="{self.layout.height}" viewBox="0 0 {self.layout.width} {self.layout.height}">')
+        lines.append(SVG_STYLE)
         lines.append('<rect width="100%" height="100%" fill="white"/>') # Background
 
-        # Draw Components
+        if viewport:
+            vx, vy, vw, vh = viewport
+            visible = self.index.query((vx, vy, vx + vw, vy + vh))
+        else:
+            visible = [markup for _, markup in self.elements]
+        lines.extend(visible)
+
+        lines.append('</svg>')
+        return "\n".join(lines)
+
+    @property
+    def elements(self) -> List[Tuple[BBox, str]]:
+        # (bounding box, markup) for every drawable element, in draw order
+        if self._elements is None:
+            with use_types(self.graph.types):
+                placer = LabelPlacer(self.layout, self.routes)
+                self._elements = self._component_elements(placer) + self._wire_elements()
+                if self.annotations:
+                    self._elements += self._net_annotation_elements(placer)
+        return self._elements
+
+    @property
+    def index(self) -> GridIndex[str]:
+        if self._index is None:
+            self._index = GridIndex(cell_size=INDEX_CELL_SIZE)
+            for bbox, markup in self.elements:
+                self._index.insert(bbox, markup)
+        return self._index
+
+    def _component_elements(self, placer: LabelPlacer) -> List[Tuple[BBox, str]]:
+        elements = []
+        labels = placer.place()
+        notes = self.annotations.components if self.annotations else {}
         for pc in self.layout.components:
-            symbol = get_symbol(pc.component.type_name)
+            lines = []
             lines.append(f'<g transform="translate({pc.x}, {pc.y}) rotate({pc.rotation})">')
-            lines.append(f'  <g class="symbol">{symbol.path}</g>')
-            
-            # Draw Labels
-            # Determine Screen Offsets based on orientation
-            # Default (Horizontal 0): Name Top (0, -30), Params Bottom (0, 30)
-            # Vertical (-90/270 or 90): Name Left (-35, 0), Params Right (35, 0)
-            
-            # Normalize rotation to 0-360 or -180-180
-            rot = pc.rotation % 360
-            
-            # Define target SCREEN offsets
-            if pc.component.type_name == 'GND':
-                # GND Special Case: Name Left and slightly Up
-                name_screen_offset = (-30, -15)
-                param_screen_offset = (30, 0)
-            elif 45 <= rot <= 135 or 225 <= rot <= 315: # Vertical-ish (90 or 270/-90)
-                # Vertical
-                name_screen_offset = (-35, 0)
-                param_screen_offset = (35, 0)
-            else:
-                # Horizontal
-                name_screen_offset = (0, -30)
-                param_screen_offset = (0, 30)
-                
-            # Transform Screen Offsets to Local Offsets
-            # Local = Rotate(+Rot) * Screen
-            # Because Screen = Rotate(-Rot) * Local
-            
-            # Wait, Rotation Matrix R(theta) maps Local -> Screen
-            # So Screen = R(rot) * Local
-            # Local = R(-rot) * Screen
-            
-            rad = math.radians(-pc.rotation)
-            cos_a = math.cos(rad)
-            sin_a = math.sin(rad)
-            
-            def to_local(ox, oy):
-                return (ox * cos_a - oy * sin_a, ox * sin_a + oy * cos_a)
-                
-            lx, ly = to_local(*name_screen_offset)
-            px, py = to_local(*param_screen_offset)
-
-            # Text rotation correction: 
-            # The group is rotated by -pc.rotation (SVG CW).
-            # To keep text upright, we must rotate text by +pc.rotation (relative to group).
-            
-            rot_attr = f'transform="rotate({-pc.rotation}, {lx}, {ly})"'
-            rot_attr_p = f'transform="rotate({-pc.rotation}, {px}, {py})"'
-
-            lines.append(f'  <text x="{lx}" y="{ly}" text-anchor="middle" font-size="12" dominant-baseline="middle" {rot_attr}>{pc.component.name}</text>')
-            
-            # Parameters
-            param_txt = " ".join([v for k,v in pc.component.parameters.items()])
-            lines.append(f'  <text x="{px}" y="{py}" text-anchor="middle" font-size="10" fill="gray" dominant-baseline="middle" {rot_attr_p}>{param_txt}</text>')
-            
+            lines.append(f'  <g class="symbol">{pc.symbol.path}</g>')
             lines.append('</g>')
 
-        # Draw Wires (Nets)
+            # Labels are placed in screen space so they stay upright and clear of
+            # other symbols, wires and labels
+            bboxes = [pc.bbox()]
+            name_label, *param_labels = labels[pc.component.name]
+            lines.append(f'<text x="{name_label.x}" y="{name_label.y}" text-anchor="middle" font-size="{name_label.font_size}" dominant-baseline="middle">{name_label.text}</text>')
+            bboxes.append(name_label.bbox)
+            for label in param_labels:
+                lines.append(f'<text x="{label.x}" y="{label.y}" text-anchor="middle" font-size="{label.font_size}" fill="gray" dominant-baseline="middle">{label.text}</text>')
+                bboxes.append(label.bbox)
+            if pc.component.name in notes:
+                # Placed after every name and parameter so it never displaces them
+                _, offset = placer.preferred_offsets(pc)
+                label = placer.place_label(pc, notes[pc.component.name], PARAM_FONT_SIZE, offset)
+                lines.append(_annotation_text(label))
+                bboxes.append(label.bbox)
+
+            bbox = (min(b[0] for b in bboxes), min(b[1] for b in bboxes),
+                    max(b[2] for b in bboxes), max(b[3] for b in bboxes))
+            elements.append((bbox, "\n".join(lines)))
+        return elements
+
+    def _wire_elements(self) -> List[Tuple[BBox, str]]:
+        # One path per net; its subpaths follow the net's spanning tree
+        elements = []
+        for route in self.routes:
+            points = [p for line in route.polylines for p in line]
+            elements.append((bbox_of_points(points), f'<path d="{route.path_data()}" stroke="blue" stroke-width="1" fill="none"/>'))
+        return elements
+
+    def _net_annotation_elements(self, placer: LabelPlacer) -> List[Tuple[BBox, str]]:
+        # Each net's text sits next to its first placed pin
+        elements = []
         for net in self.graph.nets:
-            points = []
-            for ref in net.points:
-                if ref.component.name not in self.comp_map: continue
-                
-                pc = self.comp_map[ref.component.name]
-                symbol = get_symbol(pc.component.type_name)
-                pin_offset = symbol.pins.get(ref.pin_name, (0,0))
-                
-                # Apply rotation to pin_offset
-                if pc.rotation:
-                    rad = math.radians(pc.rotation)
-                    px, py = pin_offset
-                    rot_x = px * math.cos(rad) - py * math.sin(rad)
-                    rot_y = px * math.sin(rad) + py * math.cos(rad)
-                    pin_offset = (rot_x, rot_y)
-                
-                abs_x = pc.x + pin_offset[0]
-                abs_y = pc.y + pin_offset[1]
-                points.append((abs_x, abs_y))
-            
-            if len(points) >= 2:
-                for i in range(len(points) - 1):
-                    p1 = points[i]
-                    p2 = points[i+1]
-                    x1, y1 = p1
-                    x2, y2 = p2
-                    
-                    style = getattr(self.layout, 'routing_style', 'straight')
-                    
-                    if style == 'straight' or (abs(x1-x2) < 1 and abs(y1-y2) < 1):
-                         lines.append(f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="blue" stroke-width="1" />')
-                    else:
-                        d = ""
-                    if style == 'HV': # Horizontal Layout (Horizontal -> Vertical -> Horizontal)
-                        # Check for GND connection (Special Case)
-                        is_p1_gnd = self.comp_map.get(net.points[i].component.name) and self.comp_map[net.points[i].component.name].component.type_name == 'GND'
-                        is_p2_gnd = self.comp_map.get(net.points[i+1].component.name) and self.comp_map[net.points[i+1].component.name].component.type_name == 'GND'
-                        
-                        if is_p2_gnd: 
-                            # Terminating at GND: Horizontal then Vertical (Elbow to bottom)
-                            # M x1 y1 L x2 y1 L x2 y2
-                            d = f"M {x1} {y1} L {x2} {y1} L {x2} {y2}"
-                        elif is_p1_gnd:
-                            # Starting from GND: Vertical then Horizontal (Elbow from bottom)
-                            # M x1 y1 L x1 y2 L x2 y2
-                            d = f"M {x1} {y1} L {x1} {y2} L {x2} {y2}"
-                        else:
-                            # Standard Z-routing
-                            mid_x = (x1 + x2) / 2
-                            d = f"M {x1} {y1} L {mid_x} {y1} L {mid_x} {y2} L {x2} {y2}"
-                    elif style == 'VH': # Vertical Layout (Vertical -> Horizontal -> Vertical)
-                        # Use Z-routing
-                        mid_y = (y1 + y2) / 2
-                        d = f"M {x1} {y1} L {x1} {mid_y} L {x2} {mid_y} L {x2} {y2}"
-                        
-                    if d:
-                        lines.append(f'<path d="{d}" stroke="blue" stroke-width="1" fill="none"/>')
-                    else: # Fallback
-                        lines.append(f'<line x1="{x1}" y1="{y1}" x2="{x2}" y2="{y2}" stroke="blue" stroke-width="1" />')
+            text = self.annotations.nets.get(net.id)
+            if not text:
+                continue
+            anchor = next((self.comp_map[p.component.name].pin_position(p.pin_name)
+                           for p in net.points if p.component.name in self.comp_map), None)
+            if anchor is None:
+                continue
+            label = placer.place_point_label(anchor[0], anchor[1], text, PARAM_FONT_SIZE)
+            elements.append((label.bbox, _annotation_text(label)))
+        return elements
 
-        lines.append('</svg>')
-        return "\n".join(lines)
+def _annotation_text(label: PlacedLabel) -> str:
+    return f'<text class="annotation" x="{label.x}" y="{label.y}" text-anchor="middle" font-size="{label.font_size}" style="fill: {ANNOTATION_COLOR}" dominant-baseline="middle">{label.text}</text>'
 
-def render_svg(graph: CircuitGraph, layout: Layout) -> str:
-    return SVGRenderer(graph, layout).render()
+def render_svg(graph: CircuitGraph, layout: Layout, viewport: Optional[Viewport] = None,
+               routes: Optional[List[Route]] = None, annotations: Optional[Annotations] = None) -> str:
+    return SVGRenderer(graph, layout, routes, annotations).render(viewport)
@@ -0,0 +1,249 @@
+import heapq
+import math
+from collections import OrderedDict, deque
+from typing import Dict, List, Optional, Set, Tuple
+from .semantics import CircuitGraph
+from .layout import Layout, PlacedComponent
+from .routing import Point, Route, manhattan_mst
+
+Cell = Tuple[int, int]
+
+GRID_PITCH = 10       # px per routing cell
+BEND_COST = 4         # extra cost for changing direction
+CROSS_COST = 12       # entering a cell used by another net's wire
+OVERLAP_COST = 60     # running along another net's wire in the same direction
+HEURISTIC_WEIGHT = 2.0
+SEARCH_MARGIN = 15    # cells of slack around the terminals' bounding box
+EXPANSION_BUDGET = 30 # expansions allowed per cell of terminal distance
+ROUTE_CACHE_SIZE = 32
+
+# (dx, dy) per direction; horizontal directions are even
+DIRECTIONS = ((1, 0), (0, 1), (-1, 0), (0, -1))
+
+# Routing results keyed by layout geometry, so re-rendering an unchanged
+# layout (tiles, watch mode, multiple outputs) skips the search entirely.
+_route_cache: "OrderedDict[tuple, List[Route]]" = OrderedDict()
+
+class GridRouter:
+    def __init__(self, graph: CircuitGraph, layout: Layout, pitch: float = GRID_PITCH):
+        self.graph = graph
+        self.layout = layout
+        self.pitch = pitch
+        self.comp_map: Dict[str, PlacedComponent] = {pc.component.name: pc for pc in layout.components}
+        # Sparse occupancy: only blocked cells and cells carrying wires are stored
+        self.blocked: Set[Cell] = set()
+        self.wires: Dict[Cell, Dict[int, int]] = {}  # cell -> net index -> axis bits (1=H, 2=V)
+        self.pin_cells: Dict[Cell, Set[int]] = {}    # terminal cell -> nets ending there
+
+    def to_cell(self, p: Point) -> Cell:
+        return (round(p[0] / self.pitch), round(p[1] / self.pitch))
+
+    def to_point(self, c: Cell) -> Point:
+        return (c[0] * self.pitch, c[1] * self.pitch)
+
+    def _rasterize_obstacles(self):
+        for pc in self.layout.components:
+            x0, y0, x1, y1 = pc.bbox()
+            for cx in range(math.ceil(x0 / self.pitch), math.floor(x1 / self.pitch) + 1):
+                for cy in range(math.ceil(y0 / self.pitch), math.floor(y1 / self.pitch) + 1):
+                    self.blocked.add((cx, cy))
+
+    def _escape_cell(self, pc: PlacedComponent, pin: Point) -> Cell:
+        # First cell outside the symbol's box, walking from the pin away from
+        # the symbol centre along the dominant axis. The pin lead is drawn
+        # as a stub from the pin to this cell.
+        x0, y0, x1, y1 = pc.bbox()
+        dx, dy = pin[0] - pc.x, pin[1] - pc.y
+        if abs(dx) >= abs(dy):
+            step = (1 if dx >= 0 else -1, 0)
+        else:
+            step = (0, 1 if dy >= 0 else -1)
+        cx, cy = self.to_cell(pin)
+        while x0 <= cx * self.pitch <= x1 and y0 <= cy * self.pitch <= y1:
+            cx, cy = cx + step[0], cy + step[1]
+        return (cx, cy)
+
+    def _signature(self) -> tuple:
+        comps = tuple((pc.component.name, pc.component.type_name, pc.x, pc.y, pc.rotation) for pc in self.layout.components)
+        nets = tuple(tuple((p.component.name, p.pin_name) for p in net.points) for net in self.graph.nets)
+        return (self.pitch, comps, nets)
+
+    def route(self) -> List[Route]:
+        key = self._signature()
+        if key in _route_cache:
+            _route_cache.move_to_end(key)
+            return _route_cache[key]
+
+        self._rasterize_obstacles()
+        terminals: List[List[Tuple[Point, Cell]]] = []
+        for net in self.graph.nets:
+            terms = []
+            for p in net.points:
+                pc = self.comp_map.get(p.component.name)
+                if pc:
+                    pin = pc.pin_position(p.pin_name)
+                    terms.append((pin, self._escape_cell(pc, pin)))
+            terminals.append(terms)
+        # Escape cells may land in a neighbouring symbol's box; keep them
+        # reachable, but only for the nets that terminate there
+        for net_idx, net_terms in enumerate(terminals):
+            for _, cell in net_terms:
+                self.blocked.discard(cell)
+                self.pin_cells.setdefault(cell, set()).add(net_idx)
+
+        # Short nets first: they have the fewest alternatives
+        order = sorted(range(len(self.graph.nets)), key=lambda i: self._span(terminals[i]))
+        routes: Dict[int, Route] = {}
+        for net_idx in order:
+            if len(terminals[net_idx]) >= 2:
+                routes[net_idx] = self._route_net(net_idx, terminals[net_idx])
+
+        result = [routes[i] for i in sorted(routes)]
+        _route_cache[key] = result
+        if len(_route_cache) > ROUTE_CACHE_SIZE:
+            _route_cache.popitem(last=False)
+        return result
+
+    @staticmethod
+    def _span(terms: List[Tuple[Point, Cell]]) -> int:
+        if not terms:
+            return 0
+        xs = [c[0] for _, c in terms]
+        ys = [c[1] for _, c in terms]
+        return (max(xs) - min(xs)) + (max(ys) - min(ys))
+
+    def _route_net(self, net_idx: int, terms: List[Tuple[Point, Cell]]) -> Route:
+        route = Route(self.graph.nets[net_idx].id)
+
+        # Attach terminals in BFS order over the net's MST so each new
+        # terminal joins the tree close to where it already is
+        edges = manhattan_mst([pin for pin, _ in terms])
+        adj: Dict[int, List[int]] = {i: [] for i in range(len(terms))}
+        for i, j in edges:
+            adj[i].append(j)
+            adj[j].append(i)
+        bfs, seen = [], {0}
+        tree_parent: Dict[int, int] = {}
+        queue = deque([0])
+        while queue:
+            i = queue.popleft()
+            bfs.append(i)
+            for j in sorted(adj[i]):
+                if j not in seen:
+                    seen.add(j)
+                    tree_parent[j] = i
+                    queue.append(j)
+
+        first_pin, first_cell = terms[bfs[0]]
+        tree: Set[Cell] = {first_cell}
+        if first_pin != self.to_point(first_cell):
+            route.polylines.append([first_pin, self.to_point(first_cell)])
+
+        for i in bfs[1:]:
+            pin, cell = terms[i]
+            path = self._search(net_idx, cell, tree, terms[tree_parent[i]][1])
+            if path is None:
+                # No legal path within the window or budget: fall back to an L-route
+                target = terms[tree_parent[i]][1]
+                path = [cell, (target[0], cell[1]), target]
+            self._commit(net_idx, path)
+            tree.update(self._cells_on(path))
+            polyline = [self.to_point(c) for c in self._corners(path)]
+            if pin != polyline[0]:
+                polyline.insert(0, pin)
+            route.polylines.append(polyline)
+        return route
+
+    def _search(self, net_idx: int, start: Cell, targets: Set[Cell], goal: Cell) -> Optional[List[Cell]]:
+        # A* over (cell, direction) states. The search stops at any cell already
+        # in the net's tree, so existing segments are reused, but is steered
+        # towards the terminal's MST neighbour `goal` (itself in the tree).
+        if start in targets:
+            return [start]
+        wx0 = min(goal[0], start[0]) - SEARCH_MARGIN; wx1 = max(goal[0], start[0]) + SEARCH_MARGIN
+        wy0 = min(goal[1], start[1]) - SEARCH_MARGIN; wy1 = max(goal[1], start[1]) + SEARCH_MARGIN
+
+        gx, gy = goal
+        def h(c: Cell) -> float:
+            # Inflated heuristic (weighted A*): slightly longer routes in
+            # exchange for far fewer expansions around penalised cells
+            return HEURISTIC_WEIGHT * (abs(gx - c[0]) + abs(gy - c[1]))
+
+        start_state = (start, -1)
+        best: Dict[Tuple[Cell, int], float] = {start_state: 0}
+        parent: Dict[Tuple[Cell, int], Tuple[Cell, int]] = {}
+        heap = [(h(start), 0, start, -1)]
+        budget = EXPANSION_BUDGET * (abs(gx - start[0]) + abs(gy - start[1]) + SEARCH_MARGIN)
+        while heap and budget > 0:
+            budget -= 1
+            _, g, cell, d = heapq.heappop(heap)
+            if g > best.get((cell, d), math.inf):
+                continue
+            if cell in targets:
+                path = [cell]
+                state = (cell, d)
+                while state in parent:
+                    state = parent[state]
+                    path.append(state[0])
+                path.reverse()
+                return path
+            for nd, (dx, dy) in enumerate(DIRECTIONS):
+                if d >= 0 and nd == (d + 2) % 4:
+                    continue
+                nxt = (cell[0] + dx, cell[1] + dy)
+                if not (wx0 <= nxt[0] <= wx1 and wy0 <= nxt[1] <= wy1):
+                    continue
+                if nxt in self.blocked and nxt not in targets:
+                    continue
+                owners = self.pin_cells.get(nxt)
+                if owners and net_idx not in owners:
+                    continue
+                cost = g + 1
+                if d >= 0 and nd != d:
+                    cost += BEND_COST
+                occupants = self.wires.get(nxt)
+                if occupants:
+                    axis = 1 if nd % 2 == 0 else 2
+                    for other, axes in occupants.items():
+                        if other != net_idx:
+                            cost += OVERLAP_COST if axes & axis else CROSS_COST
+                if cost < best.get((nxt, nd), math.inf):
+                    best[(nxt, nd)] = cost
+                    parent[(nxt, nd)] = (cell, d)
+                    heapq.heappush(heap, (cost + h(nxt), cost, nxt, nd))
+        return None
+
+    @staticmethod
+    def _cells_on(path: List[Cell]) -> List[Cell]:
+        # Expand corner lists (fallback L-routes) into every cell they pass
+        cells = [path[0]]
+        for a, b in zip(path, path[1:]):
+            sx = (b[0] > a[0]) - (b[0] < a[0])
+            sy = (b[1] > a[1]) - (b[1] < a[1])
+            c = a
+            while c != b:
+                c = (c[0] + sx, c[1] + sy)
+                cells.append(c)
+        return cells
+
+    def _commit(self, net_idx: int, path: List[Cell]):
+        cells = self._cells_on(path)
+        for a, b in zip(cells, cells[1:]):
+            axis = 1 if a[1] == b[1] else 2
+            for c in (a, b):
+                occupants = self.wires.setdefault(c, {})
+                occupants[net_idx] = occupants.get(net_idx, 0) | axis
+
+    @staticmethod
+    def _corners(path: List[Cell]) -> List[Cell]:
+        if len(path) <= 2:
+            return list(path)
+        corners = [path[0]]
+        for prev, cur, nxt in zip(path, path[1:], path[2:]):
+            if (cur[0] - prev[0], cur[1] - prev[1]) != (nxt[0] - cur[0], nxt[1] - cur[1]):
+                corners.append(cur)
+        corners.append(path[-1])
+        return corners
+
+def route_grid(graph: CircuitGraph, layout: Layout, pitch: float = GRID_PITCH) -> List[Route]:
+    return GridRouter(graph, layout, pitch).route()
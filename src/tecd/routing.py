@@ -0,0 +1,144 @@
+import math
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Dict, Iterator, List, Tuple
+from .semantics import CircuitGraph
+from .layout import Layout, PlacedComponent
+from .registry import GROUND, role, use_types
+from .metrics import count_crossings
+
+Point = Tuple[float, float]
+Segment = Tuple[Point, Point]
+
+@dataclass
+class Route:
+    net_id: str
+    polylines: List[List[Point]] = field(default_factory=list)
+
+    def segments(self) -> Iterator[Segment]:
+        for line in self.polylines:
+            for i in range(len(line) - 1):
+                yield (line[i], line[i+1])
+
+    @property
+    def length(self) -> float:
+        return sum(math.hypot(b[0] - a[0], b[1] - a[1]) for a, b in self.segments())
+
+    def path_data(self) -> str:
+        # All polylines of the net as subpaths of a single SVG path
+        parts = []
+        for line in self.polylines:
+            parts.append(f"M {line[0][0]} {line[0][1]}")
+            parts.extend(f"L {x} {y}" for x, y in line[1:])
+        return " ".join(parts)
+
+def manhattan_mst(points: List[Point]) -> List[Tuple[int, int]]:
+    # Rectilinear minimum spanning tree in O(k log k).
+    # For every point only the nearest neighbour in each of the 8 octants can be
+    # an MST edge. Four sweeps (one per octant pair, by reflecting the
+    # coordinates) collect those candidates, then Kruskal picks the tree.
+    n = len(points)
+    if n < 2:
+        return []
+    pts = [[x, y] for x, y in points]
+    order = list(range(n))
+    candidates: List[Tuple[float, int, int]] = []
+
+    for k in range(4):
+        order.sort(key=lambda i: pts[i][0] + pts[i][1])
+        # Active points keyed by -y, kept sorted
+        keys: List[float] = []
+        vals: List[int] = []
+        for i in order:
+            xi, yi = pts[i]
+            pos = bisect_left(keys, -yi)
+            end = pos
+            while end < len(keys):
+                j = vals[end]
+                dx, dy = xi - pts[j][0], yi - pts[j][1]
+                if dy > dx:
+                    break
+                candidates.append((dx + dy, i, j))
+                end += 1
+            del keys[pos:end]
+            del vals[pos:end]
+            if pos < len(keys) and keys[pos] == -yi:
+                vals[pos] = i
+            else:
+                keys.insert(pos, -yi)
+                vals.insert(pos, i)
+        for p in pts:
+            if k & 1:
+                p[0] = -p[0]
+            else:
+                p[0], p[1] = p[1], p[0]
+
+    parent = list(range(n))
+    def find(a: int) -> int:
+        while parent[a] != a:
+            parent[a] = parent[parent[a]]
+            a = parent[a]
+        return a
+
+    edges = []
+    for _, i, j in sorted(candidates):
+        ri, rj = find(i), find(j)
+        if ri != rj:
+            parent[ri] = rj
+            edges.append((min(i, j), max(i, j)))
+            if len(edges) == n - 1:
+                break
+    return edges
+
+def _connect(p1: Point, p2: Point, style: str, p1_gnd: bool, p2_gnd: bool) -> List[Point]:
+    x1, y1 = p1
+    x2, y2 = p2
+    if style == 'straight' or (abs(x1-x2) < 1 and abs(y1-y2) < 1):
+        return [p1, p2]
+    if style == 'HV': # Horizontal Layout (Horizontal -> Vertical -> Horizontal)
+        if p2_gnd:
+            # Terminating at GND: Horizontal then Vertical (Elbow to bottom)
+            return [p1, (x2, y1), p2]
+        if p1_gnd:
+            # Starting from GND: Vertical then Horizontal (Elbow from bottom)
+            return [p1, (x1, y2), p2]
+        # Standard Z-routing
+        mid_x = (x1 + x2) / 2
+        return [p1, (mid_x, y1), (mid_x, y2), p2]
+    if style == 'VH': # Vertical Layout (Vertical -> Horizontal -> Vertical)
+        mid_y = (y1 + y2) / 2
+        return [p1, (x1, mid_y), (x2, mid_y), p2]
+    return [p1, p2]
+
+def route_nets(graph: CircuitGraph, layout: Layout) -> List[Route]:
+    # Routing stage between compute_layout and render_svg.
+    # `routing = grid` selects the obstacle-avoiding grid router; otherwise the
+    # pins of each net are connected along its Manhattan MST and every tree
+    # edge is shaped with the layout's routing style.
+    if graph.options.get('routing', '').strip().lower() == 'grid':
+        from .router import route_grid
+        with use_types(graph.types):
+            return route_grid(graph, layout)
+
+    comp_map: Dict[str, PlacedComponent] = {pc.component.name: pc for pc in layout.components}
+    style = getattr(layout, 'routing_style', 'straight')
+    routes = []
+    for net in graph.nets:
+        placed = [(comp_map[p.component.name], p.pin_name) for p in net.points if p.component.name in comp_map]
+        if len(placed) < 2:
+            continue
+        points = [pc.pin_position(pin) for pc, pin in placed]
+        is_gnd = [role(pc.component.type_name) == GROUND for pc, _ in placed]
+
+        route = Route(net.id)
+        for i, j in manhattan_mst(points):
+            route.polylines.append(_connect(points[i], points[j], style, is_gnd[i], is_gnd[j]))
+        routes.append(route)
+    return routes
+
+def wire_stats(routes: List[Route]) -> Dict[str, float]:
+    return {
+        'nets': len(routes),
+        'length': sum(r.length for r in routes),
+        'crossings': count_crossings(routes),
+    }
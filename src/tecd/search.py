@@ -0,0 +1,84 @@
+import os
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from .layout import Layout, PlacedComponent, compute_layout
+from .metrics import measure
+from .registry import use_types
+from .routing import route_nets
+from .semantics import CircuitGraph
+
+RANK_MODES = ('horizontal', 'vertical')
+
+@dataclass(frozen=True)
+class Candidate:
+    # One start of a layout search: a force layout from a seed, or a rank
+    # layout (seed None)
+    mode: str
+    seed: Optional[int] = None
+
+    def __str__(self) -> str:
+        return self.mode if self.seed is None else f"{self.mode} seed {self.seed}"
+
+@dataclass(frozen=True)
+class Score:
+    overlaps: int
+    crossings: int
+    length: float
+
+    def key(self) -> Tuple[int, int, float]:
+        # Overlapping symbols are unreadable, crossings are confusing, long
+        # wires are merely untidy
+        return (self.overlaps, self.crossings, round(self.length, 3))
+
+def candidates(restarts: int, seed: int = 0, include_rank: bool = False) -> List[Candidate]:
+    # Seeds are seed, seed + 1, ...: rerunning with the winner's seed and
+    # one restart reproduces it
+    found = [Candidate('automatic', seed + i) for i in range(restarts)]
+    if include_rank:
+        found += [Candidate(mode) for mode in RANK_MODES]
+    return found
+
+def score_layout(graph: CircuitGraph, layout: Layout) -> Score:
+    metrics = measure(layout, route_nets(graph, layout))
+    return Score(metrics.overlaps, metrics.crossings, metrics.total_length)
+
+def _lay_out(graph: CircuitGraph, candidate: Candidate) -> Layout:
+    if candidate.seed is None:
+        graph.options['layout'] = candidate.mode
+        return compute_layout(graph)
+    graph.options['layout'] = 'automatic'
+    return compute_layout(graph, seed=candidate.seed)
+
+def _run_candidate(job: Tuple[str, Optional[str], Optional[bool], Dict[str, str], Candidate]):
+    # Runs in a worker: compile, lay out from one start and score it. Only
+    # the placements travel back; the parent rebuilds the Layout.
+    source, path, flatten, options, candidate = job
+    from . import compile
+    graph = compile(source, flatten, path)
+    graph.options.update(options)
+    layout = _lay_out(graph, candidate)
+    placements = [(pc.component.name, pc.x, pc.y, pc.rotation) for pc in layout.components]
+    return score_layout(graph, layout), placements, layout.width, layout.height, layout.routing_style
+
+def search_layout(graph: CircuitGraph, source: str, path: Optional[str], flatten: Optional[bool],
+                  restarts: int, seed: int = 0, include_rank: bool = False,
+                  jobs: Optional[int] = None) -> Tuple[Layout, Candidate, Score]:
+    # Lay the circuit out from several starts in a process pool and keep the
+    # best-scoring result. Ties go to the earlier candidate, so the choice
+    # does not depend on worker scheduling.
+    starts = candidates(restarts, seed, include_rank)
+    work = [(source, path, flatten, dict(graph.options), candidate) for candidate in starts]
+    if jobs == 1 or len(work) <= 1:
+        results = [_run_candidate(job) for job in work]
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        with ProcessPoolExecutor(max_workers=min(jobs or os.cpu_count() or 1, len(work))) as pool:
+            results = list(pool.map(_run_candidate, work))
+
+    best = min(range(len(results)), key=lambda i: (results[i][0].key(), i))
+    score, placements, width, height, routing_style = results[best]
+    with use_types(graph.types):
+        placed = [PlacedComponent(component=graph.components[name], x=x, y=y,
+                                  symbol_ref=graph.components[name].type_name, rotation=rotation)
+                  for name, x, y, rotation in placements]
+    return Layout(placed, width, height, routing_style=routing_style), starts[best], score
@@ -1,13 +1,17 @@
-from typing import Dict, List, Optional, Set
+import sys
+from functools import partial
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from dataclasses import dataclass, field
-from .ast_nodes import Circuit, Component, Connection, PinReference
+from .ast_nodes import Circuit, Component, ComponentArray, Connection, PinReference
+from .connectivity import Connectivity, build_connectivity
+from .registry import BLOCK, GROUND, JUNCTION, UNKNOWN, ComponentType, get_type, use_types
 
-@dataclass
+@dataclass(slots=True)
 class Net:
     id: str
     points: List['ResolvedPin'] = field(default_factory=list)
 
-@dataclass
+@dataclass(slots=True)
 class ResolvedPin:
     component: Component
     pin_name: str
@@ -17,40 +21,139 @@ class CircuitGraph:
     components: Dict[str, Component]
     nets: List[Net]
     options: Dict[str, str]
-
-# Default Pin Definitions
-DEFAULT_PINS = {
-    'RES': ('left', 'right'),
-    'CAP': ('top', 'bottom'),
-    'IND': ('left', 'right'),
-    'VDC': ('-', '+'),
-    'GND': ('0',),
-    'DIODE': ('anode', 'cathode'),
-    'LED': ('anode', 'cathode'),
-    'SWITCH': ('1', '2'),
-    'VAC': ('+', '-'),
-    'IDC': ('+', '-')
-}
+    # Integer/CSR view of the same graph for array-based algorithms
+    connectivity: Optional[Connectivity] = None
+    # Types defined by the circuit itself (subcircuit blocks), resolved on
+    # top of the global registry while this graph is in use; see use_types
+    types: Dict[str, ComponentType] = field(default_factory=dict)
 
 class SemanticError(Exception):
     pass
 
+# Pins of the placeholder that stands in for an unknown type, so chains
+# through it still resolve and the rest of the circuit can be checked
+PLACEHOLDER_PINS = ('1', '2')
+
 class SemanticAnalyzer:
-    def __init__(self, ast: Circuit):
+    def __init__(self, ast: Circuit, flatten: Optional[bool] = None, strict: bool = True):
         self.ast = ast
+        # Non-strict analysis (tecd check) gives unknown types a placeholder
+        # and leaves reporting them to the rule check
+        self.strict = strict
+        # Flattened instances contribute their body's components (named
+        # X1/R1) instead of a single block
+        self.flatten = flatten if flatten is not None else ast.options.get('flatten') == 'true'
         self.components: Dict[str, Component] = {}
         self.nets: List[Net] = []
+        self.arrays: Dict[str, ComponentArray] = {}
+        self._flattened: Dict[str, Tuple[Component, "CompiledSubcircuit"]] = {} # instance name -> (instance, body)
+        # Block types of the subcircuits this circuit instantiates; never
+        # registered globally, so they cannot leak into the next compile
+        self.types: Dict[str, ComponentType] = {}
         self._next_net_id = 1
 
     def analyze(self) -> CircuitGraph:
         self._collect_components()
-        self._resolve_connections()
-        return CircuitGraph(self.components, self.nets, self.ast.options)
+        with use_types(self.types):
+            self._resolve_connections()
+        return CircuitGraph(self.components, self.nets, self.ast.options,
+                            connectivity=build_connectivity(self.components, self.nets), types=self.types)
+
+    def _expand_components(self) -> Iterator[Component]:
+        # Arrays stay a single AST node; instances are only created here,
+        # one at a time, as the graph is built
+        for decl in self.ast.components:
+            if not isinstance(decl, ComponentArray):
+                yield decl
+                continue
+            if decl.name in self.arrays:
+                raise SemanticError(f"Duplicate array name '{decl.name}' defined at line {decl.location.line}")
+            self.arrays[decl.name] = decl
+            for i in range(decl.start, decl.stop + 1):
+                # Parameters are read-only after parsing, so instances share the dict
+                yield Component(location=decl.location, type_name=decl.type_name,
+                                name=sys.intern(f"{decl.name}[{i}]"), parameters=decl.parameters)
+
+    def _expand_connections(self) -> Iterator[Tuple[str, Optional[str], str, Optional[str]]]:
+        # (source name, source pin, target name, target pin) per connection instance
+        for conn in self.ast.connections:
+            source, target = conn.source, conn.target
+            if source.index is None and target.index is None:
+                yield source.component_name, source.pin_name, target.component_name, target.pin_name
+                continue
+            for i in self._index_domain(conn):
+                yield (self._instance_name(source, i), source.pin_name,
+                       self._instance_name(target, i), target.pin_name)
+
+    def _index_domain(self, conn: Connection) -> range:
+        # R[0..7] -> C[8..15] pairs the ranges element by element (i counts
+        # from 0); D[i] -> R[i+1] takes every i for which all subscripted
+        # arrays have an element
+        refs = [ref for ref in (conn.source, conn.target) if ref.index is not None]
+        line = refs[0].index.location.line if refs[0].index.location else '?'
+        ranges = [ref.index for ref in refs if ref.index.stop is not None]
+        if ranges:
+            if len(ranges) != len(refs):
+                raise SemanticError(f"Cannot mix a range with an index variable at line {line}")
+            lengths = {r.stop - r.offset + 1 for r in ranges}
+            if len(lengths) > 1:
+                raise SemanticError(f"Ranges of different lengths connected at line {line}")
+            return range(lengths.pop())
+
+        if len({ref.index.var for ref in refs}) > 1:
+            raise SemanticError(f"Connection uses more than one index variable at line {line}")
+        lo, hi = None, None
+        for ref in refs:
+            array = self.arrays.get(ref.component_name)
+            if array is None:
+                continue # Implicit junctions (N[i]) follow whatever arrays they connect
+            a, b = array.start - ref.index.offset, array.stop - ref.index.offset
+            lo = a if lo is None else max(lo, a)
+            hi = b if hi is None else min(hi, b)
+        if lo is None:
+            raise SemanticError(f"Index variable '{refs[0].index.var}' at line {line} does not subscript any array")
+        if hi < lo:
+            raise SemanticError(f"Arrays connected at line {line} have no index '{refs[0].index.var}' in common")
+        return range(lo, hi + 1)
+
+    @staticmethod
+    def _instance_name(ref: PinReference, i: int) -> str:
+        if ref.index is None:
+            return ref.component_name
+        return sys.intern(f"{ref.component_name}[{ref.index.offset + i}]")
 
     def _collect_components(self):
-        for comp in self.ast.components:
-            if comp.name in self.components:
+        for comp in self._expand_components():
+            if comp.name in self.components or comp.name in self._flattened:
                  raise SemanticError(f"Duplicate component name '{comp.name}' defined at line {comp.location.line}")
+            definition = self.ast.subcircuits.get(comp.type_name)
+            if definition is not None:
+                from .subcircuit import compile_subcircuit
+                compiled = compile_subcircuit(definition, flatten=self.flatten)
+                if self.flatten:
+                    self._flattened[comp.name] = (comp, compiled)
+                    self.types.update(compiled.graph.types)
+                    for inner in compiled.graph.components.values():
+                        if inner.name != 'GND': # Ground is global
+                            name = sys.intern(f"{comp.name}/{inner.name}")
+                            self.components[name] = Component(location=inner.location, type_name=inner.type_name,
+                                                              name=name, parameters=inner.parameters)
+                    continue
+                # Blocks are drawn through the type registry like any other
+                # component, but only from this circuit's own overlay
+                existing = get_type(definition.name)
+                if existing is not None and existing.role != BLOCK:
+                    raise SemanticError(f"Subcircuit '{definition.name}' shadows the built-in type '{existing.name}'")
+                if definition.name not in self.types:
+                    self.types[definition.name] = ComponentType(definition.name, tuple(definition.ports), compiled.symbol,
+                                                                BLOCK, keyword=False)
+            if comp.type_name not in self.types and get_type(comp.type_name) is None:
+                if self.strict:
+                    raise SemanticError(f"Unknown component type '{comp.type_name}' for '{comp.name}' at line {comp.location.line}")
+                from .symbols import block_symbol
+                self.types[comp.type_name] = ComponentType(comp.type_name, PLACEHOLDER_PINS,
+                                                           partial(block_symbol, comp.type_name, PLACEHOLDER_PINS),
+                                                           UNKNOWN, keyword=False)
             self.components[comp.name] = comp
             
         # Ensure GND exists if used implicitly (though it is reserved)
@@ -63,59 +166,87 @@ class SemanticAnalyzer:
     def _resolve_connections(self):
         # We need to flatten chains: A -> B -> C becomes (A, B) and (B, C)
         # And resolve default pins.
-        
-        # This is a simplified "netlist" approach where each connection creates a 2-point net
-        # OR we merge connected nets. We need explicit nodes/nets.
-        
-        # Let's map (Component, Pin) to a Net object.
-        pin_map: Dict[str, Dict[str, Net]] = {} # comp_name -> pin_name -> Net
 
-        def get_or_create_net(comp_name: str, pin_name: str) -> Net:
-            if comp_name not in pin_map:
-                pin_map[comp_name] = {}
-            
-            if pin_name in pin_map[comp_name]:
-                return pin_map[comp_name][pin_name]
-            
-            new_net = Net(id=f"N{self._next_net_id}")
-            self._next_net_id += 1
-            pin_map[comp_name][pin_name] = new_net
-            self.nets.append(new_net)
-            return new_net
-            
-        def merge_nets(net1: Net, net2: Net):
-            if net1 is net2: return
-            
-            # Move all points from net2 to net1
-            # Update pin_map for all points in net2
-            for point in net2.points:
-                pin_map[point.component.name][point.pin_name] = net1
-                net1.points.append(point)
-            
-            if net2 in self.nets:
-                self.nets.remove(net2)
+        # Every (Component, Pin) gets a net slot when first seen. Connections
+        # merge slots with a union-find; each root keeps its points as a linked
+        # list so a merge is O(1) and the final order is net1.points + net2.points.
+        pin_map: Dict[Tuple[str, str], int] = {} # (comp_name, pin_name) -> net slot
+        parent: List[int] = []
+        points: List[ResolvedPin] = []
+        next_point: List[int] = []
+        head: List[int] = []
+        tail: List[int] = []
 
-        for conn in self.ast.connections:
+        def find(slot: int) -> int:
+            while parent[slot] != slot:
+                parent[slot] = parent[parent[slot]]
+                slot = parent[slot]
+            return slot
+
+        def get_or_create_net(comp: Component, pin_name: str) -> int:
+            key = (comp.name, pin_name)
+            slot = pin_map.get(key)
+            if slot is not None:
+                return find(slot)
+
+            slot = len(parent)
+            parent.append(slot)
+            head.append(len(points))
+            tail.append(len(points))
+            points.append(ResolvedPin(comp, pin_name))
+            next_point.append(-1)
+            pin_map[key] = slot
+            return slot
+
+        def merge_nets(net1: int, net2: int):
+            if net1 == net2: return
+            # net1 survives; net2's points follow net1's
+            parent[net2] = net1
+            next_point[tail[net1]] = head[net2]
+            tail[net1] = tail[net2]
+
+        # Flattened bodies bring their nets along, already resolved
+        for instance, (_, compiled) in self._flattened.items():
+            for net in compiled.graph.nets:
+                first = None
+                for point in net.points:
+                    comp = self._get_component('GND' if point.component.name == 'GND' else f"{instance}/{point.component.name}")
+                    slot = get_or_create_net(comp, point.pin_name)
+                    if first is None:
+                        first = slot
+                    else:
+                        merge_nets(find(first), find(slot))
+
+        for source_name, source_pin_name, target_name, target_pin_name in self._expand_connections():
             # Resolve Source Pin
-            source_comp = self._get_component(conn.source.component_name)
-            source_pin = self._resolve_pin(source_comp, conn.source.pin_name, is_source=True)
-            
+            source_comp, source_pin = self._resolve_endpoint(source_name, source_pin_name, is_source=True)
+
             # Resolve Target Pin
-            target_comp = self._get_component(conn.target.component_name)
-            target_pin = self._resolve_pin(target_comp, conn.target.pin_name, is_source=False)
-            
+            target_comp, target_pin = self._resolve_endpoint(target_name, target_pin_name, is_source=False)
+
             # Create/Get nets and merge them
-            net_source = get_or_create_net(source_comp.name, source_pin)
-            net_target = get_or_create_net(target_comp.name, target_pin)
-            
-            # Add points to nets if not already there (for newly created nets)
-            if not any(p.component == source_comp and p.pin_name == source_pin for p in net_source.points):
-                net_source.points.append(ResolvedPin(source_comp, source_pin))
-                
-            if not any(p.component == target_comp and p.pin_name == target_pin for p in net_target.points):
-                 net_target.points.append(ResolvedPin(target_comp, target_pin))
+            merge_nets(get_or_create_net(source_comp, source_pin),
+                       get_or_create_net(target_comp, target_pin))
 
-            merge_nets(net_source, net_target)
+        for slot in range(len(parent)):
+            if parent[slot] != slot:
+                continue
+            net = Net(id=f"N{self._next_net_id + slot}")
+            i = head[slot]
+            while i >= 0:
+                net.points.append(points[i])
+                i = next_point[i]
+            self.nets.append(net)
+        self._next_net_id += len(parent)
+
+    def _resolve_endpoint(self, name: str, pin_name: Optional[str], is_source: bool) -> Tuple[Component, str]:
+        flattened = self._flattened.get(name)
+        if flattened is not None:
+            # X1.in is the net named 'in' inside X1's body
+            port = self._resolve_pin(flattened[0], pin_name, is_source)
+            return self._get_component(f"{name}/{port}"), '0'
+        comp = self._get_component(name)
+        return comp, self._resolve_pin(comp, pin_name, is_source)
 
     def _get_component(self, name: str) -> Component:
         if name not in self.components:
@@ -133,22 +264,29 @@ class SemanticAnalyzer:
         return self.components[name]
 
     def _resolve_pin(self, comp: Component, pin_name: Optional[str], is_source: bool) -> str:
+        definition = self.ast.subcircuits.get(comp.type_name)
+        if definition is not None and pin_name and pin_name not in definition.ports:
+            raise SemanticError(f"Subcircuit '{definition.name}' has no port '{pin_name}' (instance '{comp.name}')")
+
         if pin_name:
             return pin_name
         
         # Default pin logic
         comp_type = comp.type_name
+        ctype = get_type(comp_type)
         
-        if comp_type == 'JUNCTION':
+        if ctype is not None and ctype.role == JUNCTION:
             return '0' # Junctions effectively have 1 pin, connected on all sides.
             
-        if comp_type not in DEFAULT_PINS:
+        if definition is not None:
+            pins = tuple(definition.ports) # Ports follow the same first/second rule
+        elif ctype is None or not ctype.default_pins:
              raise SemanticError(f"Component type '{comp_type}' has no default pins. Specify pin explicitly for '{comp.name}'.")
-             
-        pins = DEFAULT_PINS[comp_type]
+        else:
+            pins = ctype.default_pins
         
         # If Ground, always 0
-        if comp_type == 'GND':
+        if ctype is not None and ctype.role == GROUND:
             return '0'
             
         # Linear chain logic: "V1 -> R1" means "V1.+ -> R1.left" (Source -> Target?)
@@ -178,5 +316,5 @@ class SemanticAnalyzer:
              
         return pins[1] if is_source else pins[0]
 
-def analyze(ast: Circuit) -> CircuitGraph:
-    return SemanticAnalyzer(ast).analyze()
+def analyze(ast: Circuit, flatten: Optional[bool] = None, strict: bool = True) -> CircuitGraph:
+    return SemanticAnalyzer(ast, flatten, strict).analyze()
@@ -0,0 +1,215 @@
+import asyncio
+import hashlib
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import Executor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Callable, Dict, Optional, Tuple
+from urllib.parse import parse_qsl, urlsplit
+
+# Rendered SVGs kept in memory (least recently used are dropped)
+RENDER_CACHE_SIZE = 512
+# Distinct renders waiting for or running in the pool before new ones get 503
+QUEUE_LIMIT = 64
+MAX_BODY = 1 << 20
+# Query parameters passed through to the circuit's options
+OPTION_PARAMS = ('layout', 'routing')
+
+class ServiceBusy(Exception):
+    pass
+
+class RenderError(Exception):
+    pass
+
+def _render_source(source: str, options: Tuple[Tuple[str, str], ...]) -> Tuple[bool, str]:
+    # Runs in a worker: (True, svg) or (False, error message). Each worker
+    # keeps its own topology layout cache across requests.
+    from . import compile
+    from .layout import compute_layout
+    from .renderer import render_svg
+    from .routing import route_nets
+    try:
+        graph = compile(source)
+        graph.options.update(options)
+        layout = compute_layout(graph)
+        return True, render_svg(graph, layout, routes=route_nets(graph, layout))
+    except Exception as e:
+        return False, str(e)
+
+def render_key(source: str, options: Tuple[Tuple[str, str], ...]) -> str:
+    digest = hashlib.sha256(source.encode())
+    digest.update(repr(options).encode())
+    return digest.hexdigest()
+
+class RenderService:
+    # Source -> SVG through a bounded process pool. Identical requests share
+    # one result: finished ones come from the LRU, concurrent ones await the
+    # same in-flight future. Once queue_limit distinct renders are pending,
+    # new ones are refused instead of queueing without bound.
+    def __init__(self, pool: Executor, cache_size: int = RENDER_CACHE_SIZE, queue_limit: int = QUEUE_LIMIT,
+                 pool_factory: Optional[Callable[[], Executor]] = None):
+        self.pool = pool
+        # Builds a fresh pool when a worker dies and breaks the current one
+        # (without it, every later request would fail until a restart)
+        self.pool_factory = pool_factory
+        self.cache_size = cache_size
+        self.queue_limit = queue_limit
+        self._cache: "OrderedDict[str, Tuple[bool, str]]" = OrderedDict()
+        self._inflight: Dict[str, asyncio.Future] = {}
+        self.stats = {'requests': 0, 'hits': 0, 'coalesced': 0, 'renders': 0, 'rejected': 0, 'restarts': 0}
+
+    async def render(self, source: str, options: Tuple[Tuple[str, str], ...] = ()) -> Tuple[str, str]:
+        # (key, svg); RenderError for bad circuits, ServiceBusy when full
+        self.stats['requests'] += 1
+        key = render_key(source, options)
+        result = self._cache.get(key)
+        if result is not None:
+            self._cache.move_to_end(key)
+            self.stats['hits'] += 1
+        elif key in self._inflight:
+            self.stats['coalesced'] += 1
+            result = await asyncio.shield(self._inflight[key])
+        elif len(self._inflight) >= self.queue_limit:
+            self.stats['rejected'] += 1
+            raise ServiceBusy()
+        else:
+            self.stats['renders'] += 1
+            pool, future = self._submit(source, options)
+            self._inflight[key] = future
+            # Bookkeeping happens even if this request's client goes away
+            future.add_done_callback(lambda done: self._finish(key, done, pool))
+            result = await asyncio.shield(future)
+        ok, text = result
+        if not ok:
+            raise RenderError(text)
+        return key, text
+
+    def _submit(self, source: str, options: Tuple[Tuple[str, str], ...]) -> Tuple[Executor, asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        try:
+            return self.pool, loop.run_in_executor(self.pool, _render_source, source, options)
+        except BrokenProcessPool:
+            self._replace_pool(self.pool)
+            return self.pool, loop.run_in_executor(self.pool, _render_source, source, options)
+
+    def _replace_pool(self, broken: Executor):
+        # Once per broken pool, however many renders it took down with it
+        if self.pool_factory is None or self.pool is not broken:
+            return
+        self.pool = self.pool_factory()
+        self.stats['restarts'] += 1
+        broken.shutdown(wait=False)
+
+    def _finish(self, key: str, future: asyncio.Future, pool: Executor):
+        del self._inflight[key]
+        if future.cancelled():
+            return
+        if future.exception() is not None:
+            if isinstance(future.exception(), BrokenProcessPool):
+                self._replace_pool(pool)
+            return
+        self._cache[key] = future.result()
+        while len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def health(self) -> Dict[str, int]:
+        return dict(self.stats, cached=len(self._cache), inflight=len(self._inflight))
+
+REASONS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found', 405: 'Method Not Allowed',
+           413: 'Payload Too Large', 500: 'Internal Server Error', 503: 'Service Unavailable'}
+
+def http_response(status: int, body: bytes, content_type: str = 'text/plain; charset=utf-8',
+                  headers: Optional[Dict[str, str]] = None, keep_alive: bool = True) -> bytes:
+    lines = [f"HTTP/1.1 {status} {REASONS[status]}", f"Content-Type: {content_type}",
+             f"Content-Length: {len(body)}", f"Connection: {'keep-alive' if keep_alive else 'close'}"]
+    lines += [f"{name}: {value}" for name, value in (headers or {}).items()]
+    return ("\r\n".join(lines) + "\r\n\r\n").encode() + body
+
+async def read_request(reader: asyncio.StreamReader):
+    # (method, target, headers, body) or None at end of stream; body is None
+    # when it is over MAX_BODY (and left unread)
+    line = await reader.readline()
+    if not line.strip():
+        return None
+    method, target, _ = line.decode('latin-1').split(' ', 2)
+    headers = {}
+    while True:
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    length = int(headers.get('content-length', 0))
+    if length > MAX_BODY:
+        return method, target, headers, None
+    body = await reader.readexactly(length) if length else b''
+    return method, target, headers, body
+
+class RenderServer:
+    # Minimal HTTP/1.1 front end (keep-alive, Content-Length bodies):
+    #   POST /render[?layout=..&routing=..]  TECD source in, SVG out
+    #   GET  /health                         counters as JSON
+    def __init__(self, service: RenderService):
+        self.service = service
+
+    async def handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                request = await read_request(reader)
+                if request is None:
+                    break
+                method, target, headers, body = request
+                keep_alive = body is not None and headers.get('connection', '').lower() != 'close'
+                writer.write(await self._respond(method, target, headers, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError):
+            # Dropped connection or a malformed request: just hang up
+            pass
+        finally:
+            writer.close()
+
+    async def _respond(self, method: str, target: str, headers: Dict[str, str], body: Optional[bytes], keep_alive: bool) -> bytes:
+        url = urlsplit(target)
+        if url.path == '/health':
+            return http_response(200, json.dumps(self.service.health()).encode(), 'application/json', keep_alive=keep_alive)
+        if url.path != '/render':
+            return http_response(404, b'not found\n', keep_alive=keep_alive)
+        if method != 'POST':
+            return http_response(405, b'POST TECD source to /render\n', headers={'Allow': 'POST'}, keep_alive=keep_alive)
+        if body is None:
+            # The unread body would desynchronise the connection
+            return http_response(413, b'source too large\n', keep_alive=False)
+        options = tuple(sorted((k, v) for k, v in parse_qsl(url.query) if k in OPTION_PARAMS))
+        try:
+            key, svg = await self.service.render(body.decode('utf-8', 'replace'), options)
+        except ServiceBusy:
+            return http_response(503, b'render queue full\n', headers={'Retry-After': '1'}, keep_alive=keep_alive)
+        except RenderError as e:
+            return http_response(400, f"{e}\n".encode(), keep_alive=keep_alive)
+        except Exception as e:
+            # A crashed worker, not a bad circuit
+            return http_response(500, f"{e}\n".encode(), keep_alive=keep_alive)
+        etag = f'"{key[:32]}"'
+        if headers.get('if-none-match') == etag:
+            return http_response(304, b'', 'image/svg+xml', {'ETag': etag}, keep_alive)
+        return http_response(200, svg.encode(), 'image/svg+xml', {'ETag': etag}, keep_alive)
+
+async def serve(host: str = '127.0.0.1', port: int = 8080, jobs: Optional[int] = None,
+                cache_size: int = RENDER_CACHE_SIZE, queue_limit: int = QUEUE_LIMIT):
+    from concurrent.futures import ProcessPoolExecutor
+
+    def new_pool() -> Executor:
+        return ProcessPoolExecutor(max_workers=jobs or os.cpu_count() or 1)
+
+    service = RenderService(new_pool(), cache_size, queue_limit, pool_factory=new_pool)
+    server = RenderServer(service)
+    try:
+        listener = await asyncio.start_server(server.handle, host, port)
+        print(f"Serving on http://{host}:{port}/render")
+        async with listener:
+            await listener.serve_forever()
+    finally:
+        service.pool.shutdown()
@@ -0,0 +1,158 @@
+from typing import Dict, List, Sequence
+
+# A sparse matrix as one {column: value} dict per row
+SparseRows = List[Dict[int, float]]
+
+# Pivots smaller than this, relative to the largest diagonal entry, mean the
+# unknown is not tied to the reference (a floating node)
+SINGULAR_TOLERANCE = 1e-12
+
+class SingularMatrixError(Exception):
+    def __init__(self, index: int):
+        super().__init__(f"Matrix is singular at unknown {index}")
+        self.index = index
+
+def solve_symmetric(rows: SparseRows, rhs: Sequence[float]) -> List[float]:
+    # Solves A x = b for a symmetric positive definite A (nodal conductance
+    # matrices). SciPy's sparse direct solver is used when it is installed;
+    # otherwise a pure-Python elimination in nested-dissection order.
+    try:
+        import scipy.sparse
+        import scipy.sparse.linalg
+    except ImportError:
+        return _eliminate(rows, rhs)
+    return _solve_scipy(rows, rhs, scipy)
+
+def _solve_scipy(rows: SparseRows, rhs: Sequence[float], scipy) -> List[float]:
+    import numpy
+    n = len(rows)
+    data, indices, indptr = [], [], [0]
+    for row in rows:
+        indices.extend(row.keys())
+        data.extend(row.values())
+        indptr.append(len(indices))
+    matrix = scipy.sparse.csr_matrix((data, indices, indptr), shape=(n, n)).tocsc()
+    try:
+        lu = scipy.sparse.linalg.splu(matrix)
+    except RuntimeError as e: # "Factor is exactly singular"
+        raise SingularMatrixError(_singular_index(rows)) from e
+    x = lu.solve(numpy.asarray(rhs, dtype=float))
+    if not numpy.all(numpy.isfinite(x)):
+        raise SingularMatrixError(_singular_index(rows))
+    return x.tolist()
+
+def _singular_index(rows: SparseRows) -> int:
+    # SuperLU does not say where it failed; the elimination does
+    try:
+        _eliminate(rows, [0.0] * len(rows))
+    except SingularMatrixError as e:
+        return e.index
+    return 0
+
+def _eliminate(rows: SparseRows, rhs: Sequence[float]) -> List[float]:
+    # Symmetric Gaussian elimination in nested-dissection order. Only entries
+    # ahead of their row in the order are stored (the upper triangle), so
+    # each update is written once and no eliminated column is ever deleted.
+    n = len(rows)
+    order = _dissection_order([[j for j in row if j != i] for i, row in enumerate(rows)])
+    position = [0] * n
+    for k, p in enumerate(order):
+        position[p] = k
+    diag = [row.get(i, 0.0) for i, row in enumerate(rows)]
+    upper = [{j: v for j, v in row.items() if position[j] > position[i] and v != 0.0}
+             for i, row in enumerate(rows)]
+    b = list(rhs)
+    scale = max((abs(d) for d in diag), default=0.0) or 1.0
+
+    steps = []
+    for p in order:
+        d = diag[p]
+        if abs(d) <= SINGULAR_TOLERANCE * scale:
+            raise SingularMatrixError(p)
+        items = sorted(upper[p].items(), key=lambda item: position[item[0]])
+        bp = b[p]
+        for k, (i, a_ip) in enumerate(items):
+            f = a_ip / d
+            diag[i] -= f * a_ip
+            b[i] -= f * bp
+            row = upper[i]
+            get = row.get
+            for j, a_pj in items[k + 1:]:
+                row[j] = get(j, 0.0) - f * a_pj
+        upper[p] = None
+        steps.append((p, d, items))
+
+    x = [0.0] * n
+    for p, d, items in reversed(steps):
+        s = b[p]
+        for i, a in items:
+            s -= a * x[i]
+        x[p] = s / d
+    return x
+
+# Parts this small are eliminated as they are; splitting further costs more
+# than the fill it saves
+DISSECTION_LEAF = 32
+
+def _dissection_order(adj: List[List[int]]) -> List[int]:
+    # Nested dissection: split the graph with a BFS level set from a
+    # pseudo-peripheral node, order both halves (recursively) before the
+    # separator. Fill then stays within separator blocks, O(n log n) for
+    # planar meshes where a minimum-degree order degrades badly.
+    n = len(adj)
+    order: List[int] = []
+    member = [False] * n
+    mark = [0] * n
+    stamp = 0
+    # Lists to split, and ('emit', separator) entries queued behind their halves
+    tasks: list = [list(range(n))]
+    while tasks:
+        task = tasks.pop()
+        if isinstance(task, tuple):
+            order.extend(task[1])
+            continue
+        if len(task) <= DISSECTION_LEAF:
+            order.extend(task)
+            continue
+        for v in task:
+            member[v] = True
+        stamp += 1
+        levels = _level_sets(adj, task[0], member, mark, stamp)
+        stamp += 1
+        levels = _level_sets(adj, levels[-1][0], member, mark, stamp)
+        for v in task:
+            member[v] = False
+        reached = [v for level in levels for v in level]
+        if len(reached) < len(task):
+            # Disconnected: order each piece on its own
+            tasks.append([v for v in task if mark[v] != stamp])
+            tasks.append(reached)
+            continue
+        if len(levels) < 3:
+            order.extend(task)
+            continue
+        half, acc, middle = len(task) / 2, 0, 1
+        for k, level in enumerate(levels):
+            acc += len(level)
+            if acc >= half:
+                middle = k
+                break
+        middle = max(1, min(middle, len(levels) - 2))
+        tasks.append(('emit', levels[middle]))
+        tasks.append([v for level in levels[middle + 1:] for v in level])
+        tasks.append([v for level in levels[:middle] for v in level])
+    return order
+
+def _level_sets(adj: List[List[int]], start: int, member: List[bool], mark: List[int], stamp: int) -> List[List[int]]:
+    levels = [[start]]
+    mark[start] = stamp
+    while True:
+        frontier = []
+        for u in levels[-1]:
+            for v in adj[u]:
+                if member[v] and mark[v] != stamp:
+                    mark[v] = stamp
+                    frontier.append(v)
+        if not frontier:
+            return levels
+        levels.append(frontier)
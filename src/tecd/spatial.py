@@ -0,0 +1,68 @@
+import math
+from collections import defaultdict
+from typing import Dict, Generic, Iterable, List, Tuple, TypeVar
+
+T = TypeVar('T')
+
+# Axis-aligned bounding box: (min_x, min_y, max_x, max_y)
+BBox = Tuple[float, float, float, float]
+
+def bbox_intersects(a: BBox, b: BBox) -> bool:
+    return a[0] <= b[2] and b[0] <= a[2] and a[1] <= b[3] and b[1] <= a[3]
+
+def bbox_of_points(points: Iterable[Tuple[float, float]]) -> BBox:
+    xs, ys = zip(*points)
+    return (min(xs), min(ys), max(xs), max(ys))
+
+class GridIndex(Generic[T]):
+    # Uniform grid spatial index. Every item is registered in each cell its
+    # bounding box touches, so a query only visits the cells under the query box.
+    # Circuit symbols are all of similar size, which is the case where a uniform
+    # grid beats a tree.
+    def __init__(self, cell_size: float = 100.0):
+        self.cell_size = cell_size
+        self._cells: Dict[Tuple[int, int], List[int]] = defaultdict(list)
+        self._items: List[Tuple[BBox, T]] = []
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def _cell_range(self, bbox: BBox):
+        s = self.cell_size
+        return (math.floor(bbox[0] / s), math.floor(bbox[1] / s),
+                math.floor(bbox[2] / s), math.floor(bbox[3] / s))
+
+    def insert(self, bbox: BBox, item: T) -> int:
+        item_id = len(self._items)
+        self._items.append((bbox, item))
+        cx0, cy0, cx1, cy1 = self._cell_range(bbox)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                self._cells[(cx, cy)].append(item_id)
+        return item_id
+
+    def query_ids(self, bbox: BBox) -> List[int]:
+        cx0, cy0, cx1, cy1 = self._cell_range(bbox)
+        found = set()
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                cell = self._cells.get((cx, cy))
+                if cell:
+                    found.update(cell)
+        # Sorted so results come back in insertion (draw) order
+        return [i for i in sorted(found) if bbox_intersects(self._items[i][0], bbox)]
+
+    def query(self, bbox: BBox) -> List[T]:
+        return [self._items[i][1] for i in self.query_ids(bbox)]
+
+    def query_boxes(self, bbox: BBox) -> List[Tuple[BBox, T]]:
+        return [self._items[i] for i in self.query_ids(bbox)]
+
+    def any_intersects(self, bbox: BBox) -> bool:
+        cx0, cy0, cx1, cy1 = self._cell_range(bbox)
+        for cx in range(cx0, cx1 + 1):
+            for cy in range(cy0, cy1 + 1):
+                for i in self._cells.get((cx, cy), ()):
+                    if bbox_intersects(self._items[i][0], bbox):
+                        return True
+        return False
@@ -0,0 +1,292 @@
+import os
+import sys
+from typing import Dict, Iterator, List, Optional, TextIO, Tuple
+from .ast_nodes import Component, SourceLocation
+from .connectivity import build_connectivity
+from .semantics import CircuitGraph, Net, ResolvedPin
+
+# SPICE element letter -> (tecd type, pin names in SPICE node order)
+ELEMENT_MAP = {
+    'R': ('RES', ('left', 'right')),
+    'C': ('CAP', ('top', 'bottom')),
+    'L': ('IND', ('left', 'right')),
+    'V': ('VDC', ('+', '-')),
+    'I': ('IDC', ('+', '-')),
+    'D': ('DIODE', ('anode', 'cathode')),
+    'Q': ('NPN', ('C', 'B', 'E')),
+    'M': ('NMOS', ('D', 'G', 'S')),
+}
+
+# .model types that switch Q/M elements to their complementary symbol
+MODEL_TYPES = {'NPN': 'NPN', 'PNP': 'PNP', 'NMOS': 'NMOS', 'PMOS': 'PMOS'}
+
+GROUND_NODES = {'0', 'gnd', 'GND'}
+# Transient source functions; kept verbatim as the 'tran' parameter
+TRANSIENT_FUNCTIONS = ('SIN', 'PULSE', 'EXP', 'PWL', 'SFFM')
+
+# tecd type -> (SPICE element letter, pin names in SPICE node order), for export
+EXPORT_MAP = {type_name: (letter, pins) for letter, (type_name, pins) in ELEMENT_MAP.items()}
+EXPORT_MAP.update({'VAC': ('V', ('+', '-')), 'PNP': ('Q', ('C', 'B', 'E')), 'PMOS': ('M', ('D', 'G', 'S'))})
+# Parameters written as the element's value, by preference
+VALUE_PARAMS = ('value', 'v', 'r', 'c', 'l', 'resistance', 'capacitance', 'inductance')
+SOURCE_PARAMS = ('dc', 'value', 'v', 'i', 'current')
+
+# (line number, fields) of every card in an included file, keyed by absolute
+# path and validated by mtime, so a library included by many decks (or many
+# times in one deck) is read once per process
+_include_cache: Dict[str, Tuple[float, List[Tuple[int, List[str]]]]] = {}
+
+class SpiceError(Exception):
+    pass
+
+def _strip_comment(line: str) -> str:
+    for marker in (';', '$'):
+        idx = line.find(marker)
+        if idx >= 0:
+            line = line[:idx]
+    return line.strip()
+
+def read_cards(stream: TextIO, skip_title: bool = True) -> Iterator[Tuple[int, List[str]]]:
+    # Yields (line number, fields) per card, joining '+' continuation lines.
+    # Only the card being assembled is held in memory.
+    pending: Optional[Tuple[int, List[str]]] = None
+    for lineno, raw in enumerate(stream, start=1):
+        if skip_title and lineno == 1:
+            continue # First line of a SPICE deck is its title
+        if raw.startswith('*'):
+            continue
+        line = _strip_comment(raw)
+        if not line:
+            continue
+        if line.startswith('+'):
+            if pending is None:
+                raise SpiceError(f"Continuation line without a card at line {lineno}")
+            pending[1].extend(sys.intern(f) for f in line[1:].split())
+            continue
+        if pending is not None:
+            yield pending
+        # Node names repeat on every card that touches them
+        pending = (lineno, [sys.intern(f) for f in line.split()])
+    if pending is not None:
+        yield pending
+
+def _include_cards(path: str) -> List[Tuple[int, List[str]]]:
+    path = os.path.abspath(path)
+    mtime = os.path.getmtime(path)
+    cached = _include_cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    with open(path, 'r') as f:
+        cards = list(read_cards(f, skip_title=False))
+    _include_cache[path] = (mtime, cards)
+    return cards
+
+class SpiceImporter:
+    def __init__(self):
+        self.components: Dict[str, Component] = {}
+        self.nets: Dict[str, Net] = {}
+        self.models: Dict[str, str] = {}
+        # Q/M elements whose .model may only appear later in the deck
+        self._model_refs: List[Tuple[Component, str]] = []
+        self.skipped: Dict[str, int] = {}
+        self._include_stack: List[str] = []
+
+    def import_file(self, path: str) -> CircuitGraph:
+        with open(path, 'r') as f:
+            self._include_stack.append(os.path.abspath(path))
+            self._consume(read_cards(f), os.path.dirname(path))
+            self._include_stack.pop()
+        return self.finish()
+
+    def import_stream(self, stream: TextIO, base_dir: str = '.') -> CircuitGraph:
+        self._consume(read_cards(stream), base_dir)
+        return self.finish()
+
+    def finish(self) -> CircuitGraph:
+        for comp, model in self._model_refs:
+            model_type = self.models.get(model.upper())
+            if model_type:
+                comp.type_name = model_type
+        nets = list(self.nets.values())
+        return CircuitGraph(self.components, nets, {}, connectivity=build_connectivity(self.components, nets))
+
+    def _consume(self, cards, base_dir: str):
+        in_subckt = 0
+        for lineno, fields in cards:
+            keyword = fields[0].upper()
+            if keyword.startswith('.'):
+                if keyword == '.END':
+                    break
+                elif keyword in ('.INCLUDE', '.INC'):
+                    self._include(fields, base_dir, lineno)
+                elif keyword == '.MODEL' and len(fields) >= 3:
+                    model_type = fields[2].split('(')[0].upper()
+                    if model_type in MODEL_TYPES:
+                        self.models[fields[1].upper()] = MODEL_TYPES[model_type]
+                elif keyword == '.SUBCKT':
+                    in_subckt += 1
+                elif keyword == '.ENDS':
+                    in_subckt -= 1
+                continue
+            if in_subckt:
+                continue # Subcircuit bodies are not instantiated
+            self._element(fields, lineno)
+
+    def _include(self, fields: List[str], base_dir: str, lineno: int):
+        if len(fields) < 2:
+            raise SpiceError(f".include without a path at line {lineno}")
+        path = os.path.abspath(os.path.join(base_dir, fields[1].strip('"\'')))
+        if path in self._include_stack:
+            raise SpiceError(f"Recursive .include of '{path}' at line {lineno}")
+        self._include_stack.append(path)
+        self._consume(_include_cards(path), os.path.dirname(path))
+        self._include_stack.pop()
+
+    def _element(self, fields: List[str], lineno: int):
+        name = fields[0]
+        letter = name[0].upper()
+        if letter not in ELEMENT_MAP:
+            self.skipped[letter] = self.skipped.get(letter, 0) + 1
+            return
+        type_name, pins = ELEMENT_MAP[letter]
+        if len(fields) < 1 + len(pins):
+            raise SpiceError(f"Element '{name}' needs {len(pins)} nodes at line {lineno}")
+        if name in self.components:
+            raise SpiceError(f"Duplicate element '{name}' at line {lineno}")
+
+        nodes = fields[1:1 + len(pins)]
+        rest = fields[1 + len(pins):]
+        parameters: Dict[str, str] = {}
+
+        if letter in 'QM':
+            # MOSFETs always carry a bulk node before the model name; BJTs
+            # only optionally carry a substrate node, so prefer a known model
+            if letter == 'M' and len(rest) >= 2:
+                rest = rest[1:]
+            elif letter == 'Q' and len(rest) >= 2 and rest[0].upper() not in self.models and rest[1].upper() in self.models:
+                rest = rest[1:]
+            if rest:
+                parameters['model'] = rest[0]
+        elif letter in 'VI':
+            rest = self._take_transient(rest, parameters)
+            upper = [f.upper() for f in rest]
+            if 'AC' in upper and letter == 'V':
+                type_name = 'VAC'
+                parameters['ac'] = rest[upper.index('AC') + 1] if upper.index('AC') + 1 < len(rest) else '1'
+            if 'DC' in upper and upper.index('DC') + 1 < len(rest):
+                parameters['dc'] = rest[upper.index('DC') + 1]
+            elif rest and upper[0] != 'AC':
+                parameters['dc'] = rest[0]
+        elif rest:
+            parameters['value'] = rest[0]
+
+        comp = Component(location=SourceLocation(lineno, 1), type_name=type_name, name=name, parameters=parameters)
+        self.components[name] = comp
+        if letter in 'QM' and 'model' in parameters:
+            self._model_refs.append((comp, parameters['model']))
+        for node, pin in zip(nodes, pins):
+            self._connect(node, comp, pin)
+
+    @staticmethod
+    def _take_transient(fields: List[str], parameters: Dict[str, str]) -> List[str]:
+        # SIN(0 1 1k) or PULSE (0 5 1n ...): the function name up to the
+        # closing parenthesis is stored as written; returns the other fields
+        for k, field in enumerate(fields):
+            if field.split('(')[0].upper() in TRANSIENT_FUNCTIONS:
+                end = next((j for j in range(k, len(fields)) if ')' in fields[j]), len(fields) - 1)
+                parameters['tran'] = ' '.join(fields[k:end + 1]).replace(' (', '(', 1)
+                return fields[:k] + fields[end + 1:]
+        return fields
+
+    def _connect(self, node: str, comp: Component, pin: str):
+        if node in GROUND_NODES:
+            node = '0'
+        net = self.nets.get(node)
+        if net is None:
+            net = Net(id=node)
+            self.nets[node] = net
+            if node == '0':
+                gnd = self.components.get('GND')
+                if gnd is None:
+                    gnd = Component(type_name='GND', name='GND', parameters={})
+                    self.components['GND'] = gnd
+                net.points.append(ResolvedPin(gnd, '0'))
+        net.points.append(ResolvedPin(comp, pin))
+
+def import_spice(path: str) -> CircuitGraph:
+    return SpiceImporter().import_file(path)
+
+def _export_pins(type_name: str) -> Dict[str, int]:
+    # Pin name (aliases included, via symbol positions) -> SPICE node position
+    from .registry import symbol_for
+    pins = symbol_for(type_name).pins
+    order = EXPORT_MAP[type_name][1]
+    positions = {pins[p]: k for k, p in enumerate(order) if p in pins}
+    mapping = {name: positions[xy] for name, xy in pins.items() if xy in positions}
+    for k, p in enumerate(order):
+        mapping.setdefault(p, k)
+    return mapping
+
+def write_spice(graph: CircuitGraph, out: TextIO, title: str = 'tecd export'):
+    # The graph as a SPICE deck: ground is node 0, named junctions keep
+    # their names and other nets their ids. Types with no SPICE element
+    # (subcircuit instances, logic gates) are listed as comments.
+    from .registry import GROUND, JUNCTION, SOURCE, role
+
+    junctions = {name for name, comp in graph.components.items() if role(comp.type_name) == JUNCTION}
+    node_of: Dict[Tuple[str, int], str] = {}
+    for net in graph.nets:
+        kinds = [role(p.component.type_name) for p in net.points]
+        if GROUND in kinds:
+            node = '0'
+        elif JUNCTION in kinds:
+            node = net.points[kinds.index(JUNCTION)].component.name
+        else:
+            node = net.id if net.id not in junctions else f"{net.id}_"
+        for p in net.points:
+            if p.component.type_name in EXPORT_MAP:
+                k = _export_pins(p.component.type_name).get(p.pin_name)
+                if k is not None:
+                    node_of[(p.component.name, k)] = node
+
+    out.write(f"* {title}\n")
+    models = {}
+    for name, comp in graph.components.items():
+        kind = role(comp.type_name)
+        if kind in (GROUND, JUNCTION):
+            continue
+        if comp.type_name not in EXPORT_MAP:
+            out.write(f"* {comp.type_name} {name}: no SPICE element\n")
+            continue
+        letter, pins = EXPORT_MAP[comp.type_name]
+        element = name if name[0].upper() == letter else letter + name
+        nodes = [node_of.get((name, k)) for k in range(len(pins))]
+        if kind == SOURCE and nodes.count(None) == 1:
+            # A source with one pin wired ('Vin -> R1') is referenced to ground
+            nodes[nodes.index(None)] = '0'
+        nodes = [node or f"NC_{name}_{pin}" for node, pin in zip(nodes, pins)]
+        params = comp.parameters
+        if letter in 'QM':
+            model = params.get('model', comp.type_name)
+            models[model] = comp.type_name
+            if letter == 'M':
+                nodes.append(nodes[2]) # Bulk tied to source
+            fields = [model]
+        elif letter in 'VI':
+            fields = []
+            dc = next((params[k] for k in SOURCE_PARAMS if k in params), None)
+            if dc is not None or not ('ac' in params or 'tran' in params):
+                fields += ['DC', dc or '0']
+            if comp.type_name == 'VAC' or 'ac' in params:
+                fields += ['AC', params.get('ac', params.get('amplitude', '1'))]
+            if 'tran' in params:
+                fields.append(params['tran'])
+        else:
+            value = next((params[k] for k in VALUE_PARAMS if k in params), None)
+            if value is None and len(params) == 1:
+                value = next(iter(params.values()))
+            fields = [value] if value is not None else []
+        out.write(" ".join([element, *nodes, *fields]) + "\n")
+    for model, type_name in models.items():
+        out.write(f".model {model} {type_name}\n")
+    out.write(".end\n")
@@ -0,0 +1,63 @@
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Tuple
+from .ast_nodes import SubcircuitDef
+from .semantics import CircuitGraph, SemanticAnalyzer
+from .symbols import BLOCK_WIDTH, PORT_PITCH, Symbol, block_symbol
+
+# Inset of the body preview inside the block outline
+PREVIEW_MARGIN = 6
+
+@dataclass
+class CompiledSubcircuit:
+    # A definition analyzed (and, on first use, laid out) once, shared by
+    # every instance of it
+    name: str
+    ports: Tuple[str, ...]
+    graph: CircuitGraph
+    _layout: Optional["Layout"] = field(default=None, repr=False)
+    _symbol: Optional[Symbol] = field(default=None, repr=False)
+
+    @property
+    def layout(self) -> "Layout":
+        if self._layout is None:
+            from .layout import compute_layout
+            self._layout = compute_layout(self.graph)
+        return self._layout
+
+    def symbol(self) -> Symbol:
+        # Block with port stubs and a scaled-down drawing of the body
+        if self._symbol is None:
+            shell = block_symbol(self.name, self.ports)
+            self._symbol = block_symbol(self.name, self.ports, self._preview(shell.height))
+        return self._symbol
+
+    def _preview(self, height: float) -> str:
+        from .routing import route_nets
+        layout = self.layout
+        if not layout.components or layout.width <= 0 or layout.height <= 0:
+            return ''
+        box_w = BLOCK_WIDTH - 2 * PREVIEW_MARGIN
+        box_h = height - 2 * PREVIEW_MARGIN - PORT_PITCH / 2 # Leave room for the title
+        scale = min(box_w / layout.width, box_h / layout.height)
+        ox = -layout.width * scale / 2
+        oy = -height / 2 + PREVIEW_MARGIN + PORT_PITCH / 2 + (box_h - layout.height * scale) / 2
+        parts = [f'<g transform="translate({ox:.2f}, {oy:.2f}) scale({scale:.4f})" opacity="0.4">']
+        for pc in layout.components:
+            parts.append(f'<g transform="translate({pc.x}, {pc.y}) rotate({pc.rotation})">{pc.symbol.path}</g>')
+        for route in route_nets(self.graph, layout):
+            parts.append(f'<path d="{route.path_data()}" stroke="blue" stroke-width="1" fill="none"/>')
+        parts.append('</g>')
+        return ''.join(parts)
+
+# (digest, flattened) -> compiled definition. The digest covers the
+# definition's tokens and the digests of the subcircuits it instantiates.
+_compiled: Dict[Tuple[str, bool], CompiledSubcircuit] = {}
+
+def compile_subcircuit(definition: SubcircuitDef, flatten: bool = False) -> CompiledSubcircuit:
+    key = (definition.digest, flatten)
+    compiled = _compiled.get(key)
+    if compiled is None:
+        graph = SemanticAnalyzer(definition.body, flatten=flatten).analyze()
+        compiled = CompiledSubcircuit(definition.name, tuple(definition.ports), graph)
+        _compiled[key] = compiled
+    return compiled
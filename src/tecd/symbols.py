@@ -251,6 +251,14 @@ NMOS = Symbol(
     label_offset=(0, -30)
 )
 
+PMOS = Symbol(
+    path=NMOS.path.replace('points="-10,0 -4,-3 -4,3"', 'points="-4,0 -10,-3 -10,3"'), # Arrow points out of the channel
+    width=40,
+    height=40,
+    pins={'G': (-20, 0), 'D': (20, -15), 'S': (20, 15)},
+    label_offset=(0, -30)
+)
+
 # Logic Gates
 AND = Symbol(
     path='''
@@ -314,27 +322,34 @@ NAND = Symbol(
     label_offset=(0, -25)
 )
 
-SYMBOL_MAP = {
-    'RES': RESISTOR,
-    'CAP': CAPACITOR,
-    'IND': INDUCTOR,
-    'VDC': VDC,
-    'GND': GND,
-    'DIODE': DIODE,
-    'LED': LED,
-    'SWITCH': SWITCH,
-    'VAC': VAC,
-    'IDC': IDC,
-    'NPN': NPN,
-    'PNP': PNP,
-    'NMOS': NMOS,
-    # 'PMOS': PMOS, # reuse NMOS with varied path or create new
-    'AND': AND,
-    'OR': OR,
-    'NOT': NOT,
-    'NAND': NAND,
-    'JUNCTION': Symbol(path='<circle r="3" fill="currentColor"/>', width=6, height=6, pins={'0':(0,0)})
-}
+JUNCTION = Symbol(path='<circle r="3" fill="currentColor"/>', width=6, height=6, pins={'0':(0,0)})
 
 def get_symbol(type_name: str) -> Symbol:
-    return SYMBOL_MAP.get(type_name, SYMBOL_MAP['RES']) # Fallback to box
+    from .registry import symbol_for
+    return symbol_for(type_name)
+
+# Subcircuit blocks: a box with one stub per port, even ports on the left
+# and odd ports on the right (so the first two follow the chain direction)
+BLOCK_WIDTH = 60
+PORT_PITCH = 20
+PORT_STUB = 10
+
+def block_symbol(name: str, ports, interior: str = '') -> Symbol:
+    left, right = ports[0::2], ports[1::2]
+    height = max(40, PORT_PITCH * (max(len(left), len(right), 1) + 1))
+    half_w, half_h = BLOCK_WIDTH / 2, height / 2
+    pins = {}
+    lines = [f'<rect x="{-half_w}" y="{-half_h}" width="{BLOCK_WIDTH}" height="{height}" fill="none" stroke="currentColor" stroke-width="2"/>']
+    if interior:
+        lines.append(interior)
+    lines.append(f'<text x="0" y="{-half_h + 10}" text-anchor="middle" font-size="8">{name}</text>')
+    for side, side_ports in ((-1, left), (1, right)):
+        for k, port in enumerate(side_ports):
+            y = -half_h + PORT_PITCH * (k + 1)
+            x = side * (half_w + PORT_STUB)
+            pins[port] = (x, y)
+            lines.append(f'<line x1="{side * half_w}" y1="{y}" x2="{x}" y2="{y}" stroke="currentColor" stroke-width="2"/>')
+            anchor = 'start' if side < 0 else 'end'
+            lines.append(f'<text x="{side * (half_w - 3)}" y="{y + 3}" text-anchor="{anchor}" font-size="7">{port}</text>')
+    return Symbol(path='\n'.join(lines), width=BLOCK_WIDTH + 2 * PORT_STUB, height=height, pins=pins,
+                  label_offset=(0, -half_h - 10))
@@ -0,0 +1,48 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Tuple
+from .semantics import CircuitGraph
+from .layout import Layout
+from .renderer import SVGRenderer, Viewport
+
+TILE_SIZE = 256
+
+# Per-process renderer, built once by the pool initializer so the spatial index
+# is constructed once per worker rather than once per tile.
+_worker_renderer: Optional[SVGRenderer] = None
+
+def tile_viewport(layout: Layout, z: int, x: int, y: int) -> Viewport:
+    # Level z splits the (square) drawing extent into 2^z x 2^z tiles
+    side = max(layout.width, layout.height) / (2 ** z)
+    return (x * side, y * side, side, side)
+
+def _init_worker(graph: CircuitGraph, layout: Layout):
+    global _worker_renderer
+    _worker_renderer = SVGRenderer(graph, layout)
+
+def _render_tile(job: Tuple[int, int, int, str, int]) -> str:
+    z, x, y, out_dir, tile_size = job
+    renderer = _worker_renderer
+    svg = renderer.render(tile_viewport(renderer.layout, z, x, y), size=(tile_size, tile_size))
+
+    tile_dir = os.path.join(out_dir, str(z), str(x))
+    os.makedirs(tile_dir, exist_ok=True)
+    path = os.path.join(tile_dir, f"{y}.svg")
+    with open(path, 'w') as f:
+        f.write(svg)
+    return path
+
+def render_tiles(graph: CircuitGraph, layout: Layout, out_dir: str, levels: int = 3,
+                 tile_size: int = TILE_SIZE, jobs: Optional[int] = None) -> List[str]:
+    # Writes out_dir/{z}/{x}/{y}.svg for z in [0, levels)
+    tiles = [(z, x, y, out_dir, tile_size)
+             for z in range(levels)
+             for x in range(2 ** z)
+             for y in range(2 ** z)]
+
+    if jobs == 1:
+        _init_worker(graph, layout)
+        return [_render_tile(t) for t in tiles]
+
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(graph, layout)) as pool:
+        return list(pool.map(_render_tile, tiles, chunksize=max(1, len(tiles) // 64)))
@@ -0,0 +1,135 @@
+import hashlib
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Tuple
+from .registry import get_type
+from .semantics import CircuitGraph
+
+# Options that change the layout; everything else (values, names, routing)
+# leaves it alone, so circuits differing only there share a cache entry
+LAYOUT_OPTIONS = ('layout',)
+# Canonical layouts kept per process (least recently used are dropped)
+LAYOUT_CACHE_SIZE = 256
+# Colour refinement rounds before ties fall back to declaration order. Each
+# round sorts every pin and a series chain of n parts needs about n/2 rounds
+# to split fully, so uncapped refinement is quadratic; a short cap only costs
+# cache hits on reordered copies of long chains (the certificate keeps every
+# hit exact)
+REFINEMENT_ROUNDS = 8
+
+@dataclass(frozen=True)
+class CanonicalForm:
+    # Weisfeiler-Lehman hash of the component/net incidence graph, plus a
+    # canonical numbering of the components that two isomorphic circuits
+    # (usually) agree on
+    digest: str
+    order: Tuple[str, ...]  # component names in canonical order
+    # (component rank, pin, net rank) for every pin, sorted; equal
+    # certificates mean the canonical numbering is an isomorphism
+    certificate: Tuple[Tuple[int, str, int], ...]
+
+def _relabel(signatures: List[tuple]) -> List[int]:
+    # Signatures -> dense ints in sorted signature order, so the colours
+    # depend only on the structure, never on names or hash seeds
+    ids = {sig: i for i, sig in enumerate(sorted(set(signatures)))}
+    return [ids[sig] for sig in signatures]
+
+def _symbol_key(type_name: str) -> str:
+    # Layouts depend on symbol sizes: two registrations of a type name with
+    # different symbols (subcircuit blocks) must not share entries
+    ctype = get_type(type_name)
+    if ctype is None or isinstance(ctype.symbol, str):
+        return type_name
+    return f"{type_name}@{id(getattr(ctype.symbol, '__self__', ctype.symbol)):x}"
+
+def canonical_form(graph: CircuitGraph) -> CanonicalForm:
+    conn = graph.connectivity
+    n_comp, n_net = conn.num_components, conn.num_nets
+    comp_pins = [[(conn.pin_names[conn.comp_indices[k]], conn.pin_net[conn.comp_indices[k]])
+                  for k in range(conn.comp_indptr[c], conn.comp_indptr[c + 1])] for c in range(n_comp)]
+    net_pins = [[(conn.pin_names[p], conn.pin_component[p]) for p in conn.net_pins(net)] for net in range(n_net)]
+
+    types = [_symbol_key(graph.components[name].type_name) for name in conn.component_names]
+    comp_color = _relabel([(t,) for t in types])
+    net_color = [0] * n_net
+    distinct = len(set(comp_color)) + 1
+    # Refine until the partition stops splitting or the round budget runs out
+    for _ in range(REFINEMENT_ROUNDS):
+        net_color = _relabel([(net_color[i], tuple(sorted((pin, comp_color[c]) for pin, c in pins)))
+                              for i, pins in enumerate(net_pins)])
+        comp_color = _relabel([(comp_color[c], tuple(sorted((pin, net_color[net]) for pin, net in pins)))
+                               for c, pins in enumerate(comp_pins)])
+        count = len(set(comp_color)) + len(set(net_color))
+        if count == distinct:
+            break
+        distinct = count
+
+    # Ties (symmetric parts of the circuit) are broken by declaration order;
+    # the certificate check catches the cases where that is not canonical
+    comp_rank = [0] * n_comp
+    for rank, c in enumerate(sorted(range(n_comp), key=lambda c: (comp_color[c], c))):
+        comp_rank[c] = rank
+    first_member = [min((comp_rank[c] for _, c in pins), default=-1) for pins in net_pins]
+    net_rank = [0] * n_net
+    for rank, net in enumerate(sorted(range(n_net), key=lambda i: (net_color[i], first_member[i]))):
+        net_rank[net] = rank
+    certificate = tuple(sorted((comp_rank[c], pin, net_rank[net]) for c, pins in enumerate(comp_pins) for pin, net in pins))
+
+    order = [None] * n_comp
+    for c, rank in enumerate(comp_rank):
+        order[rank] = conn.component_names[c]
+    digest = hashlib.sha1()
+    digest.update(repr([(opt, graph.options.get(opt)) for opt in LAYOUT_OPTIONS]).encode())
+    digest.update(repr(sorted(zip(comp_color, types))).encode())
+    digest.update(repr(sorted(net_color)).encode())
+    digest.update(repr(certificate).encode())
+    return CanonicalForm(digest.hexdigest(), tuple(order), certificate)
+
+@dataclass(frozen=True)
+class _CachedLayout:
+    # Positions by canonical rank: (rank, x, y, rotation)
+    placements: Tuple[Tuple[int, float, float, float], ...]
+    width: float
+    height: float
+    routing_style: str
+
+class LayoutCache:
+    # Layouts keyed by canonical topology. A hit is remapped onto the new
+    # circuit's component names, so renamed copies and value variants of a
+    # circuit skip the layout engine entirely.
+    def __init__(self, maxsize: int = LAYOUT_CACHE_SIZE):
+        self.maxsize = maxsize
+        self._entries: "OrderedDict[str, _CachedLayout]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, graph: CircuitGraph, form: CanonicalForm) -> Optional["Layout"]:
+        from .layout import Layout, PlacedComponent
+
+        entry = self._entries.get(form.digest)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(form.digest)
+        self.hits += 1
+        placed = []
+        for rank, x, y, rotation in entry.placements:
+            comp = graph.components[form.order[rank]]
+            placed.append(PlacedComponent(component=comp, x=x, y=y, symbol_ref=comp.type_name, rotation=rotation))
+        return Layout(placed, entry.width, entry.height, routing_style=entry.routing_style)
+
+    def put(self, form: CanonicalForm, layout: "Layout"):
+        rank = {name: r for r, name in enumerate(form.order)}
+        self._entries[form.digest] = _CachedLayout(
+            tuple((rank[pc.component.name], pc.x, pc.y, pc.rotation) for pc in layout.components),
+            layout.width, layout.height, layout.routing_style)
+        self._entries.move_to_end(form.digest)
+        while len(self._entries) > self.maxsize:
+            self._entries.popitem(last=False)
+
+    def clear(self):
+        self._entries.clear()
+        self.hits = self.misses = 0
+
+# Shared by everything laid out in this process (batch builds, servers)
+layout_cache = LayoutCache()
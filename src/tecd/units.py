@@ -0,0 +1,37 @@
+import math
+import re
+
+SI_PREFIXES = {
+    'f': 1e-15, 'p': 1e-12, 'n': 1e-9, 'u': 1e-6, 'µ': 1e-6, 'μ': 1e-6, 'm': 1e-3,
+    '': 1.0, 'k': 1e3, 'K': 1e3, 'meg': 1e6, 'M': 1e6, 'G': 1e9, 'T': 1e12,
+}
+# Prefix letters used for display, indexed by power of 1000 from -5 (f) to 4 (T)
+_DISPLAY_PREFIXES = ('f', 'p', 'n', 'u', 'm', '', 'k', 'M', 'G', 'T')
+
+# 10k, 2.2uF, 5V, 1e-3, 1meg. Prefix letters are case sensitive: m is milli,
+# M is mega (SPICE's case-insensitive 'meg' is accepted too).
+VALUE_RE = re.compile(r'([+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?)(meg|MEG|Meg|[fpnuµμmkKMGT]?)([A-Za-zΩ]*)$')
+# 4k7, 4R7, 2M2: the prefix letter stands in for the decimal point (IEC 60062)
+INFIX_RE = re.compile(r'(\d+)([pnuµμmkKMGTR])(\d+)([A-Za-zΩ]*)$')
+
+def parse_value(text: str) -> float:
+    # SI-prefixed quantity -> float in base units; the unit suffix is ignored
+    text = text.strip()
+    m = INFIX_RE.match(text)
+    if m:
+        whole, prefix, frac, _ = m.groups()
+        scale = 1.0 if prefix == 'R' else SI_PREFIXES[prefix]
+        return float(f"{whole}.{frac}") * scale
+    m = VALUE_RE.match(text)
+    if not m:
+        raise ValueError(f"Cannot parse value '{text}'")
+    number, prefix, _ = m.groups()
+    return float(number) * SI_PREFIXES[prefix.lower() if prefix.lower() == 'meg' else prefix]
+
+def format_value(value: float, unit: str = '', digits: int = 3) -> str:
+    # 0.0033, 'A' -> '3.3 mA'
+    if value == 0 or not math.isfinite(value):
+        return f"{value:g} {unit}".strip()
+    exponent = max(-5, min(4, math.floor(math.log10(abs(value)) / 3)))
+    scaled = value / 1000 ** exponent
+    return f"{scaled:.{digits}g} {_DISPLAY_PREFIXES[exponent + 5]}{unit}".strip()
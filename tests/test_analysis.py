@@ -0,0 +1,181 @@
+import math
+import random
+import pytest
+from tecd import analysis, compile
+from tecd.analysis import AnalysisError, _solve_dense, _solve_sweep, ac_sweep, dc_operating_point, log_frequencies
+from tecd.plot import bode_svg
+from tecd.sparse import SingularMatrixError, _eliminate, _solve_scipy, solve_symmetric
+from tecd.units import format_value, parse_value
+
+def solve(body):
+    return dc_operating_point(compile(f"@circuit\n{body}\n@end\n"))
+
+def by_name(op):
+    return {op.names[net]: volts for net, volts in op.voltages.items()}
+
+@pytest.mark.parametrize("text, value", [
+    ("1k", 1e3), ("10uF", 10e-6), ("5V", 5.0), ("1meg", 1e6), ("2M", 2e6),
+    ("3m", 3e-3), ("4k7", 4.7e3), ("4R7", 4.7), ("100R", 100.0), ("1e-3", 1e-3),
+])
+def test_parse_value(text, value):
+    assert parse_value(text) == pytest.approx(value)
+
+def test_format_value():
+    assert format_value(0.0033, 'A') == '3.3 mA'
+    assert format_value(4700, 'Ω') == '4.7 kΩ'
+
+def test_voltage_divider():
+    op = solve("""
+VDC V1 (dc=9V)
+RES R1 (value=2k)
+RES R2 (value=1k)
+V1.+ -> R1 -> Out
+Out -> R2 -> GND
+V1.- -> GND
+""")
+    assert by_name(op)["Out"] == pytest.approx(3.0)
+    assert op.currents["R1"] == pytest.approx(3e-3)
+    # Supplied out of the + terminal
+    assert op.currents["V1"] == pytest.approx(3e-3)
+
+def test_current_source_and_stacked_sources():
+    # I1 pushes 1 mA out of its '-' pin into the 1k; V2 sits on top of V1
+    op = solve("""
+IDC I1 (dc=1mA)
+RES R1 (value=1k)
+VDC V1 (dc=2V)
+VDC V2 (dc=3V)
+RES R2 (value=500)
+I1.+ -> GND
+I1.- -> A
+A -> R1 -> GND
+V1.- -> GND
+V1.+ -> V2.-
+V2.+ -> B
+B -> R2 -> GND
+""")
+    volts = by_name(op)
+    assert volts["A"] == pytest.approx(1.0)
+    assert volts["B"] == pytest.approx(5.0)
+    assert op.currents["V1"] == pytest.approx(10e-3)
+    assert op.currents["V2"] == pytest.approx(10e-3)
+
+def test_floating_net_is_reported():
+    # Mid only reaches the rest of the circuit through capacitors
+    with pytest.raises(AnalysisError, match="'Mid' has no DC path"):
+        solve("""
+VDC V1 (dc=1V)
+CAP C1 (value=1uF)
+CAP C2 (value=1uF)
+V1.+ -> C1 -> Mid
+Mid -> C2 -> GND
+V1.- -> GND
+""")
+
+def test_source_loop_and_unsupported_types():
+    with pytest.raises(AnalysisError, match="loop"):
+        solve("VDC V1 (dc=1V)\nVDC V2 (dc=2V)\nV1.+ -> V2.+\nV1.- -> GND\nV2.- -> GND")
+    with pytest.raises(AnalysisError, match="DIODE"):
+        solve("VDC V1 (dc=1V)\nDIODE D1\nV1.+ -> D1 -> GND\nV1.- -> GND")
+
+def mesh(k):
+    # k x k grid of unit conductances, one corner grounded through a 1 S leg
+    rows = [{} for _ in range(k * k)]
+    def link(a, b):
+        for i, j in ((a, b), (b, a)):
+            rows[i][i] = rows[i].get(i, 0.0) + 1.0
+            rows[i][j] = rows[i].get(j, 0.0) - 1.0
+    for r in range(k):
+        for c in range(k):
+            if c + 1 < k:
+                link(r * k + c, r * k + c + 1)
+            if r + 1 < k:
+                link(r * k + c, (r + 1) * k + c)
+    rows[0][0] += 1.0
+    rhs = [0.0] * (k * k)
+    rhs[-1] = 1.0
+    return rows, rhs
+
+def test_sparse_solver_on_mesh():
+    rows, rhs = mesh(30)
+    x = solve_symmetric(rows, rhs)
+    residual = max(abs(sum(v * x[j] for j, v in row.items()) - b) for row, b in zip(rows, rhs))
+    assert residual < 1e-9
+
+def test_singular_matrix():
+    with pytest.raises(SingularMatrixError):
+        solve_symmetric([{0: 1.0, 1: -1.0}, {0: -1.0, 1: 1.0}], [1.0, -1.0])
+
+def test_scipy_solver_matches_elimination():
+    scipy = pytest.importorskip("scipy")
+    import scipy.sparse.linalg
+    rows, rhs = mesh(30)
+    assert _solve_scipy(rows, rhs, scipy) == pytest.approx(_eliminate(rows, rhs), rel=1e-9, abs=1e-12)
+    # SuperLU does not locate the failure; the elimination is asked instead
+    singular = [{0: 1.0}, {1: 1.0, 2: -1.0}, {1: -1.0, 2: 1.0}]
+    with pytest.raises(SingularMatrixError) as error:
+        _solve_scipy(singular, [0.0, 1.0, -1.0], scipy)
+    assert error.value.index in (1, 2)
+
+def test_ac_sweep_rc_lowpass():
+    # fc = 1 / (2 pi R C) = 1 kHz; '-' of the VAC is left for ground
+    graph = compile("""@circuit
+VAC Vin (ac=2V)
+RES R1 (value=1k)
+CAP C1 (value=159.155nF)
+Vin -> R1 -> Out
+Out -> C1 -> GND
+@end
+""")
+    response = ac_sweep(graph, [10.0, 1000.0, 100e3])
+    ids = {name: net for net, name in response.names.items()}
+    gains, phases = response.bode(ids["Out"])
+    assert gains[0] == pytest.approx(0.0, abs=1e-3)
+    assert gains[1] == pytest.approx(-3.0103, abs=1e-3)
+    assert phases[1] == pytest.approx(-45.0, abs=1e-3)
+    assert gains[2] == pytest.approx(-40.0, abs=0.01)
+
+def test_ac_sweep_series_resonance():
+    # Inductor voltage peaks at Q = sqrt(L/C)/R = 10 when f = 1/(2 pi sqrt(LC))
+    graph = compile("""@circuit
+VAC V1
+RES R1 (value=10)
+CAP C1 (value=1uF)
+IND L1 (value=10mH)
+V1.+ -> R1 -> C1 -> A
+A -> L1 -> GND
+V1.- -> GND
+@end
+""")
+    f0 = 1 / (2 * math.pi * math.sqrt(10e-3 * 1e-6))
+    response = ac_sweep(graph, log_frequencies(f0 / 10, f0 * 10, 3))
+    ids = {name: net for net, name in response.names.items()}
+    gains, _ = response.bode(ids["A"])
+    assert gains[1] == pytest.approx(20.0, abs=1e-6)
+    assert bode_svg(response.frequencies, {"A": response.bode(ids["A"])}).count("<polyline") == 2
+
+def test_batched_sweep_matches_dense(monkeypatch):
+    pytest.importorskip("numpy")
+    rng = random.Random(7)
+    n = 12
+    G = [[-rng.random() if i != j else 0.0 for j in range(n)] for i in range(n)]
+    G = [[(G[i][j] + G[j][i]) / 2 for j in range(n)] for i in range(n)]
+    for i in range(n):
+        G[i][i] = 1.0 - sum(G[i])  # Diagonally dominant: every node reaches ground
+    C = [[rng.random() * 1e-6 if i == j else 0.0 for j in range(n)] for i in range(n)]
+    b = [complex(rng.random(), 0.0) for _ in range(n)]
+    frequencies = log_frequencies(10.0, 1e6, 25)
+    omegas = [2 * math.pi * f for f in frequencies]
+    # Several stacked chunks, the last one partial
+    monkeypatch.setattr(analysis, "AC_BATCH_BYTES", 16 * n * n * 4)
+    batched = _solve_sweep(G, C, b, omegas, frequencies)
+    for x, w, f in zip(batched, omegas, frequencies):
+        assert x == pytest.approx(_solve_dense(G, C, b, w, f), rel=1e-9, abs=1e-12)
+
+def test_batched_sweep_reports_singular_frequency():
+    pytest.importorskip("numpy")
+    # A floating node: singular at every frequency, reported by the dense re-solve
+    G = [[1.0, 0.0], [0.0, 0.0]]
+    C = [[0.0, 0.0], [0.0, 0.0]]
+    with pytest.raises(AnalysisError, match="singular at 10 Hz"):
+        _solve_sweep(G, C, [1.0, 0.0], [2 * math.pi * 10.0], [10.0])
@@ -0,0 +1,58 @@
+from tecd import compile
+from tecd.blocks import block_outputs, block_source, render_blocks, scan_blocks
+from tecd.parser import parse
+from tecd.topology import layout_cache
+
+SOURCE = """@subcircuit RC (in, out)
+RES R1
+in -> R1 -> out
+@end
+
+@circuit first
+@options
+  layout = vertical
+@end
+VDC V1
+RC X1
+V1 -> X1 -> GND
+@end
+
+# @circuit in a comment is not a block
+@circuit
+RES R1
+R1 -> GND
+@end
+"""
+
+def test_scan_blocks():
+    blocks = scan_blocks(SOURCE)
+    assert [(b.name, b.line) for b in blocks] == [("first", 6), (None, 16)]
+    assert SOURCE[blocks[1].start:blocks[1].end].splitlines()[-1] == "@end"
+    assert block_outputs(blocks, "out/page.svg") == ["out/page-first.svg", "out/page-2.svg"]
+
+def test_block_source_keeps_definitions_and_lines():
+    blocks = scan_blocks(SOURCE)
+    second = block_source(SOURCE, blocks, 1)
+    assert second.count("\n") == SOURCE.count("\n")
+    ast = parse(second)
+    assert ast.name is None and "RC" in ast.subcircuits
+    assert ast.components[0].location.line == 17
+
+    first = compile(block_source(SOURCE, blocks, 0))
+    assert set(first.components) == {"V1", "X1", "GND"}
+    assert first.options["layout"] == "vertical"
+
+def test_render_blocks(tmp_path):
+    results = render_blocks(SOURCE, None, str(tmp_path / "page.svg"), jobs=1)
+    assert [error for _, error in results] == [None, None]
+    assert (tmp_path / "page-first.svg").read_text().startswith("<svg")
+    assert (tmp_path / "page-2.svg").exists()
+
+def test_pooled_blocks_report_layout_reuse(tmp_path):
+    # Three copies of one topology over two workers: at least one worker
+    # lays the circuit out twice, and that hit must reach this process
+    copy = "@circuit {}\nVDC V1 (dc=5V)\nRES R1 (value=1k)\nV1 -> R1 -> GND\n@end\n"
+    layout_cache.clear()
+    results = render_blocks("".join(copy.format(name) for name in "abc"), None, str(tmp_path / "rc.svg"), jobs=2)
+    assert [error for _, error in results] == [None] * 3
+    assert layout_cache.hits >= 1
@@ -0,0 +1,44 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+import pytest
+from tecd.cli import check_command
+
+SRC = str(Path(__file__).parent.parent / "src")
+# Cumulative import time of tecd.cli, in microseconds (benchmark only)
+IMPORT_BUDGET_US = 400_000
+DEFERRED = ("tecd.layout", "tecd.renderer", "tecd.symbols", "tecd.routing", "concurrent.futures")
+
+def cli_import_times():
+    # Module -> cumulative import time (us) for a fresh `import tecd.cli`
+    env = dict(os.environ, PYTHONPATH=SRC)
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import tecd.cli"],
+                            capture_output=True, text=True, env=env, check=True)
+    cumulative = {}
+    for line in result.stderr.splitlines():
+        if line.startswith("import time:") and "|" in line:
+            _, cum, name = line[len("import time:"):].split("|")
+            if cum.strip().isdigit():
+                cumulative[name.strip()] = int(cum)
+    return cumulative
+
+def test_cli_import_defers_heavy_modules():
+    cumulative = cli_import_times()
+    for module in DEFERRED:
+        assert module not in cumulative, f"{module} imported by tecd.cli"
+
+@pytest.mark.benchmark
+def test_cli_import_time():
+    assert cli_import_times()["tecd.cli"] < IMPORT_BUDGET_US
+
+def test_check_command(tmp_path, capsys):
+    good = tmp_path / "good.tecd"
+    good.write_text("@circuit\nVDC V1\nRES R1\nV1 -> R1 -> GND\n@end\n")
+    bad = tmp_path / "bad.tecd"
+    bad.write_text("@circuit\nRES R1\nRES R1\n@end\n")
+
+    assert check_command([str(good)])
+    assert "ok (1 circuit(s), 3 components" in capsys.readouterr().out
+    assert not check_command([str(good), str(bad)])
+    assert "bad.tecd: error: Duplicate component name 'R1'" in capsys.readouterr().out
@@ -0,0 +1,68 @@
+import pytest
+from tecd import compile
+
+BRIDGE = """
+@circuit
+VDC Vs (v=10V)
+RES R1 (v=1k)
+RES R2 (v=1k)
+RES R3 (v=1k)
+Vs.+ -> Top
+Vs.- -> GND
+Top -> R1 -> Mid
+Mid -> R2 -> GND
+Top -> R3 -> GND
+RES Lonely (v=1)
+@end
+"""
+
+def test_net_membership_matches_graph():
+    graph = compile(BRIDGE)
+    conn = graph.connectivity
+    assert conn.num_nets == len(graph.nets)
+
+    for net_id, net in enumerate(graph.nets):
+        pins = [(conn.component_names[conn.pin_component[p]], conn.pin_names[p]) for p in conn.net_pins(net_id)]
+        assert pins == [(p.component.name, p.pin_name) for p in net.points]
+        assert all(conn.pin_net[p] == net_id for p in conn.net_pins(net_id))
+
+def test_adjacency_and_traversals():
+    graph = compile(BRIDGE)
+    conn = graph.connectivity
+    idx = conn.component_index
+
+    neighbors = {conn.component_names[n] for n in conn.neighbors(idx["R1"])}
+    assert neighbors == {"Vs", "R3", "Top", "R2", "Mid"}
+    assert conn.degree()[idx["Lonely"]] == 0
+
+    ranks = conn.bfs_ranks([idx["Vs"]])
+    assert ranks[idx["Vs"]] == 0
+    assert ranks[idx["R1"]] == 1
+    assert ranks[idx["Lonely"]] == -1
+
+    count, labels = conn.connected_components()
+    assert count == 2
+    assert labels[idx["R2"]] == labels[idx["Vs"]] != labels[idx["Lonely"]]
+
+def test_rail_nets_stay_linear():
+    lines = ["@circuit"]
+    for i in range(200):
+        lines.append(f"RES R{i} (v=1k)")
+        lines.append(f"R{i}.left -> GND")
+    lines.append("@end")
+    conn = compile("\n".join(lines)).connectivity
+    # A 201-member net becomes a star, not a 201-clique
+    assert len(conn.adj_indices) == 2 * 200
+    count, _ = conn.connected_components()
+    assert count == 1
+
+def test_numpy_views():
+    numpy = pytest.importorskip("numpy")
+    conn = compile(BRIDGE).connectivity
+    arrays = conn.as_numpy()
+    for name, view in arrays.items():
+        assert view.dtype == numpy.int64
+        assert view.tolist() == list(getattr(conn, name))
+    # Views, not copies
+    conn.pin_net[0] += 100
+    assert arrays['pin_net'][0] == conn.pin_net[0]
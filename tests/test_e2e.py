@@ -160,3 +160,112 @@ def test_unknown_component_type():
     # likely at parser unexpected token LPAREN or earlier
     with pytest.raises(Exception):
         compile_source(unknown_type)
+
+def test_array_expansion():
+    source = """
+    @circuit
+    DIODE D[0..2]
+    RES R[0..3] (value=1k)
+    D[i] -> R[i] -> GND
+    R[i] -> R[i+1]
+    CAP C[0..1]
+    C[0..1] -> R[2..3]
+    @end
+    """
+    graph = compile_source(source)
+    assert {"D[0]", "D[2]", "R[3]", "C[1]"} <= set(graph.components)
+    assert "D[3]" not in graph.components
+    assert graph.components["R[3]"].parameters == {"value": "1k"}
+
+    def net_of(name, pin):
+        return next(net for net in graph.nets if any(p.component.name == name and p.pin_name == pin for p in net.points))
+    assert net_of("D[1]", "cathode") is net_of("R[1]", "left")
+    assert net_of("R[0]", "right") is net_of("R[1]", "left")
+    assert net_of("C[1]", "bottom") is net_of("R[3]", "left")
+
+def test_array_index_without_array():
+    source = """
+    @circuit
+    N[i] -> GND
+    @end
+    """
+    with pytest.raises(SemanticError):
+        compile_source(source)
+
+def test_array_index_out_of_range():
+    source = """
+    @circuit
+    RES R[0..3]
+    CAP C[0..3]
+    R[i] -> C[i+10]
+    @end
+    """
+    with pytest.raises(SemanticError, match="line 5"):
+        compile_source(source)
+
+SUBCIRCUIT_SOURCE = """
+@subcircuit RC (in, out)
+RES R1 (value=1k)
+CAP C1 (value=1uF)
+in -> R1 -> out
+out -> C1 -> GND
+@end
+
+@circuit
+VDC V1 (dc=5V)
+RC X1
+RC X2
+V1 -> X1 -> X2.in
+X2.out -> GND
+@end
+"""
+
+def test_subcircuit_instances():
+    from tecd.registry import use_types
+    from tecd.symbols import get_symbol
+    graph = compile_source(SUBCIRCUIT_SOURCE)
+    assert set(graph.components) == {"V1", "X1", "X2", "GND"}
+    with use_types(graph.types):
+        assert set(get_symbol("RC").pins) == {"in", "out"}
+    pins = {(p.component.name, p.pin_name) for net in graph.nets for p in net.points}
+    assert {("X1", "in"), ("X1", "out"), ("X2", "in"), ("X2", "out")} <= pins
+
+def test_subcircuit_types_stay_with_their_circuit():
+    # A block type defined by one file is not visible to the next compile
+    compile_source(SUBCIRCUIT_SOURCE)
+    with pytest.raises(SemanticError, match="Unknown component type 'RC'"):
+        compile_source("""
+        @circuit
+        RC X9
+        X9.in -> GND
+        @end
+        """)
+    from tecd.layout import compute_layout
+    from tecd.renderer import render_svg
+    graph = compile_source(SUBCIRCUIT_SOURCE)
+    assert render_svg(graph, compute_layout(graph)).count('font-size="8">RC</text>') == 2
+
+def test_subcircuit_compiled_once():
+    from tecd.parser import parse
+    from tecd.subcircuit import compile_subcircuit
+    first = parse(SUBCIRCUIT_SOURCE).subcircuits["RC"]
+    # Same definition further down the file: same digest, same compiled body
+    second = parse("\n\n" + SUBCIRCUIT_SOURCE).subcircuits["RC"]
+    assert first.digest == second.digest
+    assert compile_subcircuit(first) is compile_subcircuit(second)
+
+def test_subcircuit_flatten():
+    graph = compile(SUBCIRCUIT_SOURCE, flatten=True)
+    assert {"X1/R1", "X1/C1", "X2/R1", "X2/C1"} <= set(graph.components)
+    assert "X1" not in graph.components
+
+    def net_of(name, pin):
+        return next(net for net in graph.nets if any(p.component.name == name and p.pin_name == pin for p in net.points))
+    assert net_of("V1", "+") is net_of("X1/R1", "left")
+    assert net_of("X1/R1", "right") is net_of("X2/R1", "left")
+    assert net_of("X1/C1", "bottom") is net_of("GND", "0")
+
+def test_subcircuit_unknown_port():
+    source = SUBCIRCUIT_SOURCE.replace("X2.out -> GND", "X2.vcc -> GND")
+    with pytest.raises(SemanticError):
+        compile_source(source)
@@ -0,0 +1,96 @@
+import io
+import json
+import pytest
+from tecd import compile
+from tecd import emit as emit_module
+from tecd.blocks import render_blocks
+from tecd.cli import main
+from tecd.emit import emit, emit_paths, layout_document
+from tecd.layout import compute_layout
+from tecd.routing import route_nets
+from tecd.spice import SpiceImporter, write_spice
+
+SOURCE = """
+@circuit
+VDC V1 (dc=5V)
+RES R1 (value=10k)
+CAP C1 (value=100n)
+NPN Q1
+V1 -> R1 -> N1 -> C1 -> GND
+N1 -> Q1.B
+Q1.C -> V1
+Q1.E -> GND
+@end
+"""
+
+def compiled():
+    graph = compile(SOURCE)
+    layout = compute_layout(graph)
+    return graph, layout, route_nets(graph, layout)
+
+def test_emit_writes_every_format_from_one_layout(tmp_path):
+    graph, layout, routes = compiled()
+    paths = emit_paths(str(tmp_path / "amp.svg"), ["svg", "json", "netlist"])
+    assert paths == {"svg": str(tmp_path / "amp.svg"), "json": str(tmp_path / "amp.json"), "netlist": str(tmp_path / "amp.cir")}
+
+    assert emit(graph, layout, routes, paths) == {"svg": None, "json": None, "netlist": None}
+    assert (tmp_path / "amp.svg").read_text().startswith("<svg")
+    document = json.loads((tmp_path / "amp.json").read_text())
+    assert document == json.loads(json.dumps(layout_document(graph, layout, routes)))
+    placed = {c["name"]: (c["x"], c["y"]) for c in document["components"]}
+    assert placed == {pc.component.name: (pc.x, pc.y) for pc in layout.components}
+
+def test_parallel_emission_matches_serial(tmp_path):
+    graph, layout, routes = compiled()
+    serial = emit_paths(str(tmp_path / "a.svg"), ["svg", "json", "netlist"])
+    parallel = emit_paths(str(tmp_path / "b.svg"), ["svg", "json", "netlist"])
+    emit(graph, layout, routes, serial)
+    emit(graph, layout, routes, parallel, parallel=True)
+    for name in serial:
+        assert open(serial[name]).read() == open(parallel[name]).read()
+
+def test_unknown_format_is_rejected(tmp_path, capsys):
+    graph, layout, routes = compiled()
+    with pytest.raises(ValueError, match="pdf"):
+        emit(graph, layout, routes, {"pdf": str(tmp_path / "x.pdf")})
+    with pytest.raises(ValueError, match="pdf"):
+        emit_paths(str(tmp_path / "x.svg"), ["svg", "pdf"])
+    # The command line refuses it before compiling anything
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "missing.tecd"), str(tmp_path / "x.svg"), "--emit", "svg,pdf"])
+    assert "unknown --emit format(s): pdf" in capsys.readouterr().err
+
+def test_netlist_round_trips_through_spice_import():
+    graph = compile(SOURCE)
+    out = io.StringIO()
+    write_spice(graph, out)
+    deck = out.getvalue()
+    assert deck.rstrip().endswith(".end")
+
+    imported = SpiceImporter().import_stream(io.StringIO(deck))
+    assert {name: comp.type_name for name, comp in imported.components.items() if name != "GND"} == \
+        {"V1": "VDC", "R1": "RES", "C1": "CAP", "Q1": "NPN"}
+    nets = [{(p.component.name, p.pin_name) for p in net.points} for net in imported.nets]
+    assert {("R1", "right"), ("C1", "top"), ("Q1", "B")} in nets
+    assert {("GND", "0"), ("C1", "bottom"), ("Q1", "E")} in nets
+
+def test_cli_emit(tmp_path, capsys):
+    source = tmp_path / "amp.tecd"
+    source.write_text(SOURCE)
+    main([str(source), str(tmp_path / "amp.svg"), "--emit", "json,netlist", "--emit-parallel"])
+    assert (tmp_path / "amp.json").exists() and (tmp_path / "amp.cir").exists()
+    assert not (tmp_path / "amp.svg").exists()
+    assert "Saved to" in capsys.readouterr().out
+
+def test_blocks_pass_emit_options(tmp_path, monkeypatch):
+    calls = []
+    real = emit_module.emit
+    def spy(graph, layout, routes, paths, parallel=False):
+        calls.append((sorted(paths), parallel))
+        return real(graph, layout, routes, paths, parallel)
+    monkeypatch.setattr(emit_module, "emit", spy)
+    source = SOURCE.replace("@circuit", "@circuit a") + SOURCE.replace("@circuit", "@circuit b")
+    results = render_blocks(source, None, str(tmp_path / "amp.svg"), jobs=1, formats=["svg", "json"], emit_parallel=True)
+    assert [error for _, error in results] == [None, None]
+    assert calls == [(["json", "svg"], True)] * 2
+    assert (tmp_path / "amp-a.json").exists() and (tmp_path / "amp-b.svg").exists()
@@ -0,0 +1,67 @@
+import time
+import pytest
+from tecd import compile
+from tecd.cli import check_source
+from tecd.erc import ERROR, WARNING, check
+from tecd.semantics import SemanticError
+
+def rules(source):
+    return {(v.rule, v.location.line if v.location else None) for v in check(compile(f"@circuit\n{source}\n@end\n"))}
+
+def test_clean_circuit():
+    # A single-ended source (only '+' wired) is referenced to ground
+    assert rules("VDC V1\nRES R1\nRES R2\nV1 -> R1 -> Out\nOut -> R2 -> GND") == set()
+
+def test_violations_with_locations():
+    found = rules("""VDC V1
+VDC V2
+RES R1
+RES R2
+V1.+ -> V1.left
+V2 -> R1 -> Dangle
+R2.bogus -> GND""")
+    # '+' and 'left' are one pin, so V1 is not shorted, just ungrounded
+    assert found == {
+        ('no-ground-path', 2),
+        ('no-ground-path', 3),
+        ('single-pin-net', 4),
+        ('unknown-pin', 5),
+        ('unconnected', 5),
+    }
+
+def test_unknown_type_reported_with_other_violations():
+    source = "@circuit\nFOO U1\nRES R1\nRES R2\nVDC V1\nV1 -> U1 -> R1 -> GND\nR2.left -> GND\n@end\n"
+    _, _, _, violations = check_source(source)
+    assert {(v.rule, v.location.line) for v in violations} == {('unknown-type', 2), ('floating-pin', 4)}
+    # Rendering still needs every type to be known
+    with pytest.raises(SemanticError, match="Unknown component type 'FOO'"):
+        compile(source)
+
+def test_unknown_type_in_imported_graph():
+    # Graphs from elsewhere (importers, plugins not loaded) can carry them too
+    graph = compile("@circuit\nRES R1\nR1 -> GND\n@end\n")
+    graph.components["R1"].type_name = "FUSE"
+    assert [v.rule for v in check(graph)] == ['unknown-type']
+
+def test_shorted_source_and_floating_pins():
+    violations = check(compile("@circuit\nVDC V1\nNPN Q1\nV1.+ -> V1.- -> GND\nQ1.B -> GND\n@end\n"))
+    by_rule = {v.rule: v for v in violations}
+    assert by_rule['shorted-source'].severity == ERROR
+    assert by_rule['floating-pin'].severity == WARNING
+    assert "'C', 'E'" in by_rule['floating-pin'].message
+    assert by_rule['shorted-source'].format("a.tecd").startswith("a.tecd:2:1: error: ")
+
+def ladder(n):
+    lines = ["VDC V1", f"RES R[0..{n - 1}] (value=1k)", "V1 -> R[0]", f"R[{n - 1}] -> GND", "R[i].right -> R[i+1].left"]
+    return compile("@circuit\n" + "\n".join(lines) + "\n@end\n")
+
+def test_long_ladder_is_clean():
+    assert check(ladder(2000)) == []
+
+@pytest.mark.benchmark
+def test_linear_time():
+    # A long ladder: the check must stay well under the cost of analysis
+    graph = ladder(20000)
+    start = time.perf_counter()
+    assert check(graph) == []
+    assert time.perf_counter() - start < 2.0
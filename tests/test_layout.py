@@ -0,0 +1,57 @@
+import pytest
+from tecd import compile
+from tecd.layout import GRID_SIZE, SYMBOL_PADDING, compute_layout, resolve_overlaps, symbol_footprint
+from tecd.symbols import get_symbol
+
+def test_resolve_overlaps_moves_to_nearest_free_cell():
+    positions = {"A": (80, 80), "B": (80, 80), "C": (80, 80), "D": (400, 400)}
+    footprints = {n: (0, 0) for n in positions}
+    resolved = resolve_overlaps(positions, footprints, ["A", "B", "C", "D"])
+
+    assert resolved["A"] == (80, 80)
+    assert resolved["D"] == (400, 400)
+    cells = {(x // GRID_SIZE, y // GRID_SIZE) for x, y in resolved.values()}
+    assert len(cells) == 4
+    for node in ("B", "C"):
+        x, y = resolved[node]
+        assert max(abs(x - 80), abs(y - 80)) == GRID_SIZE
+
+def test_resolve_overlaps_respects_footprint():
+    positions = {"big": (0, 0), "small": (GRID_SIZE, 0)}
+    footprints = {"big": (1, 1), "small": (0, 0)}
+    resolved = resolve_overlaps(positions, footprints, ["big", "small"])
+    x, y = resolved["small"]
+    assert max(abs(x), abs(y)) >= 2 * GRID_SIZE
+
+@pytest.mark.parametrize("type_name", ["NAND", "RES"])
+def test_adjacent_symbols_are_separated(type_name):
+    # Bodies wider than a cell, snapped to neighbouring cells
+    footprint = symbol_footprint(type_name)
+    resolved = resolve_overlaps({"A": (80, 80), "B": (80 + GRID_SIZE, 80)},
+                                {"A": footprint, "B": footprint}, ["A", "B"])
+    symbol = get_symbol(type_name)
+    (ax, ay), (bx, by) = resolved["A"], resolved["B"]
+    assert (abs(ax - bx) >= symbol.width + 2 * SYMBOL_PADDING
+            or abs(ay - by) >= symbol.height + 2 * SYMBOL_PADDING)
+
+def test_symbol_footprint_rotates():
+    assert symbol_footprint("NAND", 0) == symbol_footprint("NAND", 90)[::-1]
+
+def test_force_layout_has_no_stacked_symbols():
+    graph = compile("""
+    @circuit
+    VDC V1 (dc=5V)
+    VDC V2 (dc=3V)
+    RES R1 (v=1k)
+    RES R2 (v=1k)
+    RES R3 (v=1k)
+    CAP C1 (v=1u)
+    V1 -> R1 -> N1
+    V2 -> R2 -> N1
+    N1 -> R3 -> GND
+    N1 -> C1 -> GND
+    @end
+    """)
+    layout = compute_layout(graph)
+    cells = [(round(pc.x / GRID_SIZE), round(pc.y / GRID_SIZE)) for pc in layout.components]
+    assert len(cells) == len(set(cells))
@@ -0,0 +1,57 @@
+import json
+import random
+from tecd import compile
+from tecd.cli import stats_command
+from tecd.layout import compute_layout
+from tecd.metrics import count_bends, count_crossings, measure
+from tecd.routing import Route, route_nets
+
+def brute_crossings(routes):
+    def orient(a, b, c):
+        return (b[0] - a[0]) * (c[1] - a[1]) - (b[1] - a[1]) * (c[0] - a[0])
+    segments = [(n, seg) for n, route in enumerate(routes) for seg in route.segments()]
+    count = 0
+    for i, (n1, (a, b)) in enumerate(segments):
+        for n2, (c, d) in segments[i + 1:]:
+            if n1 != n2 and orient(a, b, c) * orient(a, b, d) < 0 and orient(c, d, a) * orient(c, d, b) < 0:
+                count += 1
+    return count
+
+def test_sweep_matches_pairwise_crossings():
+    rng = random.Random(3)
+    for _ in range(200):
+        routes = []
+        for n in range(rng.randint(1, 5)):
+            line = [(rng.randint(0, 8) * 10, rng.randint(0, 8) * 10)]
+            for _ in range(rng.randint(1, 4)):
+                x, y = line[-1]
+                kind = rng.random()
+                x = rng.randint(0, 8) * 10 if kind < 0.4 or kind > 0.8 else x
+                y = rng.randint(0, 8) * 10 if kind >= 0.4 else y
+                line.append((x, y))
+            routes.append(Route(f"n{n}", [line]))
+        assert count_crossings(routes) == brute_crossings(routes)
+
+def test_touching_wires_do_not_cross():
+    routes = [Route("A", [[(0, 0), (10, 0)]]), Route("B", [[(10, -5), (10, 5)]]), Route("C", [[(5, 0), (5, 5)]])]
+    assert count_crossings(routes) == 0
+
+def test_bends_count_direction_changes():
+    assert count_bends([Route("A", [[(0, 0), (10, 0), (20, 0), (20, 10), (30, 10)]])]) == 2
+
+def test_measure_and_stats_command(tmp_path, capsys):
+    source = "@circuit\n@options\n  layout = horizontal\n@end\nVDC V1\nRES R1\nRES R2\nV1 -> R1 -> R2 -> GND\n@end\n"
+    graph = compile(source)
+    layout = compute_layout(graph)
+    routes = route_nets(graph, layout)
+    metrics = measure(layout, routes)
+    assert metrics.components == len(layout.components)
+    assert metrics.overlaps == 0
+    assert metrics.total_length == sum(r.length for r in routes)
+    assert metrics.width > 0 and metrics.aspect == metrics.width / metrics.height
+
+    path = tmp_path / "divider.tecd"
+    path.write_text(source)
+    assert stats_command([str(path), "--json"])
+    data = json.loads(capsys.readouterr().out)
+    assert data["crossings"] == metrics.crossings and data["overlaps"] == 0
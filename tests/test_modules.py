@@ -0,0 +1,66 @@
+import os
+import pytest
+from tecd import compile
+from tecd.modules import DependencyGraph, load_module
+from tecd.parser import parse
+
+BASE = """
+@subcircuit RC (in, out)
+RES R1 (value=1k)
+CAP C1
+in -> R1 -> out
+out -> C1 -> GND
+@end
+"""
+
+MAIN = """
+@include "lib/base.tecd"
+@circuit
+VDC V1
+RC X1
+V1 -> X1 -> GND
+@end
+"""
+
+def write(path, text, mtime=None):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text)
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+    return str(path)
+
+def test_include_is_parsed_once(tmp_path):
+    lib = write(tmp_path / "lib" / "base.tecd", BASE, mtime=1000)
+    main = write(tmp_path / "main.tecd", MAIN)
+
+    ast = parse(MAIN, main)
+    assert "RC" in ast.subcircuits
+    assert ast.dependencies == [os.path.abspath(lib)]
+    assert load_module(lib) is load_module(lib)
+    assert set(compile(MAIN, path=main).components) == {"V1", "X1", "GND"}
+
+    # A new mtime invalidates the cached module
+    module = load_module(lib)
+    write(tmp_path / "lib" / "base.tecd", BASE.replace("1k", "2k"), mtime=2000)
+    assert load_module(lib) is not module
+
+def test_recursive_include(tmp_path):
+    write(tmp_path / "a.tecd", '@include "b.tecd"\n')
+    write(tmp_path / "b.tecd", '@include "a.tecd"\n')
+    with pytest.raises(SyntaxError):
+        load_module(str(tmp_path / "a.tecd"))
+
+def test_dependency_graph_rebuilds_affected_roots(tmp_path):
+    lib = write(tmp_path / "lib" / "base.tecd", BASE, mtime=1000)
+    main = write(tmp_path / "main.tecd", MAIN, mtime=1000)
+    other = write(tmp_path / "other.tecd", "@circuit\n@end\n", mtime=1000)
+
+    graph = DependencyGraph()
+    graph.update(main, parse(MAIN, main).dependencies)
+    graph.update(other, [])
+    assert graph.changed() == []
+
+    os.utime(lib, (2000, 2000))
+    assert graph.changed() == [os.path.abspath(main)]
+    os.utime(other, (2000, 2000))
+    assert graph.changed() == [os.path.abspath(other)]
@@ -0,0 +1,55 @@
+import math
+from tecd import compile, layout as layout_module, multilevel
+from tecd.layout import GRID_SIZE, MULTILEVEL_THRESHOLD, compute_layout
+from tecd.multilevel import _Level, _coarsen, multilevel_layout
+
+def mesh(side: int) -> str:
+    # Resistor grid between named junctions: nothing reduces to series/parallel
+    lines, count = ["@circuit", "VDC V1 (dc=1V)"], 0
+    for y in range(side):
+        for x in range(side):
+            for nx, ny in ((x + 1, y), (x, y + 1)):
+                if nx < side and ny < side:
+                    lines.insert(2, f"RES R{count} (value=1k)")
+                    lines.append(f"N{x}_{y} -> R{count} -> N{nx}_{ny}")
+                    count += 1
+    lines += ["V1 -> N0_0", f"N{side - 1}_{side - 1} -> GND", "@end"]
+    return "\n".join(lines)
+
+def test_coarsening_halves_a_path_and_keeps_pins():
+    n = 64
+    adjacency = [{v: 1.0 for v in (u - 1, u + 1) if 0 <= v < n} for u in range(n)]
+    pinned = [(0.0, 0.0)] + [None] * (n - 1)
+    coarse = _coarsen(_Level(adjacency, [1.0] * n, pinned))
+    assert len(coarse.mass) <= n // 2 + 1
+    assert sum(coarse.mass) == n
+    assert coarse.pinned.count((0.0, 0.0)) == 1 and coarse.mass[coarse.pinned.index((0.0, 0.0))] == 1
+
+def test_multilevel_layout_keeps_fixed_nodes_and_bounds():
+    names = [f"n{i}" for i in range(200)]
+    nets = [[names[i], names[i + 1]] for i in range(199)] + [names[::10]]
+    positions = multilevel_layout(names, nets, {"n0": (100, 300)}, 1600, 1200)
+    assert set(positions) == set(names)
+    assert positions["n0"] == (100, 300)
+    assert all(50 <= x <= 1550 and 50 <= y <= 1150 for x, y in positions.values())
+
+def test_large_force_layout_is_multilevel_and_unstacked(monkeypatch):
+    # Structural rather than timed: the large graph goes through the
+    # multilevel path, and each coarsening level shrinks it geometrically
+    calls, levels = [], []
+    def spy_layout(nodes, *args, **kwargs):
+        calls.append(len(nodes))
+        return multilevel_layout(nodes, *args, **kwargs)
+    def spy_coarsen(level):
+        levels.append(len(level.mass))
+        return _coarsen(level)
+    monkeypatch.setattr(layout_module, "multilevel_layout", spy_layout)
+    monkeypatch.setattr(multilevel, "_coarsen", spy_coarsen)
+
+    graph = compile(mesh(9))
+    assert sum(name.startswith("R") for name in graph.components) > MULTILEVEL_THRESHOLD
+    layout = compute_layout(graph, use_cache=False)
+    assert len(calls) == 1 and calls[0] > MULTILEVEL_THRESHOLD
+    assert 1 <= len(levels) <= math.ceil(math.log2(calls[0]))
+    cells = [(round(pc.x / GRID_SIZE), round(pc.y / GRID_SIZE)) for pc in layout.components]
+    assert len(cells) == len(set(cells))
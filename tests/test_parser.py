@@ -56,3 +56,23 @@ def test_parser_options():
     """
     graph = parse_text(text)
     assert graph.options["layout"] == "vertical"
+
+def test_parser_array_stays_compact():
+    text = """
+    @circuit
+    RES R[0..1023] (value=1k)
+    DIODE D[0..1023]
+    D[i] -> R[i+1]
+    R[5].left -> GND
+    @end
+    """
+    graph = parse_text(text)
+
+    assert len(graph.components) == 2
+    array = graph.components[0]
+    assert (array.name, array.start, array.stop) == ("R", 0, 1023)
+    conn = graph.connections[0]
+    assert conn.target.index.var == "i" and conn.target.index.offset == 1
+    # Literal subscripts name a single instance
+    assert graph.connections[1].source.component_name == "R[5]"
+    assert graph.connections[1].source.index is None
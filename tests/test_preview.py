@@ -0,0 +1,67 @@
+import asyncio
+import json
+import os
+from tecd.preview import PreviewServer, diff_elements, render_elements
+
+SOURCE = """@circuit
+@options
+  layout = horizontal
+@end
+VDC V1 (dc=5V)
+RES R1 (value=1k)
+RES R2 (value=2k)
+V1 -> R1 -> OUT -> R2 -> GND
+@end
+"""
+
+def test_value_edit_only_changes_that_component():
+    _, before, _ = render_elements(SOURCE)
+    _, after, _ = render_elements(SOURCE.replace("value=2k", "value=4k7"))
+    assert "w-OUT" in before and "c-R2" in before
+    changed, removed = diff_elements(before, after)
+    assert list(changed) == ["c-R2"] and removed == []
+    assert 'id="c-R2"' in changed["c-R2"] and ">4k7<" in changed["c-R2"]
+
+def test_removed_component_is_reported():
+    _, before, _ = render_elements(SOURCE)
+    _, after, _ = render_elements(SOURCE.replace("RES R2 (value=2k)\n", "").replace("OUT -> R2 -> GND", "OUT -> GND"))
+    _, removed = diff_elements(before, after)
+    assert "c-R2" in removed
+
+def test_event_stream_sends_snapshot_then_patches(tmp_path):
+    path = tmp_path / "divider.tecd"
+    path.write_text(SOURCE)
+
+    async def next_event(reader):
+        while True:
+            line = await asyncio.wait_for(reader.readline(), 5)
+            if line.startswith(b"data: "):
+                return json.loads(line[6:])
+
+    async def run():
+        preview = PreviewServer(str(path), poll=0.05)
+        watcher = asyncio.ensure_future(preview.watch())
+        while not preview.elements:
+            await asyncio.sleep(0.01)
+        listener = await asyncio.start_server(preview.handle, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(b"GET /events HTTP/1.1\r\n\r\n")
+        first = await next_event(reader)
+
+        path.write_text(SOURCE.replace("value=1k", "value=10k"))
+        os.utime(path, (1, 1))
+        patch = await next_event(reader)
+        path.write_text(SOURCE.replace("R1 (value=1k)", "R1 (value=1k"))
+        os.utime(path, (2, 2))
+        error = await next_event(reader)
+
+        writer.close()
+        watcher.cancel()
+        listener.close()
+        return first, patch, error
+
+    first, patch, error = asyncio.run(run())
+    assert first["full"] and "c-V1" in first["set"] and "w-OUT" in first["set"]
+    assert list(patch["set"]) == ["c-R1"] and patch["remove"] == []
+    assert "error" in error
@@ -0,0 +1,50 @@
+from tecd import compile
+from tecd.layout import GRID_SIZE, compute_layout
+from tecd.reduction import expand, reduce_series_parallel
+
+def ladder(n: int, bank: int) -> str:
+    lines = ["@circuit", "VDC V1 (dc=5V)"]
+    lines += [f"RES R{i} (value=1k)" for i in range(n)]
+    lines += [f"CAP C{i} (value=1u)" for i in range(bank)]
+    lines.append("V1 -> " + " -> ".join(f"R{i}" for i in range(n)) + " -> OUT")
+    lines += [f"OUT -> C{i} -> GND" for i in range(bank)]
+    lines.append("@end")
+    return "\n".join(lines)
+
+def test_chain_and_parallel_bank_collapse_to_one_supernode():
+    graph = compile(ladder(5, 3))
+    [node] = reduce_series_parallel(graph, list(graph.components))
+    assert node.units[:5] == [[f"R{i}"] for i in range(5)] or node.units[-5:] == [[f"R{i}"] for i in range(4, -1, -1)]
+    assert sorted(node.members) == sorted([f"R{i}" for i in range(5)] + ["C0", "C1", "C2"])
+    assert ["C0", "C1", "C2"] in node.units
+
+def test_junction_with_third_branch_splits_chain():
+    graph = compile("""
+    @circuit
+    VDC V1 (dc=5V)
+    RES R1 (value=1k)
+    RES R2 (value=1k)
+    RES R3 (value=1k)
+    RES R4 (value=1k)
+    V1 -> R1 -> N1 -> R2 -> GND
+    N1 -> R3 -> N2 -> R4 -> GND
+    @end
+    """)
+    nodes = reduce_series_parallel(graph, list(graph.components))
+    assert [sorted(node.members) for node in nodes] == [["R3", "R4"]]
+
+def test_expand_is_grid_aligned_and_upright():
+    graph = compile(ladder(4, 2))
+    [node] = reduce_series_parallel(graph, list(graph.components))
+    placed = expand(node, (400, 400), 180, GRID_SIZE)
+    assert set(placed) == set(node.members)
+    assert all(x % GRID_SIZE == 0 and y % GRID_SIZE == 0 and rotation == 0 for x, y, rotation in placed.values())
+    assert len({(x, y) for x, y, _ in placed.values()}) == len(placed)
+
+def test_force_layout_of_long_ladder_places_every_member():
+    graph = compile(ladder(50, 8))
+    layout = compute_layout(graph, use_cache=False)
+    assert {pc.component.name for pc in layout.components} >= {f"R{i}" for i in range(50)} | {f"C{i}" for i in range(8)}
+    cells = [(round(pc.x / GRID_SIZE), round(pc.y / GRID_SIZE)) for pc in layout.components]
+    assert len(cells) == len(set(cells))
+    assert min(pc.x for pc in layout.components) >= 0 and min(pc.y for pc in layout.components) >= 0
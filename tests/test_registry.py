@@ -0,0 +1,60 @@
+import sys
+import pytest
+from tecd import compile
+from tecd.layout import compute_layout
+from tecd.lexer import Lexer, TokenType
+from tecd.registry import KEYWORDS, SOURCE, get_type, is_keyword, load_plugins, role, unregister_type
+from tecd.symbols import NMOS, PMOS, get_symbol
+
+PLUGIN = '''
+from tecd.registry import SOURCE, ComponentType, register_type
+from tecd.symbols import Symbol
+
+def fuse_symbol():
+    return Symbol(path='<rect x="-15" y="-5" width="30" height="10"/>', width=30, height=10,
+                  pins={'a': (-15, 0), 'b': (15, 0)})
+
+register_type(ComponentType('FUSE', ('a', 'b'), fuse_symbol))
+register_type(ComponentType('BATTERY', ('-', '+'), 'tecd.symbols:VDC', SOURCE))
+'''
+
+def test_builtin_types():
+    assert get_type('RES').default_pins == ('left', 'right')
+    assert role('VAC') == SOURCE and role('IND') is None
+    assert get_symbol('PMOS') is PMOS and PMOS.path != NMOS.path
+    with pytest.raises(KeyError):
+        get_symbol('NOSUCHTYPE')
+
+@pytest.fixture
+def fuse_plugin(tmp_path, monkeypatch):
+    # Loaded for one test only, so later tests never see FUSE or BATTERY
+    (tmp_path / "tecd_fuse_plugin.py").write_text(PLUGIN)
+    monkeypatch.syspath_prepend(str(tmp_path))
+    load_plugins(["tecd_fuse_plugin"])
+    yield
+    for name in ('FUSE', 'BATTERY'):
+        unregister_type(name)
+    sys.modules.pop("tecd_fuse_plugin", None)
+
+def test_plugin_types(fuse_plugin):
+    tokens = Lexer("FUSE F1").tokenize()
+    assert tokens[0].type == TokenType.TYPE
+
+    graph = compile("""
+    @circuit
+    BATTERY B1
+    FUSE F1
+    B1 -> F1 -> GND
+    @end
+    """)
+    pins = {(p.component.name, p.pin_name) for net in graph.nets for p in net.points}
+    assert {("B1", "+"), ("F1", "a"), ("F1", "b")} <= pins
+    layout = compute_layout(graph)
+    fuse = next(pc for pc in layout.components if pc.component.name == "F1")
+    assert fuse.bbox()[2] - fuse.bbox()[0] == 30
+
+def test_unregister_type(fuse_plugin):
+    assert is_keyword('FUSE')
+    unregister_type('FUSE')
+    assert get_type('FUSE') is None and 'FUSE' not in KEYWORDS
+    assert Lexer("FUSE F1").tokenize()[0].type != TokenType.TYPE
@@ -0,0 +1,72 @@
+import pytest
+from tecd import compile
+from tecd.layout import compute_layout
+from tecd.renderer import render_svg
+from tecd.spatial import GridIndex
+
+DIVIDER = """
+@circuit
+@options
+  layout = horizontal
+@end
+VDC Vin (dc=12V)
+RES R1 (value=10k)
+RES R2 (value=2.2k)
+Vin -> R1 -> Vout
+Vout -> R2 -> GND
+@end
+"""
+
+def test_grid_index_query():
+    index = GridIndex(cell_size=50)
+    index.insert((0, 0, 10, 10), "a")
+    index.insert((100, 100, 120, 120), "b")
+    index.insert((-500, 0, 500, 5), "c")
+
+    assert index.query((5, 5, 20, 20)) == ["a", "c"]
+    assert index.query((110, 110, 111, 111)) == ["b"]
+    assert index.query((1000, 1000, 1100, 1100)) == []
+
+def test_viewport_only_emits_visible_elements():
+    graph = compile(DIVIDER)
+    layout = compute_layout(graph)
+
+    full = render_svg(graph, layout)
+    assert all(f">{name}</text>" in full for name in ["Vin", "R1", "R2"])
+
+    # Viewport around the first rank only (Vin sits at x=100)
+    clipped = render_svg(graph, layout, viewport=(0, 0, 150, 150))
+    assert 'viewBox="0 0 150 150"' in clipped
+    assert ">Vin</text>" in clipped
+    assert ">R2</text>" not in clipped
+
+    empty = render_svg(graph, layout, viewport=(5000, 5000, 100, 100))
+    assert "<g transform" not in empty
+
+def test_labels_do_not_overlap():
+    from tecd.labels import LabelPlacer
+    from tecd.routing import route_nets
+    from tecd.spatial import bbox_intersects
+
+    graph = compile(DIVIDER)
+    layout = compute_layout(graph)
+    placed = LabelPlacer(layout, route_nets(graph, layout)).place()
+    labels = [label for group in placed.values() for label in group]
+
+    assert not any(label.overlapping for label in labels)
+    for i, a in enumerate(labels):
+        for b in labels[i + 1:]:
+            assert not bbox_intersects(a.bbox, b.bbox)
+
+def test_label_placer_falls_back_when_crowded():
+    from tecd.ast_nodes import Component
+    from tecd.labels import LabelPlacer
+    from tecd.layout import Layout, PlacedComponent
+
+    # Stack many symbols on one spot so the candidates run out
+    stacked = [PlacedComponent(Component(type_name='RES', name=f'R{i}', parameters={}), 100, 100, 'RES')
+               for i in range(40)]
+    layout = Layout(stacked, 200, 200)
+    placed = LabelPlacer(layout, []).place()
+    assert set(placed) == {pc.component.name for pc in stacked}
+    assert any(label.overlapping for group in placed.values() for label in group)
@@ -0,0 +1,80 @@
+import pytest
+from tecd import compile
+from tecd.layout import compute_layout
+from tecd.routing import Route, count_crossings, manhattan_mst, route_nets
+
+def manhattan(a, b):
+    return abs(a[0] - b[0]) + abs(a[1] - b[1])
+
+def test_manhattan_mst_is_minimal():
+    points = [(0, 0), (10, 0), (5, 8), (20, 20), (0, 30), (12, 2), (7, 7)]
+    edges = manhattan_mst(points)
+    assert len(edges) == len(points) - 1
+
+    # Reference weight from a quadratic Prim's
+    in_tree, best = {0}, 0
+    while len(in_tree) < len(points):
+        d, j = min((manhattan(points[i], points[j]), j)
+                   for i in in_tree for j in range(len(points)) if j not in in_tree)
+        in_tree.add(j)
+        best += d
+    assert sum(manhattan(points[i], points[j]) for i, j in edges) == best
+
+def test_multi_pin_net_is_one_tree():
+    graph = compile("""
+    @circuit
+    @options
+      layout = horizontal
+    @end
+    VDC V1 (dc=5V)
+    RES R1 (v=1k)
+    RES R2 (v=1k)
+    RES R3 (v=1k)
+    V1 -> Bus
+    Bus -> R1 -> GND
+    Bus -> R2 -> GND
+    Bus -> R3 -> GND
+    @end
+    """)
+    routes = route_nets(graph, compute_layout(graph))
+    bus = max(routes, key=lambda r: len(r.polylines))
+    # V1.- plus three resistor pins: a spanning tree has three edges
+    assert len(bus.polylines) == 3
+
+def test_count_crossings():
+    cross = [Route("A", [[(0, 0), (10, 10)]]), Route("B", [[(0, 10), (10, 0)]])]
+    assert count_crossings(cross) == 1
+    same_net = [Route("A", [[(0, 0), (10, 10)], [(0, 10), (10, 0)]])]
+    assert count_crossings(same_net) == 0
+
+def test_grid_router_avoids_symbol_bodies():
+    graph = compile("""
+    @circuit
+    @options
+      layout = horizontal
+      routing = grid
+    @end
+    VDC V1 (dc=5V)
+    RES R1 (v=1k)
+    RES R2 (v=1k)
+    V1 -> R1 -> R2 -> GND
+    V1.- -> R2.right
+    @end
+    """)
+    layout = compute_layout(graph)
+    routes = route_nets(graph, layout)
+    assert len(routes) == len(graph.nets)
+
+    def strictly_inside(p, box):
+        return box[0] < p[0] < box[2] and box[1] < p[1] < box[3]
+
+    for route in routes:
+        for line in route.polylines:
+            # The first segment is the pin lead out of the symbol
+            for a, b in zip(line[1:], line[2:]):
+                for t in range(11):
+                    p = (a[0] + (b[0] - a[0]) * t / 10, a[1] + (b[1] - a[1]) * t / 10)
+                    assert not any(strictly_inside(p, pc.bbox()) for pc in layout.components)
+
+    # Routing the same layout again is served from the cache
+    assert route_nets(graph, layout) is routes
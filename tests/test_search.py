@@ -0,0 +1,61 @@
+import pytest
+from tecd import compile
+from tecd.blocks import render_blocks
+from tecd.cli import main
+from tecd.layout import compute_layout
+from tecd.metrics import count_overlaps
+from tecd.search import Candidate, candidates, search_layout
+
+SOURCE = """@circuit
+VDC V1 (dc=5V)
+RES R1 (value=1k)
+RES R2 (value=2k)
+RES R3 (value=1k)
+RES R4 (value=2k)
+V1 -> R1 -> A -> R2 -> GND
+V1 -> R3 -> B -> R4 -> GND
+A -> R5 -> B
+RES R5 (value=10k)
+@end
+"""
+
+def placements(layout):
+    return sorted((pc.component.name, pc.x, pc.y, pc.rotation) for pc in layout.components)
+
+def test_candidates_are_consecutive_seeds():
+    assert candidates(3, seed=7) == [Candidate('automatic', 7), Candidate('automatic', 8), Candidate('automatic', 9)]
+    assert [c.mode for c in candidates(1, include_rank=True)] == ['automatic', 'horizontal', 'vertical']
+
+def test_seeded_layouts_differ_and_repeat():
+    graph = compile(SOURCE)
+    first = compute_layout(graph, seed=1)
+    assert placements(first) == placements(compute_layout(graph, seed=1))
+    assert placements(first) != placements(compute_layout(graph, seed=2))
+
+def test_search_keeps_best_and_winner_is_reproducible():
+    graph = compile(SOURCE)
+    layout, choice, score = search_layout(graph, SOURCE, None, None, restarts=4, include_rank=True, jobs=2)
+    serial, serial_choice, serial_score = search_layout(graph, SOURCE, None, None, restarts=4, include_rank=True, jobs=1)
+    assert (choice, score) == (serial_choice, serial_score)
+    assert placements(layout) == placements(serial)
+    assert score.overlaps == count_overlaps(layout)
+
+    for seed in range(4):
+        _, _, single = search_layout(graph, SOURCE, None, None, restarts=1, seed=seed, jobs=1)
+        assert score.key() <= single.key()
+
+def test_search_runs_in_every_block(tmp_path):
+    from tecd.renderer import render_svg
+    source = SOURCE.replace("@circuit", "@circuit one") + SOURCE.replace("@circuit", "@circuit two")
+    search = {'restarts': 3, 'seed': 1, 'include_rank': True}
+    results = render_blocks(source, None, str(tmp_path / "out.svg"), jobs=2, search=search)
+    assert [error for _, error in results] == [None, None]
+
+    graph = compile(SOURCE)
+    layout, _, _ = search_layout(graph, SOURCE, None, None, jobs=1, **search)
+    expected = render_svg(graph, layout)
+    assert (tmp_path / "out-one.svg").read_text() == expected == (tmp_path / "out-two.svg").read_text()
+
+def test_layout_override_conflicts_with_search(tmp_path):
+    with pytest.raises(SystemExit):
+        main([str(tmp_path / "in.tecd"), "--layout-restarts", "2", "--layout", "vertical"])
@@ -0,0 +1,73 @@
+import asyncio
+import os
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+import pytest
+from tecd.server import RenderError, RenderServer, RenderService, ServiceBusy
+
+DIVIDER = "@circuit\nVDC V1\nRES R1\nRES R2\nV1 -> R1 -> R2 -> GND\n@end\n"
+
+def test_identical_requests_coalesce_then_hit_cache():
+    async def run():
+        with ThreadPoolExecutor(2) as pool:
+            service = RenderService(pool)
+            results = await asyncio.gather(*(service.render(DIVIDER) for _ in range(5)))
+            again = await service.render(DIVIDER)
+            return service, results, again
+    service, results, again = asyncio.run(run())
+    assert len({svg for _, svg in results}) == 1 and again == results[0]
+    assert results[0][1].startswith("<svg")
+    assert service.stats == {'requests': 6, 'hits': 1, 'coalesced': 4, 'renders': 1, 'rejected': 0, 'restarts': 0}
+
+def test_full_queue_is_refused_and_errors_are_reported():
+    async def run():
+        with ThreadPoolExecutor(1) as pool:
+            service = RenderService(pool, queue_limit=1)
+            other = DIVIDER.replace("R2 -> GND", "GND")
+            outcomes = await asyncio.gather(service.render(DIVIDER), service.render(other), return_exceptions=True)
+            try:
+                await service.render("@circuit\nRES R1\nRES R1\n@end\n")
+            except RenderError as e:
+                error = str(e)
+            return outcomes, error
+    outcomes, error = asyncio.run(run())
+    assert isinstance(outcomes[1], ServiceBusy) and outcomes[0][1].startswith("<svg")
+    assert "Duplicate component name 'R1'" in error
+
+def test_broken_pool_is_replaced():
+    async def run():
+        service = RenderService(ProcessPoolExecutor(1), pool_factory=lambda: ProcessPoolExecutor(1))
+        # A worker dying mid-job breaks the whole pool
+        with pytest.raises(BrokenProcessPool):
+            await asyncio.wrap_future(service.pool.submit(os._exit, 1))
+        _, svg = await service.render(DIVIDER)
+        service.pool.shutdown()
+        return service, svg
+    service, svg = asyncio.run(run())
+    assert svg.startswith("<svg") and service.stats['restarts'] == 1
+
+def test_http_round_trip():
+    async def request(port, head, body=b""):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(head.encode() + body)
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+
+    async def run():
+        with ThreadPoolExecutor(1) as pool:
+            server = RenderServer(RenderService(pool))
+            listener = await asyncio.start_server(server.handle, "127.0.0.1", 0)
+            port = listener.sockets[0].getsockname()[1]
+            body = DIVIDER.encode()
+            ok = await request(port, f"POST /render?layout=vertical HTTP/1.1\r\nContent-Length: {len(body)}\r\nConnection: close\r\n\r\n", body)
+            bad = await request(port, "POST /render HTTP/1.1\r\nContent-Length: 7\r\nConnection: close\r\n\r\n", b"garbage")
+            missing = await request(port, "GET /nope HTTP/1.1\r\nConnection: close\r\n\r\n")
+            listener.close()
+            await listener.wait_closed()
+            return ok, bad, missing
+    ok, bad, missing = asyncio.run(run())
+    assert ok.startswith(b"HTTP/1.1 200 OK") and b"image/svg+xml" in ok and b"<svg" in ok
+    assert bad.startswith(b"HTTP/1.1 400")
+    assert missing.startswith(b"HTTP/1.1 404")
@@ -0,0 +1,64 @@
+import io
+import pytest
+from tecd.spice import SpiceError, import_spice, write_spice
+
+def write(path, text):
+    path.write_text(text)
+    return str(path)
+
+def test_import_basic_deck(tmp_path):
+    write(tmp_path / "models.lib", ".model QGEN PNP(IS=1e-14)\n")
+    deck = write(tmp_path / "amp.cir", """Common emitter
+.include models.lib
+* bias network
+V1 vcc 0 DC 5
+R1 vcc b 10k ; top resistor
+R2 b 0
++ 2.2k
+Q1 c b e QGEN
+RE e gnd 470
+.end
+R99 never read
+""")
+    graph = import_spice(deck)
+
+    assert set(graph.components) == {"V1", "R1", "R2", "Q1", "RE", "GND"}
+    assert graph.components["R2"].parameters == {"value": "2.2k"}
+    assert graph.components["V1"].parameters == {"dc": "5"}
+    assert graph.components["Q1"].type_name == "PNP"
+
+    nets = {net.id: {(p.component.name, p.pin_name) for p in net.points} for net in graph.nets}
+    assert nets["0"] == {("GND", "0"), ("V1", "-"), ("R2", "right"), ("RE", "right")}
+    assert nets["b"] == {("R1", "right"), ("R2", "left"), ("Q1", "B")}
+    assert graph.connectivity.num_nets == len(graph.nets)
+
+def test_transient_sources(tmp_path):
+    deck = write(tmp_path / "tran.cir", """Transient sources
+V1 in 0 SIN(0 1 1k)
+V2 clk 0 PULSE (0 5 1n 1n 1n 5u 10u)
+V3 bias 0 DC 2 AC 1 SIN(2 0.5 50)
+I1 in 0 exp(0 1m 1u 1u 2u 2u)
+R1 in clk 1k
+.end
+""")
+    graph = import_spice(deck)
+    params = {name: graph.components[name].parameters for name in ("V1", "V2", "V3", "I1")}
+    assert params == {
+        "V1": {"tran": "SIN(0 1 1k)"},
+        "V2": {"tran": "PULSE(0 5 1n 1n 1n 5u 10u)"},
+        "V3": {"ac": "1", "dc": "2", "tran": "SIN(2 0.5 50)"},
+        "I1": {"tran": "exp(0 1m 1u 1u 2u 2u)"},
+    }
+    assert graph.components["V3"].type_name == "VAC"
+    # The spec survives export
+    out = io.StringIO()
+    write_spice(graph, out)
+    assert "V1 in 0 SIN(0 1 1k)\n" in out.getvalue()
+    assert "V3 bias 0 DC 2 AC 1 SIN(2 0.5 50)\n" in out.getvalue()
+
+def test_recursive_include_is_rejected(tmp_path):
+    write(tmp_path / "a.inc", ".include b.inc\n")
+    write(tmp_path / "b.inc", ".include a.inc\n")
+    deck = write(tmp_path / "top.cir", "title\n.include a.inc\n")
+    with pytest.raises(SpiceError):
+        import_spice(deck)
@@ -0,0 +1,59 @@
+from tecd import compile
+from tecd.layout import compute_layout
+from tecd import topology
+from tecd.topology import REFINEMENT_ROUNDS, canonical_form, layout_cache
+
+BRIDGE = """@circuit
+@options
+  layout = {layout}
+@end
+VDC {v} (dc={volts})
+RES {a} (value=1k)
+RES {b} (value=2k)
+RES {c} (value=1k)
+{v}.+ -> {a} -> Mid
+Mid -> {b} -> GND
+Mid -> {c} -> GND
+{v}.- -> GND
+@end
+"""
+
+def bridge(v="V1", a="R1", b="R2", c="R3", volts="5V", layout="horizontal"):
+    return compile(BRIDGE.format(v=v, a=a, b=b, c=c, volts=volts, layout=layout))
+
+def test_renamed_copies_share_a_hash():
+    original = canonical_form(bridge())
+    renamed = canonical_form(bridge(v="Vs", a="Rtop", b="Rx", c="Ry", volts="12V"))
+    assert original.digest == renamed.digest
+    assert canonical_form(bridge(layout="vertical")).digest != original.digest
+    # R3 moved from Mid across the source: same parts, a different circuit
+    rewired = compile(BRIDGE.format(v="V1", a="R1", b="R2", c="R3", volts="5V", layout="horizontal")
+                      .replace("Mid -> R3 -> GND", "V1.+ -> R3 -> GND"))
+    assert set(rewired.components) == set(bridge().components)
+    assert canonical_form(rewired).digest != original.digest
+
+def test_layout_is_remapped_onto_new_names():
+    layout_cache.clear()
+    first = compute_layout(bridge())
+    second = compute_layout(bridge(v="Vs", a="Rtop", b="Rx", c="Ry", volts="12V"))
+    assert (layout_cache.hits, layout_cache.misses) == (1, 1)
+
+    renamed = {"V1": "Vs", "R1": "Rtop", "R2": "Rx", "R3": "Ry", "GND": "GND"}
+    before = {renamed[pc.component.name]: (pc.x, pc.y, pc.rotation) for pc in first.components}
+    after = {pc.component.name: (pc.x, pc.y, pc.rotation) for pc in second.components}
+    assert before == after
+    assert second.components[0].component.parameters  # The new circuit's own components
+    assert {pc.component.name for pc in second.components} == set(after)
+
+def test_refinement_rounds_are_bounded(monkeypatch):
+    # A series chain keeps splitting for about n/2 rounds; each round
+    # relabels the nets and the components once
+    calls = []
+    relabel = topology._relabel
+    monkeypatch.setattr(topology, "_relabel", lambda signatures: calls.append(1) or relabel(signatures))
+    n = 200
+    chain = compile("\n".join(["@circuit"] + [f"RES R{i} (value=1k)" for i in range(n)]
+                              + [f"R{i}.right -> R{i + 1}.left" for i in range(n - 1)] + ["@end"]))
+    form = canonical_form(chain)
+    assert len(calls) <= 1 + 2 * REFINEMENT_ROUNDS
+    assert sorted(form.order) == sorted(chain.components)